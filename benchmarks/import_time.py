@@ -0,0 +1,63 @@
+"""
+Measures the import time of py_trading_lib in fresh interpreters.
+
+Usage:
+    python -m benchmarks.import_time [--runs 10] [--max-seconds 0.05]
+
+With --max-seconds the script exits with an error code if the median import time of
+`import py_trading_lib` exceeds the given budget, so startup regressions can be caught in CI.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+STATEMENTS = {
+    "package": "import py_trading_lib",
+    "analysis": "import py_trading_lib.analysis",
+    "data_handler": "import py_trading_lib.data_handler",
+    "SMA": "from py_trading_lib import SMA",
+}
+
+
+def measure_import_time(statement: str, runs: int) -> List[float]:
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    durations = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        durations.append(float(output.stdout))
+    return durations
+
+
+def run(runs: int) -> Dict[str, float]:
+    return {
+        name: statistics.median(measure_import_time(statement, runs))
+        for name, statement in STATEMENTS.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    for name, seconds in results.items():
+        print(f"{name:<15} {seconds * 1000:8.2f} ms")
+
+    if args.max_seconds is not None and results["package"] > args.max_seconds:
+        sys.exit(
+            f"import py_trading_lib took {results['package']:.4f}s, the budget is {args.max_seconds}s."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Times the main building blocks of py_trading_lib at different data sizes.
+
+Usage:
+    python -m benchmarks.suite run [--sizes 10k 1M 10M] [--repeat 3] [--only SMA] [--output results.json]
+    python -m benchmarks.suite compare baseline.json results.json [--threshold 0.1]
+
+The klines of `example_klines` are tiled up to the requested number of rows.
+`run` stores the results as JSON. `compare` prints the ratio of the best times of two runs
+and exits with an error code if a benchmark became slower than allowed by the threshold.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis import RSI, SMA, Analysis, CheckAllTrue, CheckRelation
+from py_trading_lib.data_handler import LocalKlines, ReplayServer, SocketKlineFeed
+from py_trading_lib.orders.orders import OrderGenerator, OrderLongOpen
+import py_trading_lib.utils.sanity_checks as sanity
+
+EXAMPLE_KLINES = os.path.join(
+    os.path.dirname(__file__), "..", "example_klines", "BTC_USDT.csv"
+)
+DEFAULT_SIZES = ["10k", "1M", "10M"]
+_SIZE_SUFFIXES = {"k": 1_000, "M": 1_000_000}
+
+
+def parse_size(size: str) -> int:
+    if size[-1] in _SIZE_SUFFIXES:
+        return int(float(size[:-1]) * _SIZE_SUFFIXES[size[-1]])
+    return int(size)
+
+
+def make_klines(n_rows: int) -> pd.DataFrame:
+    """
+    Tiles the example klines up to `n_rows`. The TIME column keeps increasing across the tiles.
+    """
+    klines = LocalKlines().get_tohlcv_from_csv(EXAMPLE_KLINES)
+    n_tiles = -(-n_rows // len(klines))
+    tiled = pd.concat([klines] * n_tiles, ignore_index=True).iloc[:n_rows]
+
+    interval = int(klines["TIME"].iloc[1] - klines["TIME"].iloc[0])
+    tiled["TIME"] = klines["TIME"].iloc[0] + interval * np.arange(n_rows)
+    return tiled.reset_index(drop=True)
+
+
+class _Fixtures:
+    """
+    The inputs of the benchmarks of one size. They are only built when a benchmark needs them.
+    """
+
+    def __init__(self, n_rows: int, directory: str) -> None:
+        self.n_rows = n_rows
+        self._directory = directory
+
+    @functools.cached_property
+    def klines(self) -> pd.DataFrame:
+        return make_klines(self.n_rows)
+
+    @functools.cached_property
+    def csv_path(self) -> str:
+        path = os.path.join(self._directory, f"klines_{self.n_rows}.csv")
+        self.klines.to_csv(path, index=False)
+        return path
+
+    @functools.cached_property
+    def analysis(self) -> Analysis:
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(20))[0]
+        rsi = analysis.add_ti(RSI(14))[0]
+        above = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        oversold = analysis.add_condition(CheckRelation(rsi, "<", 50))
+        analysis.add_condition(CheckAllTrue([above, oversold]))
+        return analysis
+
+    @functools.cached_property
+    def analysis_data(self) -> pd.DataFrame:
+        return self.analysis.calculate_analysis_data(self.klines)
+
+    @property
+    def signal(self) -> pd.Series:
+        return self.analysis_data.iloc[:, -1]
+
+
+def _read_binary_cache(fixtures: _Fixtures) -> Callable[[], Any]:
+    local_klines = LocalKlines(use_binary_cache=True, cache_dir=fixtures._directory)
+    local_klines.get_tohlcv_from_csv(fixtures.csv_path)  # writes the sidecar
+    return lambda: local_klines.get_tohlcv_from_csv(fixtures.csv_path)
+
+
+def _replay_feed(fixtures: _Fixtures) -> Callable[[], Any]:
+    server = ReplayServer(fixtures.csv_path)
+
+    async def consume() -> int:
+        async with server:
+            n_klines = 0
+            async with SocketKlineFeed("127.0.0.1", server.port) as feed:
+                async for klines in feed:
+                    n_klines += len(klines)
+            return n_klines
+
+    return lambda: asyncio.run(consume())
+
+
+# Every benchmark prepares its inputs and returns the callable which is timed.
+BENCHMARKS: Dict[str, Callable[[_Fixtures], Callable[[], Any]]] = {
+    "LocalKlines.get_tohlcv_from_csv": lambda f: functools.partial(
+        LocalKlines().get_tohlcv_from_csv, f.csv_path
+    ),
+    "LocalKlines.get_tohlcv_from_csv[binary_cache]": _read_binary_cache,
+    "SocketKlineFeed[replay]": _replay_feed,
+    "SMA.calculate": lambda f: functools.partial(SMA(20).calculate, f.klines),
+    "RSI.calculate": lambda f: functools.partial(RSI(14).calculate, f.klines),
+    "CheckRelation.calculate[number]": lambda f: functools.partial(
+        CheckRelation("RSI_14", "<", 50).calculate, f.analysis_data
+    ),
+    "CheckRelation.calculate[column]": lambda f: functools.partial(
+        CheckRelation("CLOSE", ">", "SMA_20").calculate, f.analysis_data
+    ),
+    "CheckAllTrue.calculate": lambda f: functools.partial(
+        CheckAllTrue(["CLOSE>SMA_20", "RSI_14<50"]).calculate, f.analysis_data
+    ),
+    "Analysis.calculate_analysis_data": lambda f: functools.partial(
+        f.analysis.calculate_analysis_data, f.klines
+    ),
+    "OrderGenerator.generate": lambda f: OrderGenerator(
+        f.signal, OrderLongOpen()
+    ).generate,
+    "OrderGenerator.generate_compact": lambda f: OrderGenerator(
+        f.signal, OrderLongOpen()
+    ).generate_compact,
+}
+
+
+def time_benchmark(func: Callable[[], Any], repeat: int) -> List[float]:
+    func()  # warm up, e.g. the page cache and lazy imports
+    return timeit.repeat(func, number=1, repeat=repeat)
+
+
+def run(sizes: List[str], repeat: int, only: Optional[str] = None) -> Dict[str, Any]:
+    names = [name for name in BENCHMARKS if only is None or only in name]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            fixtures = _Fixtures(parse_size(size), directory)
+            for name in names:
+                durations = time_benchmark(BENCHMARKS[name](fixtures), repeat)
+                results.append(
+                    {
+                        "name": name,
+                        "rows": fixtures.n_rows,
+                        "min": min(durations),
+                        "median": float(np.median(durations)),
+                        "repeat": repeat,
+                    }
+                )
+                print(f"{name:<50} {size:>6} {min(durations) * 1000:12.2f} ms")
+
+    return {"meta": _get_meta(), "results": results}
+
+
+def _get_meta() -> Dict[str, str]:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "validation_level": sanity.get_validation_level(),
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], results: Dict[str, Any], threshold: float
+) -> List[str]:
+    """
+    Returns the benchmarks whose best time grew by more than `threshold`, e.g. 0.1 for 10 %.
+    Benchmarks which are missing in one of the runs are skipped.
+    """
+    baseline_times = {(r["name"], r["rows"]): r["min"] for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        key = (result["name"], result["rows"])
+        if key not in baseline_times:
+            continue
+
+        ratio = result["min"] / baseline_times[key]
+        is_regression = ratio > 1.0 + threshold
+        if is_regression:
+            regressions.append(f"{key[0]} [{key[1]} rows]")
+        flag = "REGRESSION" if is_regression else ""
+        print(f"{key[0]:<50} {key[1]:>10} {ratio:8.2f}x {flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--only", default=None)
+    run_parser.add_argument("--output", default=None)
+    run_parser.add_argument(
+        "--validation-level", choices=["full", "once", "off"], default="full"
+    )
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        # The same frames are passed repeatedly, so "once" would only time the first validation.
+        sanity.set_validation_level(args.validation_level)
+        results = run(args.sizes, args.repeat, args.only)
+        if args.output is not None:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+    else:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.results) as file:
+            results = json.load(file)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} benchmark(s) regressed: {regressions}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,108 @@
-from py_trading_lib.utils import *
-from py_trading_lib.data_handler import *
-from py_trading_lib.analysis import *
+import importlib
 
-# __all__=[...] is to be done in the future near the end of the project
+# The subpackages are only imported when one of their names is accessed for the first time (PEP 562).
+# Thus `import py_trading_lib` stays cheap and e.g. pandas is only loaded when it is needed.
+# Builtin generics are used on purpose, because importing typing alone doubles the import time.
+_LAZY_SUBPACKAGES: dict[str, list[str]] = {
+    "utils": [
+        # sanity_checks
+        "set_validation_level",
+        "get_validation_level",
+        "mark_validated",
+        "is_validated",
+        "check_frame",
+        "check_cols_for_tohlcv",
+        "check_is_list1_in_list2",
+        "check_has_min_len",
+        "check_not_empty",
+        "check_has_no_nans",
+        "check_contains_only_bools",
+        "check_contains_only_numbers",
+        "check_file_exist",
+        "check_is_file_csv",
+        # utils
+        "convert_to_df_from_sr_or_df",
+        "is_series_or_dataframe",
+        "get_fingerprint",
+        "to_compact",
+        "is_compact",
+        "get_time",
+        # profiling
+        "Profiler",
+        "ProfileReport",
+        "StageStats",
+        "ProfileEvent",
+        # packed_bits
+        "PackedBits",
+    ],
+    "data_handler": [
+        "LocalKlines",
+        "Resampler",
+        "parse_interval",
+        "KlineFeed",
+        "SocketKlineFeed",
+        "ReplayServer",
+        "KlineWindow",
+        "KlineStore",
+        "KlineGaps",
+        "find_gaps",
+        "fill_gaps",
+        "set_time_index",
+    ],
+    "analysis": [
+        "TechnicalIndicator",
+        "SMA",
+        "RSI",
+        "MACD",
+        "BBANDS",
+        "STOCH",
+        "ATR",
+        "Resampled",
+        "Condition",
+        "CheckRelation",
+        "CheckAllTrue",
+        "CheckAnyTrue",
+        "Expression",
+        "Relation",
+        "Column",
+        "And",
+        "Or",
+        "Not",
+        "CompiledExpression",
+        "CheckExpression",
+        "expression_from_condition",
+        "IndicatorCache",
+        "CacheInfo",
+        "AnalysisDiskCache",
+        "DiskCacheInfo",
+        "Analysis",
+        "PackedAnalysisData",
+    ],
+    "orders": [],
+    "backtesting": ["Backtest", "BacktestResult", "ParameterSweep", "WalkForward"],
+}
+
+_LAZY_ATTRS: dict[str, str] = {
+    name: subpackage
+    for subpackage, names in _LAZY_SUBPACKAGES.items()
+    for name in names
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str) -> object:
+    if name in _LAZY_SUBPACKAGES:
+        return importlib.import_module(f"{__name__}.{name}")
+
+    if name in _LAZY_ATTRS:
+        subpackage = importlib.import_module(f"{__name__}.{_LAZY_ATTRS[name]}")
+        value = getattr(subpackage, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_SUBPACKAGES) | set(_LAZY_ATTRS))
@@ -1,16 +1,52 @@
-from .technical_indicators import TechnicalIndicator, SMA, RSI
-from .conditions import Condition, CheckRelation, CheckAllTrue
-from .analysis import Analysis
+from .technical_indicators import TechnicalIndicator, SMA, RSI, MACD, BBANDS, STOCH, ATR
+from .multi_timeframe import Resampled
+from .conditions import Condition, CheckRelation, CheckAllTrue, CheckAnyTrue
+from .expressions import (
+    Expression,
+    Relation,
+    Column,
+    And,
+    Or,
+    Not,
+    CompiledExpression,
+    CheckExpression,
+    expression_from_condition,
+)
+from .cache import IndicatorCache, CacheInfo
+from .disk_cache import AnalysisDiskCache, DiskCacheInfo
+from .analysis import Analysis, PackedAnalysisData
 
 __all__ = [
     # TechnicalIndicator
     "TechnicalIndicator",
     "SMA",
     "RSI",
+    "MACD",
+    "BBANDS",
+    "STOCH",
+    "ATR",
+    "Resampled",
     # Conditions
     "Condition",
     "CheckRelation",
     "CheckAllTrue",
+    "CheckAnyTrue",
+    # expressions
+    "Expression",
+    "Relation",
+    "Column",
+    "And",
+    "Or",
+    "Not",
+    "CompiledExpression",
+    "CheckExpression",
+    "expression_from_condition",
+    # cache
+    "IndicatorCache",
+    "CacheInfo",
+    "AnalysisDiskCache",
+    "DiskCacheInfo",
     # handler
     "Analysis",
+    "PackedAnalysisData",
 ]
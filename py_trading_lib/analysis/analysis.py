@@ -1,17 +1,55 @@
-from typing import List
+import contextlib
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+import numpy as np
 import pandas as pd
 
-from py_trading_lib.analysis import TechnicalIndicator, Condition
+from py_trading_lib.analysis import TechnicalIndicator, Condition, IndicatorCache
+from py_trading_lib.analysis.conditions import _CheckBools
+from py_trading_lib.analysis.disk_cache import AnalysisDiskCache
+from py_trading_lib.utils.packed_bits import PackedBits
+import py_trading_lib.utils.profiling as profiling
 import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
 
-__all__ = ["Analysis"]
+__all__ = ["Analysis", "PackedAnalysisData"]
+
+
+class PackedAnalysisData(NamedTuple):
+    data: pd.DataFrame
+    """The TOHLCV and indicator columns."""
+    conditions: Dict[str, PackedBits]
+    """The packed result of every condition by its name."""
 
 
 class Analysis:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cache: Optional[IndicatorCache] = None,
+        disk_cache: Optional[AnalysisDiskCache] = None,
+    ) -> None:
+        """
+        Identical TechnicalIndicators are always calculated only once per call.
+        Pass an IndicatorCache to also reuse the results across calls and Analysis instances.
+        Pass an AnalysisDiskCache to reuse the whole results of `calculate_analysis_data` across processes.
+        """
         self._technical_indicators: List[TechnicalIndicator] = []
         self._conditions: List[Condition] = []
+        self._cache = cache
+        self._disk_cache = disk_cache
 
     def add_ti(self, ti: TechnicalIndicator) -> List[str]:
         self._technical_indicators.append(ti)
@@ -32,22 +70,356 @@ class Analysis:
             raise ValueError("A Condition must be set.")
 
     def calculate_analysis_data(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
-        self._perform_sanity_checks(tohlcv)
-        analysis_data = self._calculate_technical_indicators(tohlcv)
-        analysis_data = self._calculate_conditions(analysis_data)
+        """
+        The stages can be profiled with `py_trading_lib.utils.Profiler`.
+        """
+        with profiling.record("analysis", "calculate_analysis_data"):
+            with profiling.record("sanity_checks", "Analysis"):
+                self._perform_sanity_checks(tohlcv)
+
+            fingerprint = None
+            if self._cache is not None or self._disk_cache is not None:
+                fingerprint = utils.get_fingerprint(tohlcv)
+            disk_cache_key = self._get_disk_cache_key(fingerprint)
+            if disk_cache_key is not None:
+                assert self._disk_cache is not None
+                with profiling.record("disk_cache", "load"):
+                    cached = self._disk_cache.load(disk_cache_key, tohlcv)
+                if cached is not None:
+                    return cached
+
+            with profiling.record("allocate", "Analysis"):
+                analysis_data = self._allocate_analysis_data(tohlcv)
+            self._calculate_technical_indicators(tohlcv, analysis_data, fingerprint)
+            self._calculate_conditions(analysis_data)
+            frame = analysis_data.get_frame()
+
+            if disk_cache_key is not None:
+                assert self._disk_cache is not None
+                with profiling.record("disk_cache", "store"):
+                    self._disk_cache.store(disk_cache_key, frame)
+            return frame
+
+    def _get_disk_cache_key(self, fingerprint: Optional[str]) -> Optional[str]:
+        if self._disk_cache is None or fingerprint is None:
+            return None
+        config_hash = self.get_config_hash()
+        if config_hash is None:
+            return None
+        return f"{config_hash}-{fingerprint}"
+
+    def get_config_hash(self) -> Optional[str]:
+        """
+        Returns a hash of the indicators and conditions, which is stable across processes,
+        or None if an indicator or a condition can't be cached
+        (see `TechnicalIndicator.get_params` and `Condition.get_params`).
+        """
+        config: List[str] = []
+        for item in [*self._technical_indicators, *self._conditions]:
+            key = item.get_cache_key()
+            if key is None:
+                return None
+            config.append(repr(key))
+        return hashlib.blake2b(repr(config).encode(), digest_size=16).hexdigest()
+
+    def calculate_packed_conditions(self, tohlcv: pd.DataFrame) -> PackedAnalysisData:
+        """
+        Like `calculate_analysis_data`, but the conditions are packed with one bit per row
+        instead of being stored as bool columns next to the indicators.
+        CheckAllTrue and CheckAnyTrue combine the packed results of previous conditions word-wise.
+        All other conditions are calculated on the TOHLCV and indicator columns.
+        """
+        with profiling.record("analysis", "calculate_packed_conditions"):
+            with profiling.record("sanity_checks", "Analysis"):
+                self._perform_sanity_checks(tohlcv)
+            with profiling.record("allocate", "Analysis"):
+                analysis_data = self._allocate_analysis_data(
+                    tohlcv, with_conditions=False
+                )
+            self._calculate_technical_indicators(tohlcv, analysis_data)
+            data = analysis_data.get_frame()
+
+            conditions: Dict[str, PackedBits] = {}
+            for condition in self._conditions:
+                conditions[condition.get_name()] = self._calculate_packed_condition(
+                    condition, data, conditions
+                )
+            return PackedAnalysisData(data, conditions)
+
+    def calculate_windows(
+        self, analysis_data: pd.DataFrame, windows: Sequence[Tuple[int, int]]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the rows [start, stop) of every window of the analysis data of a whole series (see `calculate_analysis_data`)
+        as if only these klines had been analysed, so overlapping windows share the calculation.
+
+        Like in a calculation on the window alone the first `get_min_len() - 1` values of every indicator are NaN,
+        so the window never uses an indicator before it has seen enough klines of the window.
+        Only the conditions of these warm-up rows are calculated again, for all windows at once,
+        which assumes row-wise conditions like all built-in ones. After the warm-up the indicators equal those
+        of the whole series. They only depend on earlier klines, but smoothed indicators like the RSI
+        keep the history before the window.
+        """
+        n_tohlcv_cols = self._check_analysis_data(analysis_data)
+        for start, stop in windows:
+            if not 0 <= start < stop <= len(analysis_data):
+                raise ValueError(
+                    f"The window [{start}, {stop}) must be a non empty range within the {len(analysis_data)} rows."
+                )
+        return self._iterate_windows(analysis_data, windows, n_tohlcv_cols)
+
+    def _iterate_windows(
+        self,
+        analysis_data: pd.DataFrame,
+        windows: Sequence[Tuple[int, int]],
+        n_tohlcv_cols: int,
+    ) -> Iterator[pd.DataFrame]:
+        max_warm_up = max(ti.get_min_len() for ti in self._technical_indicators) - 1
+        n_warm_ups = [max(0, min(max_warm_up, stop - start)) for start, stop in windows]
+        if sum(n_warm_ups) > 0:
+            with profiling.record("analysis", "calculate_warm_ups"):
+                warm_ups = self._calculate_warm_ups(
+                    analysis_data, windows, n_warm_ups, n_tohlcv_cols
+                )
+
+        ends = np.cumsum(n_warm_ups)
+        for (start, stop), n_warm_up, end in zip(windows, n_warm_ups, ends):
+            window = analysis_data.iloc[start:stop].copy()
+            if n_warm_up > 0:
+                warm_up = warm_ups.iloc[end - n_warm_up : end]
+                warm_up.index = window.index[:n_warm_up]
+                window.iloc[:n_warm_up, n_tohlcv_cols:] = warm_up
+            yield window
+
+    def _calculate_warm_ups(
+        self,
+        analysis_data: pd.DataFrame,
+        windows: Sequence[Tuple[int, int]],
+        n_warm_ups: List[int],
+        n_tohlcv_cols: int,
+    ) -> pd.DataFrame:
+        """
+        Recalculates the indicator and condition columns of the warm-up rows of all windows,
+        which are stacked into one frame, so every condition is only calculated once.
+        """
+        rows = np.concatenate(
+            [np.arange(start, start + n) for (start, _), n in zip(windows, n_warm_ups)]
+        ).astype(np.intp)
+        # The position of every row within its window.
+        positions = np.concatenate([np.arange(n) for n in n_warm_ups]).astype(np.intp)
+
+        tohlcv = analysis_data.iloc[rows, :n_tohlcv_cols]
+        tohlcv.index = pd.RangeIndex(len(rows))
+        stacked = self._allocate_analysis_data(tohlcv)
+
+        col = n_tohlcv_cols
+        for ti in self._technical_indicators:
+            n_cols = len(ti.get_names())
+            values = analysis_data.iloc[rows, col : col + n_cols].to_numpy()
+            values[positions < ti.get_min_len() - 1] = np.nan
+            stacked.write_indicator(pd.DataFrame(values))
+            col += n_cols
+
+        self._calculate_conditions(stacked)
+        return stacked.get_frame().iloc[:, n_tohlcv_cols:]
+
+    def _check_analysis_data(self, analysis_data: pd.DataFrame) -> int:
+        """
+        Returns the number of TOHLCV columns, which precede the indicator and condition columns.
+        """
+        self._check_correct_setup()
+        names = self._get_ti_names() + self._get_condition_names()
+        n_tohlcv_cols = len(analysis_data.columns) - len(names)
+        if n_tohlcv_cols < 0 or analysis_data.columns[n_tohlcv_cols:].tolist() != (
+            names
+        ):
+            raise ValueError(
+                "The analysis data must be calculated by calculate_analysis_data of this analysis."
+            )
+        return n_tohlcv_cols
+
+    def _calculate_packed_condition(
+        self,
+        condition: Condition,
+        data: pd.DataFrame,
+        conditions: Dict[str, PackedBits],
+    ) -> PackedBits:
+        if isinstance(condition, _CheckBools) and set(
+            condition.get_needed_conditions()
+        ).issubset(conditions):
+            with profiling.record("condition", condition.get_name):
+                return condition.combine_packed(conditions)
+        return condition.calculate_packed(data)
+
+    def _allocate_analysis_data(
+        self,
+        tohlcv: pd.DataFrame,
+        buffer: Optional[memoryview] = None,
+        with_conditions: bool = True,
+    ) -> "_AnalysisData":
+        analysis_data = _AnalysisData(
+            tohlcv.columns.tolist(),
+            list(tohlcv.dtypes),
+            tohlcv.index,
+            self._get_ti_names(),
+            self._get_condition_names() if with_conditions else [],
+            buffer,
+            tohlcv.attrs,
+        )
+        analysis_data.write_tohlcv(tohlcv)
         return analysis_data
 
-    def _calculate_technical_indicators(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
-        technical_indicators = [
-            ti.calculate(tohlcv) for ti in self._technical_indicators
+    def _get_ti_names(self) -> List[str]:
+        return [name for ti in self._technical_indicators for name in ti.get_names()]
+
+    def _get_condition_names(self) -> List[str]:
+        return [condition.get_name() for condition in self._conditions]
+
+    def calculate_many(
+        self,
+        tohlcvs: Mapping[str, pd.DataFrame],
+        max_workers: Optional[int] = None,
+        chunksize: int = 1,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Calculates the analysis data of many symbols in parallel on a process pool.
+
+        The klines are written once into one shared memory segment per symbol,
+        which also holds the space for its indicators and conditions.
+        The workers calculate the analysis directly inside these segments,
+        so neither the klines nor the results are pickled. Only the index is sent along,
+        which is small for the usual RangeIndex.
+        `chunksize` symbols are sent to a worker at once.
+
+        The results are copied once out of the segments, so the segments are released before returning.
+        """
+        if chunksize < 1:
+            raise ValueError(f"The chunksize must be at least 1 but is {chunksize}.")
+        for tohlcv in tohlcvs.values():
+            self._perform_sanity_checks(tohlcv)
+
+        segments: List[SharedMemory] = []
+        shared_data: Dict[str, _AnalysisData] = {}
+        try:
+            tasks = []
+            for symbol, tohlcv in tohlcvs.items():
+                segment = self._create_segment(tohlcv)
+                segments.append(segment)
+                shared_data[symbol] = self._allocate_analysis_data(tohlcv, segment.buf)
+                tasks.append(_SharedTask.from_tohlcv(segment.name, tohlcv))
+
+            with ProcessPoolExecutor(
+                max_workers, initializer=_init_worker, initargs=(self,)
+            ) as executor:
+                # Consuming the iterator reraises the exceptions of the workers.
+                list(executor.map(_calculate_shared_task, tasks, chunksize=chunksize))
+
+            return {
+                symbol: analysis_data.get_frame().copy()
+                for symbol, analysis_data in shared_data.items()
+            }
+        finally:
+            # The views into the segments must be gone before the segments can be closed.
+            shared_data.clear()
+            for segment in segments:
+                _release_segment(segment)
+
+    def _create_segment(self, tohlcv: pd.DataFrame) -> SharedMemory:
+        size = _AnalysisData.calc_buffer_size(
+            list(tohlcv.dtypes),
+            len(tohlcv),
+            len(self._get_ti_names()),
+            len(self._conditions),
+        )
+        return SharedMemory(create=True, size=max(size, 1))
+
+    def _calculate_in_buffer(self, task: "_SharedTask", buffer: memoryview) -> None:
+        analysis_data = _AnalysisData(
+            task.columns,
+            task.dtypes,
+            task.index,
+            self._get_ti_names(),
+            self._get_condition_names(),
+            buffer,
+            task.attrs,
+        )
+        tohlcv = analysis_data.get_tohlcv()
+        # The klines have already been validated by `calculate_many`.
+        sanity.mark_validated(tohlcv)
+        self._calculate_technical_indicators(tohlcv, analysis_data)
+        self._calculate_conditions(analysis_data)
+
+    def _calculate_technical_indicators(
+        self,
+        tohlcv: pd.DataFrame,
+        analysis_data: "_AnalysisData",
+        fingerprint: Optional[str] = None,
+    ) -> None:
+        if self._cache is not None and fingerprint is None:
+            fingerprint = utils.get_fingerprint(tohlcv)
+        calculated: Dict[Any, pd.DataFrame] = {}
+
+        for ti in self._technical_indicators:
+            key = ti.get_cache_key()
+            if key is not None and key in calculated:
+                indicator = calculated[key]
+            elif self._cache is not None:
+                indicator = self._cache.calculate(ti, tohlcv, fingerprint)
+            else:
+                indicator = ti.calculate(tohlcv)
+
+            if key is not None:
+                calculated[key] = indicator
+            with profiling.record("write", ti.get_names):
+                analysis_data.write_indicator(indicator)
+
+    def init_update(self, tohlcv: pd.DataFrame) -> None:
+        """
+        Initialises the TechnicalIndicators with the already known klines, so that `update` can be used.
+        Raises a ValueError before any indicator is initialised if one of them doesn't support updates.
+        """
+        self._perform_sanity_checks(tohlcv)
+        unsupported = [
+            ti.get_names()
+            for ti in self._technical_indicators
+            if not ti.supports_update()
         ]
-        return pd.concat([tohlcv] + technical_indicators, axis=1)
+        if unsupported:
+            raise ValueError(
+                f"The indicators: {unsupported} do not support incremental updates."
+            )
+        for ti in self._technical_indicators:
+            ti.init_update(tohlcv)
 
-    def _calculate_conditions(self, analysis_data: pd.DataFrame) -> pd.DataFrame:
+    def update(self, new_klines: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calculates the analysis data only for the appended klines.
+        The result contains the same columns as `calculate_analysis_data` but only the rows of `new_klines`.
+        """
+        with profiling.record("analysis", "update"):
+            with profiling.record("sanity_checks", "Analysis"):
+                self._perform_sanity_checks(new_klines)
+            with profiling.record("allocate", "Analysis"):
+                analysis_data = self._allocate_analysis_data(new_klines)
+            self._update_technical_indicators(new_klines, analysis_data)
+            self._calculate_conditions(analysis_data)
+            return analysis_data.get_frame()
+
+    def _update_technical_indicators(
+        self, new_klines: pd.DataFrame, analysis_data: "_AnalysisData"
+    ) -> None:
+        for ti in self._technical_indicators:
+            with profiling.record("indicator", ti.get_names):
+                indicator = ti.update(new_klines)
+            with profiling.record("write", ti.get_names):
+                analysis_data.write_indicator(indicator)
+
+    def _calculate_conditions(self, analysis_data: "_AnalysisData") -> None:
         for condition in self._conditions:
-            condition_result = condition.calculate(analysis_data)
-            analysis_data = pd.concat([analysis_data, condition_result], axis=1)
-        return analysis_data
+            # Only the columns written so far, so a reference to a later condition fails like a missing column.
+            condition_result = condition.calculate(analysis_data.get_written_frame())
+            with profiling.record("write", condition.get_name):
+                analysis_data.write_condition(condition_result)
 
     def get_min_len(self) -> int:
         self._check_correct_setup()
@@ -58,3 +430,234 @@ class Analysis:
             if min_len < ti_len:
                 min_len = ti_len
         return min_len
+
+
+class _SharedTask(NamedTuple):
+    segment_name: str
+    columns: List[str]
+    dtypes: List[np.dtype]
+    index: pd.Index
+    attrs: Dict[str, Any]
+
+    @classmethod
+    def from_tohlcv(cls, segment_name: str, tohlcv: pd.DataFrame) -> "_SharedTask":
+        return cls(
+            segment_name,
+            tohlcv.columns.tolist(),
+            list(tohlcv.dtypes),
+            tohlcv.index,
+            tohlcv.attrs,
+        )
+
+
+_worker_analysis: Optional[Analysis] = None
+
+
+def _init_worker(analysis: Analysis) -> None:
+    """
+    The Analysis is sent only once per worker instead of once per task.
+    """
+    global _worker_analysis
+    _worker_analysis = analysis
+
+
+def _calculate_shared_task(task: _SharedTask) -> None:
+    assert _worker_analysis is not None
+    segment = SharedMemory(task.segment_name)
+    try:
+        _worker_analysis._calculate_in_buffer(task, segment.buf)
+    finally:
+        _release_segment(segment, unlink=False)
+
+
+def _release_segment(segment: SharedMemory, unlink: bool = True) -> None:
+    """
+    A segment which is still referenced (e.g. by the traceback of an exception) can't be closed yet.
+    It is then unmapped when the last reference is gone.
+    """
+    with contextlib.suppress(BufferError):
+        segment.close()
+    if unlink:
+        segment.unlink()
+
+
+class _AnalysisData:
+    """
+    Preallocated columnar storage for the analysis data.
+
+    The column layout is known up front, so every dtype gets exactly one NumPy block
+    which already holds the space for all indicators and conditions.
+    The DataFrame wraps these blocks without copying them. Because it is consolidated from the start,
+    pandas never has to copy the blocks and the written results are visible to the following conditions.
+
+    The blocks are either allocated or carved out of a given byte buffer, e.g. shared memory.
+    The indicators are stored as float32 if the TOHLCV data is compact (float32) and as float64 otherwise.
+    """
+
+    _BLOCK_ALIGNMENT = 64
+
+    def __init__(
+        self,
+        columns: List[str],
+        dtypes: List[np.dtype],
+        index: pd.Index,
+        ti_names: List[str],
+        condition_names: List[str],
+        buffer: Optional[memoryview] = None,
+        attrs: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        layout_dtypes = self._get_layout_dtypes(
+            dtypes, len(ti_names), len(condition_names)
+        )
+        layout_names = columns + ti_names + condition_names
+
+        self._blocks: Dict[np.dtype, np.ndarray] = {}
+        self._block_rows: List[int] = []
+        block_names: Dict[np.dtype, List[str]] = {}
+        for name, dtype in zip(layout_names, layout_dtypes):
+            names = block_names.setdefault(dtype, [])
+            self._block_rows.append(len(names))
+            names.append(name)
+
+        frames = []
+        buffer_bytes = None if buffer is None else np.frombuffer(buffer, dtype=np.uint8)
+        offset = 0
+        for dtype, names in block_names.items():
+            shape = (len(names), len(index))
+            if buffer_bytes is None:
+                block = np.zeros(shape, dtype=dtype)
+            else:
+                nbytes = shape[0] * shape[1] * dtype.itemsize
+                block = (
+                    buffer_bytes[offset : offset + nbytes].view(dtype).reshape(shape)
+                )
+                offset += self._align(nbytes)
+            self._blocks[dtype] = block
+            frames.append(pd.DataFrame(block.T, index=index, columns=names, copy=False))
+        self.frame = pd.concat(frames, axis=1, copy=False)
+        # E.g. the TIME base of compact TOHLCV data.
+        self._attrs = dict(attrs or {})
+        self.frame.attrs = dict(self._attrs)
+
+        self._columns = columns
+        self._block_names = block_names
+        self._layout_dtypes = layout_dtypes
+        self._layout_order = self._calc_layout_order(block_names, layout_dtypes)
+        self._next_col = len(columns)
+
+    @classmethod
+    def calc_buffer_size(
+        cls, dtypes: List[np.dtype], n_rows: int, n_tis: int, n_conditions: int
+    ) -> int:
+        """
+        Returns the number of bytes a buffer needs to hold all blocks.
+        """
+        layout_dtypes = cls._get_layout_dtypes(dtypes, n_tis, n_conditions)
+        return sum(
+            cls._align(layout_dtypes.count(dtype) * n_rows * dtype.itemsize)
+            for dtype in dict.fromkeys(layout_dtypes)
+        )
+
+    @staticmethod
+    def _get_layout_dtypes(
+        dtypes: List[np.dtype], n_tis: int, n_conditions: int
+    ) -> List[np.dtype]:
+        layout_dtypes = [np.dtype(dtype) for dtype in dtypes]
+        layout_dtypes += [_get_ti_dtype(layout_dtypes)] * n_tis
+        layout_dtypes += [np.dtype("bool")] * n_conditions
+        return layout_dtypes
+
+    @classmethod
+    def _align(cls, nbytes: int) -> int:
+        return -(-nbytes // cls._BLOCK_ALIGNMENT) * cls._BLOCK_ALIGNMENT
+
+    def _calc_layout_order(
+        self, block_names: Dict[np.dtype, List[str]], layout_dtypes: List[np.dtype]
+    ) -> np.ndarray:
+        block_offsets = {}
+        offset = 0
+        for dtype, names in block_names.items():
+            block_offsets[dtype] = offset
+            offset += len(names)
+
+        frame_positions = [
+            block_offsets[dtype] + row
+            for dtype, row in zip(layout_dtypes, self._block_rows)
+        ]
+        return np.array(frame_positions, dtype=np.intp)
+
+    def _write_col(self, position: int, values: np.ndarray) -> None:
+        dtype = self._layout_dtypes[position]
+        row = self._block_rows[position]
+        self._blocks[dtype][row] = values
+
+    def _write_next_col(self, values: np.ndarray) -> None:
+        self._write_col(self._next_col, values)
+        self._next_col += 1
+
+    def write_tohlcv(self, tohlcv: pd.DataFrame) -> None:
+        for position, (_, col) in enumerate(tohlcv.items()):
+            self._write_col(position, col.to_numpy())
+
+    def get_tohlcv(self) -> pd.DataFrame:
+        """
+        Returns the TOHLCV columns as views of the blocks.
+        """
+        cols = {
+            name: self._blocks[dtype][row]
+            for name, dtype, row in zip(
+                self._columns, self._layout_dtypes, self._block_rows
+            )
+        }
+        tohlcv = pd.DataFrame(cols, index=self.frame.index, copy=False)
+        tohlcv.attrs = dict(self._attrs)
+        return tohlcv
+
+    def write_indicator(self, indicator: pd.DataFrame) -> None:
+        for _, col in indicator.items():
+            dtype = self._layout_dtypes[self._next_col]
+            self._write_next_col(col.to_numpy(dtype=dtype, na_value=np.nan))
+
+    def write_condition(self, condition: pd.Series) -> None:
+        self._write_next_col(condition.to_numpy(dtype="bool"))
+
+    def get_written_frame(self) -> pd.DataFrame:
+        """
+        Returns a frame of only the columns which have been written so far, without copying the blocks.
+        The columns are written in layout order, so these are the first rows of every block.
+        """
+        n_written: Dict[np.dtype, int] = {}
+        for dtype in self._layout_dtypes[: self._next_col]:
+            n_written[dtype] = n_written.get(dtype, 0) + 1
+
+        frames = [
+            pd.DataFrame(
+                self._blocks[dtype][:n_rows].T,
+                index=self.frame.index,
+                columns=self._block_names[dtype][:n_rows],
+                copy=False,
+            )
+            for dtype, n_rows in n_written.items()
+        ]
+        written = pd.concat(frames, axis=1, copy=False)
+        written.attrs = dict(self._attrs)
+        return written
+
+    def get_frame(self) -> pd.DataFrame:
+        """
+        The frame is only reordered (and therefore copied) if the columns of the TOHLCV data
+        have interleaved dtypes, e.g. int64, float64, int64.
+        """
+        is_in_layout_order = np.array_equal(
+            self._layout_order, np.arange(len(self._layout_order))
+        )
+        if is_in_layout_order:
+            return self.frame
+        return self.frame.iloc[:, self._layout_order]
+
+
+def _get_ti_dtype(dtypes: List[np.dtype]) -> np.dtype:
+    float_dtypes = {dtype for dtype in dtypes if dtype.kind == "f"}
+    if float_dtypes == {np.dtype("float32")}:
+        return np.dtype("float32")
+    return np.dtype("float64")
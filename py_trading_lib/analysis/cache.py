@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from py_trading_lib.analysis.technical_indicators import TechnicalIndicator
+import py_trading_lib.utils.utils as utils
+
+__all__ = ["IndicatorCache", "CacheInfo"]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class IndicatorCache:
+    """
+    A memoization layer around `TechnicalIndicator.calculate` with a bounded LRU eviction policy.
+
+    The results are keyed by the indicator class, its parameters and the fingerprint of the input data.
+    The cached DataFrames are shared between all hits, so they must not be modified.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        if maxsize < 1:
+            raise ValueError("The maxsize of the cache must be at least 1.")
+
+        self._maxsize = maxsize
+        self._results: OrderedDict[Tuple[Any, ...], pd.DataFrame] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def calculate(
+        self,
+        ti: TechnicalIndicator,
+        tohlcv: pd.DataFrame,
+        fingerprint: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        The fingerprint of the tohlcv data can be passed in if it is already known,
+        otherwise it is calculated with `utils.get_fingerprint`.
+        """
+        ti_key = ti.get_cache_key()
+        if ti_key is None:
+            return ti.calculate(tohlcv)
+
+        if fingerprint is None:
+            fingerprint = utils.get_fingerprint(tohlcv)
+        key = (ti_key, fingerprint)
+
+        if key in self._results:
+            self._hits += 1
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        self._misses += 1
+        indicator = ti.calculate(tohlcv)
+        self._results[key] = indicator
+        if len(self._results) > self._maxsize:
+            self._results.popitem(last=False)
+        return indicator
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        A pickled cache starts empty, e.g. in the workers of `Analysis.calculate_many`,
+        which would otherwise receive a copy of every cached DataFrame.
+        """
+        state = self.__dict__.copy()
+        state["_results"] = OrderedDict()
+        state["_hits"] = 0
+        state["_misses"] = 0
+        return state
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self._hits, self._misses, self._maxsize, len(self._results))
+
+    def clear(self) -> None:
+        self._results.clear()
+        self._hits = 0
+        self._misses = 0
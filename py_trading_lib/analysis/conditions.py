@@ -1,23 +1,48 @@
 from abc import ABC, abstractmethod
-from typing import Literal, TypeAlias, Union, Callable, List
+import operator as operator_funcs
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeAlias,
+    Union,
+)
 
 import pandas as pd
 
+from py_trading_lib.utils.packed_bits import PackedBits
+import py_trading_lib.utils.profiling as profiling
 import py_trading_lib.utils.sanity_checks as sanity
 import py_trading_lib.utils.utils as utils
 
 operators: TypeAlias = Literal["<", "<=", ">", ">=", "=="]
 comparison_types: TypeAlias = Union[float, int, str]
 
-__all__ = ["Condition", "CheckRelation", "CheckAllTrue"]
+__all__ = ["Condition", "CheckRelation", "CheckAllTrue", "CheckAnyTrue"]
 
 
 class Condition(ABC):
     def calculate(self, data: pd.DataFrame) -> pd.Series:
-        self._perform_sanity_checks(data)
-        condition = self._try_calculate(data)
+        with profiling.record("condition", self.get_name):
+            with profiling.record("sanity_checks", self.get_name):
+                self._perform_sanity_checks(data)
+            condition = self._try_calculate(data)
         return condition
 
+    def calculate_packed(self, data: pd.DataFrame) -> PackedBits:
+        """
+        Returns the result of `calculate` packed into one bit per row.
+        The built-in conditions already return bools, e.g. relations on NaN inputs like the warm-up of an indicator are False.
+        """
+        condition = self.calculate(data)
+        return PackedBits.from_bools(condition.to_numpy(dtype=bool), self.get_name())
+
     @abstractmethod
     def _perform_sanity_checks(self, data: pd.DataFrame) -> None:
         sanity.check_not_empty(data)
@@ -41,6 +66,19 @@ class Condition(ABC):
     def get_name(self) -> str:
         pass
 
+    def get_params(self) -> Optional[Dict[str, Hashable]]:
+        """
+        Returns the parameters which fully define the result of the condition.
+        Conditions returning None are never cached, because their name may not describe their logic.
+        """
+        return None
+
+    def get_cache_key(self) -> Optional[Tuple[Any, ...]]:
+        params = self.get_params()
+        if params is None:
+            return None
+        return (type(self), self.get_name(), tuple(sorted(params.items())))
+
 
 class CheckRelation(Condition):
     def __init__(
@@ -63,12 +101,20 @@ class CheckRelation(Condition):
         self._check_contains_only_numbers_and_nans(data)
 
     def _check_contains_only_numbers_and_nans(self, data: pd.DataFrame):
-        nan_free_data = data.dropna()
-        sanity.check_contains_only_numbers(nan_free_data)
+        sanity.check_frame(
+            data, self.relation.get_needed_cols(), only_numbers=True, allow_nans=True
+        )
 
     def get_name(self) -> str:
         return self.relation.get_name()
 
+    def get_params(self) -> Dict[str, Hashable]:
+        return {
+            "indicator_name": self.relation.indicator_name,
+            "operator": self.relation.operator,
+            "comparison_value": self.relation.comparison_value,
+        }
+
 
 class _Relation:
     def __init__(
@@ -86,12 +132,13 @@ class _Relation:
         )
 
     def get_operator_func(self, operator: operators) -> Callable:
+        # The functions of the operator module keep the conditions picklable, unlike lambdas.
         operators = {
-            "<": lambda x, y: x < y,
-            "<=": lambda x, y: x <= y,
-            ">": lambda x, y: x > y,
-            ">=": lambda x, y: x >= y,
-            "==": lambda x, y: x == y,
+            "<": operator_funcs.lt,
+            "<=": operator_funcs.le,
+            ">": operator_funcs.gt,
+            ">=": operator_funcs.ge,
+            "==": operator_funcs.eq,
         }
         if operator not in operators:
             raise ValueError(f"Invalid relational operator: {operator}")
@@ -100,6 +147,9 @@ class _Relation:
     def get_name(self):
         return self.condition_name
 
+    def get_needed_cols(self) -> List[str]:
+        return [self.indicator_name]
+
 
 class _NumericRelation(_Relation, Condition):
     def _calculate(self, data: pd.DataFrame) -> pd.Series:
@@ -110,8 +160,7 @@ class _NumericRelation(_Relation, Condition):
         return result
 
     def _perform_sanity_checks(self, data: pd.DataFrame) -> None:
-        indicator = [self.indicator_name]
-        sanity.check_cols_exist_in_df(indicator, data)
+        sanity.check_cols_exist_in_df(self.get_needed_cols(), data)
 
 
 class _StringRelation(_Relation, Condition):
@@ -123,11 +172,13 @@ class _StringRelation(_Relation, Condition):
         return result
 
     def _perform_sanity_checks(self, data: pd.DataFrame) -> None:
-        indicators = [self.indicator_name, self.comparison_value]
-        sanity.check_cols_exist_in_df(indicators, data)
+        sanity.check_cols_exist_in_df(self.get_needed_cols(), data)
 
+    def get_needed_cols(self) -> List[str]:
+        return [self.indicator_name, str(self.comparison_value)]
 
-class CheckAllTrue(Condition):
+
+class _CheckBools(Condition):
     def __init__(self, conditions: List[str]):
         self._conditions = conditions
 
@@ -137,8 +188,7 @@ class CheckAllTrue(Condition):
         self._check_conditions_empty()
         sanity.check_cols_exist_in_df(self._conditions, data)
 
-        needed_data = utils.select_only_needed_cols(self._conditions, data)
-        sanity.check_contains_only_bools(needed_data)
+        sanity.check_frame(data, self._conditions, only_bools=True, allow_nans=True)
 
     def _check_conditions_empty(self) -> None:
         if len(self._conditions) == 0:
@@ -146,15 +196,58 @@ class CheckAllTrue(Condition):
 
     def _calculate(self, data: pd.DataFrame) -> pd.Series:
         data_to_calc = utils.select_only_needed_cols(self._conditions, data)
-        signal = data_to_calc.all(axis=1)
+        signal = self._reduce(data_to_calc)
         signal = self._validate(signal)
         return signal
 
+    @abstractmethod
+    def _reduce(self, data: pd.DataFrame) -> pd.Series | bool:
+        pass
+
     def _validate(self, signal: pd.Series | bool) -> pd.Series:
         if isinstance(signal, pd.Series):
             return signal
         else:
             raise TypeError("The calculted result is not a pandas Series.")
 
+    def get_needed_conditions(self) -> List[str]:
+        return self._conditions
+
+    def get_params(self) -> Dict[str, Hashable]:
+        return {"conditions": tuple(self._conditions)}
+
+    def combine_packed(self, packed: Mapping[str, PackedBits]) -> PackedBits:
+        """
+        Combines the already packed results of the needed conditions word-wise.
+        """
+        self._check_conditions_empty()
+        sanity.check_is_list1_in_list2(self._conditions, list(packed))
+        combined = self._combine([packed[name] for name in self._conditions])
+        combined.name = self.get_name()
+        return combined
+
+    @abstractmethod
+    def _combine(self, bits: List[PackedBits]) -> PackedBits:
+        pass
+
+
+class CheckAllTrue(_CheckBools):
+    def _reduce(self, data: pd.DataFrame) -> pd.Series | bool:
+        return data.all(axis=1)
+
+    def _combine(self, bits: List[PackedBits]) -> PackedBits:
+        return PackedBits.all_of(bits)
+
     def get_name(self) -> str:
         return f"CheckAllTrue={self._conditions}"
+
+
+class CheckAnyTrue(_CheckBools):
+    def _reduce(self, data: pd.DataFrame) -> pd.Series | bool:
+        return data.any(axis=1)
+
+    def _combine(self, bits: List[PackedBits]) -> PackedBits:
+        return PackedBits.any_of(bits)
+
+    def get_name(self) -> str:
+        return f"CheckAnyTrue={self._conditions}"
@@ -0,0 +1,134 @@
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+import py_trading_lib.data_handler.columnar_store as columnar
+
+__all__ = ["AnalysisDiskCache", "DiskCacheInfo"]
+
+_META_FILE = "meta.json"
+
+
+class DiskCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    bytes_saved: int
+    """The size of all results which were loaded instead of calculated."""
+    max_bytes: int
+    curr_bytes: int
+
+
+class AnalysisDiskCache:
+    """
+    A persistent cache for the results of `Analysis.calculate_analysis_data`, e.g. for jobs which repeat
+    the same analysis on the same klines. Pass it to `Analysis(disk_cache=...)`.
+
+    Every result is stored as columnar store (one `.npy` file per column) in a directory named by its key,
+    which is a hash of the configuration of the analysis and the fingerprint of the TOHLCV data.
+    Hits are memory-mapped copy-on-write, so they are loaded lazily and never change the stored result.
+    When the stored results exceed `max_bytes`, the least recently used ones are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30) -> None:
+        if max_bytes < 1:
+            raise ValueError("The max_bytes of the cache must be at least 1.")
+
+        self.directory = directory
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str, tohlcv: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Returns the cached result or None. The index and the attrs are taken from the `tohlcv` data,
+        which equal those of the stored result, because they are part of the fingerprint.
+        """
+        entry = self._get_entry_path(key)
+        metadata = columnar.load_metadata(entry)
+        if metadata is None:
+            self._misses += 1
+            return None
+
+        try:
+            analysis_data, _ = columnar.load_columns(entry)
+            # The mtime of the meta file is the time of the last use.
+            os.utime(os.path.join(entry, _META_FILE))
+        except (OSError, ValueError):
+            # E.g. the entry was evicted by another process meanwhile.
+            self._misses += 1
+            return None
+
+        analysis_data.index = tohlcv.index
+        analysis_data.attrs = dict(tohlcv.attrs)
+        self._hits += 1
+        self._bytes_saved += metadata["nbytes"]
+        return analysis_data
+
+    def store(self, key: str, analysis_data: pd.DataFrame) -> None:
+        """
+        A result which can't be written (e.g. read only directory) only costs the speedup, so it is ignored.
+        """
+        nbytes = int(analysis_data.memory_usage(index=False).sum())
+        if nbytes > self._max_bytes:
+            return
+
+        try:
+            columnar.save_columns(
+                analysis_data, self._get_entry_path(key), {"nbytes": nbytes}
+            )
+        except OSError:
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = self._get_entries()
+        curr_bytes = sum(nbytes for _, _, nbytes in entries)
+        # The least recently used entries come first.
+        for _, key, nbytes in sorted(entries):
+            if curr_bytes <= self._max_bytes:
+                break
+            columnar.remove_store(self._get_entry_path(key))
+            curr_bytes -= nbytes
+
+    def _get_entries(self) -> List[Tuple[float, str, int]]:
+        """
+        Returns the time of the last use, the key and the size of every complete entry.
+        """
+        try:
+            keys = os.listdir(self.directory)
+        except OSError:
+            return []
+
+        entries = []
+        for key in keys:
+            entry = self._get_entry_path(key)
+            metadata = columnar.load_metadata(entry)
+            if metadata is None:
+                continue
+            try:
+                last_used = os.path.getmtime(os.path.join(entry, _META_FILE))
+            except OSError:
+                continue
+            entries.append((last_used, key, metadata["nbytes"]))
+        return entries
+
+    def info(self) -> DiskCacheInfo:
+        curr_bytes = sum(nbytes for _, _, nbytes in self._get_entries())
+        return DiskCacheInfo(
+            self._hits, self._misses, self._bytes_saved, self._max_bytes, curr_bytes
+        )
+
+    def clear(self) -> None:
+        """
+        Removes all stored results and resets the statistics.
+        """
+        for _, key, _ in self._get_entries():
+            columnar.remove_store(self._get_entry_path(key))
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
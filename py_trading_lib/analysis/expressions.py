@@ -0,0 +1,447 @@
+"""
+Boolean condition expressions, which are evaluated in one fused pass over the raw column arrays.
+
+Relations are combined with `&`, `|` and `~`:
+    (Relation("CLOSE", ">", "SMA_20") & Relation("RSI_14", "<", 30)) | ~Column("CheckAllTrue=[...]")
+
+The results are written in place into preallocated buffers. The operands of an AND (OR) are only needed
+on the rows which are still True (False) and the evaluation stops as soon as no row is left.
+Once only a few rows are left, just these rows are gathered and compared.
+Otherwise whole columns are compared, because masked ufunc loops are about 10x slower than plain ones.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis.conditions import (
+    CheckAllTrue,
+    CheckAnyTrue,
+    CheckRelation,
+    Condition,
+    comparison_types,
+    operators,
+)
+import py_trading_lib.utils.sanity_checks as sanity
+
+__all__ = [
+    "Expression",
+    "Relation",
+    "Column",
+    "And",
+    "Or",
+    "Not",
+    "CompiledExpression",
+    "CheckExpression",
+    "expression_from_condition",
+]
+
+_OPERATOR_FUNCS: Dict[str, np.ufunc] = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+}
+
+# Below this fraction of rows left the rows are gathered instead of comparing whole columns.
+_SPARSE_DENSITY = 1 / 16
+
+_Columns = Dict[str, np.ndarray]
+
+
+class Expression(ABC):
+    def __and__(self, other: "Expression") -> "And":
+        return And(self, other)
+
+    def __or__(self, other: "Expression") -> "Or":
+        return Or(self, other)
+
+    def __invert__(self) -> "Not":
+        return Not(self)
+
+    @abstractmethod
+    def get_name(self) -> str:
+        pass
+
+    @abstractmethod
+    def get_needed_cols(self) -> List[str]:
+        pass
+
+    def get_children(self) -> List["Expression"]:
+        return []
+
+    def get_cache_key(self) -> Optional[Tuple[Any, ...]]:
+        """
+        Returns the structure of the expression, or None if it can't be described, e.g. of custom expressions.
+        """
+        return None
+
+    @abstractmethod
+    def _evaluate(
+        self,
+        columns: _Columns,
+        out: np.ndarray,
+        where: Optional[np.ndarray],
+        buffers: "_BufferPool",
+    ) -> None:
+        """
+        Writes the result into `out` for the rows in `where` (all rows if None) and False for all other rows.
+        """
+        pass
+
+
+class Relation(Expression):
+    def __init__(
+        self,
+        indicator_name: str,
+        operator: operators,
+        comparison_value: comparison_types,
+    ) -> None:
+        """
+        Equals CheckRelation. A string `comparison_value` is the name of another column.
+        """
+        if operator not in _OPERATOR_FUNCS:
+            raise ValueError(f"Invalid relational operator: {operator}")
+        self.indicator_name = indicator_name
+        self.operator = operator
+        self.comparison_value = comparison_value
+        self._func = _OPERATOR_FUNCS[operator]
+
+    def get_name(self) -> str:
+        return f"{self.indicator_name}{self.operator}{self.comparison_value}"
+
+    def get_cache_key(self) -> Tuple[Any, ...]:
+        return (type(self), self.indicator_name, self.operator, self.comparison_value)
+
+    def get_needed_cols(self) -> List[str]:
+        if isinstance(self.comparison_value, str):
+            return [self.indicator_name, self.comparison_value]
+        return [self.indicator_name]
+
+    def _evaluate(self, columns, out, where, buffers) -> None:
+        indicator = columns[self.indicator_name]
+        if isinstance(self.comparison_value, str):
+            comparison = columns[self.comparison_value]
+        else:
+            comparison = self.comparison_value
+
+        if where is not None and _is_sparse(where):
+            rows = np.flatnonzero(where)
+            if isinstance(comparison, np.ndarray):
+                comparison = comparison[rows]
+            out.fill(False)
+            with np.errstate(invalid="ignore"):
+                out[rows] = self._func(indicator[rows], comparison)
+            return
+
+        # NaNs compare as False.
+        with np.errstate(invalid="ignore"):
+            self._func(indicator, comparison, out=out)
+        if where is not None:
+            np.logical_and(out, where, out=out)
+
+
+class Column(Expression):
+    def __init__(self, name: str) -> None:
+        """
+        An existing boolean column, e.g. of a previously calculated condition.
+        """
+        self.name = name
+
+    def get_name(self) -> str:
+        return self.name
+
+    def get_cache_key(self) -> Tuple[Any, ...]:
+        return (type(self), self.name)
+
+    def get_needed_cols(self) -> List[str]:
+        return [self.name]
+
+    def _evaluate(self, columns, out, where, buffers) -> None:
+        if where is None:
+            np.copyto(out, columns[self.name])
+        else:
+            np.logical_and(columns[self.name], where, out=out)
+
+
+class And(Expression):
+    def __init__(self, *expressions: Expression) -> None:
+        _check_has_operands(expressions)
+        self._expressions = list(expressions)
+
+    def get_name(self) -> str:
+        return f"({' & '.join(e.get_name() for e in self._expressions)})"
+
+    def get_needed_cols(self) -> List[str]:
+        return _get_needed_cols(self._expressions)
+
+    def get_children(self) -> List[Expression]:
+        return self._expressions
+
+    def get_cache_key(self) -> Optional[Tuple[Any, ...]]:
+        return _get_composite_cache_key(self)
+
+    def _evaluate(self, columns, out, where, buffers) -> None:
+        first, *rest = self._expressions
+        first._evaluate(columns, out, where, buffers)
+
+        # `out` is False outside of `where`, so it is the mask of the rows which are still True.
+        for expression in rest:
+            if not out.any():
+                return
+            with buffers.get() as result:
+                expression._evaluate(columns, result, out, buffers)
+                np.copyto(out, result)
+
+
+class Or(Expression):
+    def __init__(self, *expressions: Expression) -> None:
+        _check_has_operands(expressions)
+        self._expressions = list(expressions)
+
+    def get_name(self) -> str:
+        return f"({' | '.join(e.get_name() for e in self._expressions)})"
+
+    def get_needed_cols(self) -> List[str]:
+        return _get_needed_cols(self._expressions)
+
+    def get_children(self) -> List[Expression]:
+        return self._expressions
+
+    def get_cache_key(self) -> Optional[Tuple[Any, ...]]:
+        return _get_composite_cache_key(self)
+
+    def _evaluate(self, columns, out, where, buffers) -> None:
+        first, *rest = self._expressions
+        first._evaluate(columns, out, where, buffers)
+        if not rest:
+            return
+
+        with buffers.get() as remaining:
+            for expression in rest:
+                # The rows in `where` which are still False. `out` is a subset of `where`.
+                if where is None:
+                    np.logical_not(out, out=remaining)
+                else:
+                    np.logical_xor(where, out, out=remaining)
+                if not remaining.any():
+                    return
+
+                with buffers.get() as result:
+                    expression._evaluate(columns, result, remaining, buffers)
+                    np.logical_or(out, result, out=out)
+
+
+class Not(Expression):
+    def __init__(self, expression: Expression) -> None:
+        self._expression = expression
+
+    def get_name(self) -> str:
+        return f"~{self._expression.get_name()}"
+
+    def get_needed_cols(self) -> List[str]:
+        return self._expression.get_needed_cols()
+
+    def get_children(self) -> List[Expression]:
+        return [self._expression]
+
+    def get_cache_key(self) -> Optional[Tuple[Any, ...]]:
+        return _get_composite_cache_key(self)
+
+    def _evaluate(self, columns, out, where, buffers) -> None:
+        self._expression._evaluate(columns, out, where, buffers)
+        if where is None:
+            np.logical_not(out, out=out)
+        else:
+            np.logical_xor(where, out, out=out)
+
+
+class CompiledExpression:
+    def __init__(self, expression: Expression) -> None:
+        """
+        Flattens nested ANDs and ORs and removes double negations, so the evaluation needs fewer buffers.
+        """
+        self.expression = _simplify(expression)
+        self._needed_cols = expression.get_needed_cols()
+
+    def evaluate(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Returns the boolean result of the expression for every row of `data`.
+        """
+        columns = self._get_columns(data)
+        out = np.empty(len(data), dtype=bool)
+        self.expression._evaluate(columns, out, None, _BufferPool(len(data)))
+        return out
+
+    def evaluate_all(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Materializes the results of all sub-expressions by their names, e.g. for debugging a strategy.
+        Each sub-expression is evaluated on all rows without short-circuiting.
+        """
+        columns = self._get_columns(data)
+        results = {}
+        for expression in _walk(self.expression):
+            out = np.empty(len(data), dtype=bool)
+            expression._evaluate(columns, out, None, _BufferPool(len(data)))
+            results[expression.get_name()] = out
+        return results
+
+    def _get_columns(self, data: pd.DataFrame) -> _Columns:
+        return {col: data[col].to_numpy() for col in self._needed_cols}
+
+
+class CheckExpression(Condition):
+    def __init__(self, expression: Expression, name: Optional[str] = None) -> None:
+        """
+        A Condition which evaluates the expression in one fused pass.
+        By default the name of the condition is the name of the expression.
+        """
+        self._compiled = CompiledExpression(expression)
+        self._name = name
+
+    def _perform_sanity_checks(self, data: pd.DataFrame) -> None:
+        super()._perform_sanity_checks(data)
+        sanity.check_cols_exist_in_df(self._compiled.expression.get_needed_cols(), data)
+
+        leaves = [e for e in _walk(self._compiled.expression) if not e.get_children()]
+        relation_cols = [
+            col
+            for e in leaves
+            if isinstance(e, Relation)
+            for col in e.get_needed_cols()
+        ]
+        bool_cols = [e.get_name() for e in leaves if isinstance(e, Column)]
+        sanity.check_frame(data, relation_cols, only_numbers=True, allow_nans=True)
+        sanity.check_frame(data, bool_cols, only_bools=True, allow_nans=True)
+
+    def _calculate(self, data: pd.DataFrame) -> pd.Series:
+        result = self._compiled.evaluate(data)
+        return pd.Series(result, index=data.index, name=self.get_name())
+
+    def get_name(self) -> str:
+        if self._name is not None:
+            return self._name
+        return self._compiled.expression.get_name()
+
+    def get_params(self) -> Optional[Dict[str, Hashable]]:
+        """
+        The expression is described by its structure, because a custom name may not describe it.
+        """
+        expression_key = self._compiled.expression.get_cache_key()
+        if expression_key is None:
+            return None
+        return {"expression": expression_key}
+
+
+def expression_from_condition(
+    condition: Condition, conditions: Iterable[Condition] = ()
+) -> Expression:
+    """
+    Converts a CheckRelation, CheckAllTrue or CheckAnyTrue into an Expression.
+    The names in a CheckAllTrue or CheckAnyTrue are resolved to the matching `conditions`,
+    so their columns don't have to be calculated. Unresolved names become Columns.
+    """
+    by_name = {c.get_name(): c for c in conditions}
+
+    if isinstance(condition, CheckRelation):
+        relation = condition.relation
+        return Relation(
+            relation.indicator_name, relation.operator, relation.comparison_value
+        )
+    if isinstance(condition, (CheckAllTrue, CheckAnyTrue)):
+        operands = [
+            (
+                expression_from_condition(by_name[name], conditions)
+                if name in by_name
+                else Column(name)
+            )
+            for name in condition.get_needed_conditions()
+        ]
+        if isinstance(condition, CheckAnyTrue):
+            return Or(*operands)
+        return And(*operands)
+    if isinstance(condition, CheckExpression):
+        return condition._compiled.expression
+    raise TypeError(
+        f"The condition: {condition.get_name()} can't be converted into an Expression."
+    )
+
+
+class _BufferPool:
+    """
+    Reuses the boolean temporaries of one evaluation.
+    """
+
+    def __init__(self, n_rows: int) -> None:
+        self._n_rows = n_rows
+        self._free: List[np.ndarray] = []
+
+    def get(self) -> "_Buffer":
+        buffer = self._free.pop() if self._free else np.empty(self._n_rows, bool)
+        return _Buffer(self, buffer)
+
+    def _release(self, buffer: np.ndarray) -> None:
+        self._free.append(buffer)
+
+
+class _Buffer:
+    def __init__(self, pool: _BufferPool, buffer: np.ndarray) -> None:
+        self._pool = pool
+        self._buffer = buffer
+
+    def __enter__(self) -> np.ndarray:
+        return self._buffer
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._pool._release(self._buffer)
+
+
+def _is_sparse(mask: np.ndarray) -> bool:
+    return np.count_nonzero(mask) < len(mask) * _SPARSE_DENSITY
+
+
+def _check_has_operands(expressions: Sequence[Expression]) -> None:
+    if len(expressions) == 0:
+        raise ValueError("There must be at least one expression to be combined.")
+
+
+def _get_needed_cols(expressions: Sequence[Expression]) -> List[str]:
+    cols = [col for e in expressions for col in e.get_needed_cols()]
+    return list(dict.fromkeys(cols))
+
+
+def _get_composite_cache_key(expression: Expression) -> Optional[Tuple[Any, ...]]:
+    children = [child.get_cache_key() for child in expression.get_children()]
+    if any(child is None for child in children):
+        return None
+    return (type(expression), *children)
+
+
+def _walk(expression: Expression) -> List[Expression]:
+    expressions = [expression]
+    for child in expression.get_children():
+        expressions += _walk(child)
+    return expressions
+
+
+def _simplify(expression: Expression) -> Expression:
+    if isinstance(expression, Not):
+        child = _simplify(expression.get_children()[0])
+        if isinstance(child, Not):
+            return child.get_children()[0]
+        return Not(child)
+
+    for node_type in (And, Or):
+        if isinstance(expression, node_type):
+            operands: List[Expression] = []
+            for child in map(_simplify, expression.get_children()):
+                if isinstance(child, node_type):
+                    operands += child.get_children()
+                else:
+                    operands.append(child)
+            return node_type(*operands)
+
+    return expression
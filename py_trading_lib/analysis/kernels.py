@@ -0,0 +1,399 @@
+"""
+Vectorized NumPy kernels for the technical indicators.
+
+The kernels operate on raw float arrays and reproduce the results of pandas_ta
+within floating point tolerance (relative error below 1e-9).
+
+float32 closes, e.g. of compact TOHLCV data, give float32 results. The prefix sums and the
+Wilder smoothing still accumulate in float64, so the only additional error is the final rounding to float32.
+
+The kernels of multi-output indicators (`macd`, `bbands`, `stoch` and `atr`) calculate their shared
+intermediates once and write all outputs as rows of one array.
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+__all__ = [
+    "sma",
+    "rsi",
+    "rma",
+    "prefix_sum",
+    "sma_from_prefix_sum",
+    "gain_and_loss",
+    "rsi_from_gain_and_loss",
+    "ema",
+    "rolling_std",
+    "rolling_min",
+    "rolling_max",
+    "true_range",
+    "macd",
+    "bbands",
+    "stoch",
+    "atr",
+]
+
+# The largest factor by which rounding errors may be amplified inside one block of `_linear_scan`.
+_MAX_BLOCK_AMPLIFICATION = 1e3
+# Carries weighted less than this are below the float64 resolution of the result.
+_NEGLIGIBLE_CARRY_WEIGHT = 1e-18
+
+
+def sma(close: np.ndarray, length: int, offset: int = 0) -> np.ndarray:
+    """
+    Simple moving average calculated with one prefix sum.
+    The first `length - 1` values are NaN.
+    """
+    sums, reference = prefix_sum(close)
+    result = sma_from_prefix_sum(sums, reference, length)
+    return _shift(result.astype(_get_result_dtype(close), copy=False), offset)
+
+
+def prefix_sum(close: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Returns the prefix sums of the deviations from the first close and the first close itself.
+    They can be shared by the SMAs of all lengths.
+    Summing the deviations keeps the prefix sums small and thus precise. They are always float64.
+    """
+    reference = float(close[0]) if len(close) else 0.0
+    sums = np.empty(len(close) + 1)
+    sums[0] = 0.0
+    np.subtract(close, reference, out=sums[1:], dtype=np.float64)
+    np.cumsum(sums[1:], out=sums[1:])
+    return sums, reference
+
+
+def sma_from_prefix_sum(sums: np.ndarray, reference: float, length: int) -> np.ndarray:
+    n = len(sums) - 1
+    result = np.full(n, np.nan)
+    if length < 1 or n < length:
+        return result
+
+    window_sum = sums[length:] - sums[:-length]
+    result[length - 1 :] = window_sum / length + reference
+    return result
+
+
+def rsi(
+    close: np.ndarray,
+    length: int = 14,
+    scalar: float = 100,
+    drift: int = 1,
+    offset: int = 0,
+) -> np.ndarray:
+    """
+    Relative strength index with Wilder's smoothing of the gains and losses.
+    """
+    result = rsi_from_gain_and_loss(gain_and_loss(close, drift), length, scalar)
+    return _shift(result.astype(_get_result_dtype(close), copy=False), offset)
+
+
+def gain_and_loss(close: np.ndarray, drift: int = 1) -> np.ndarray:
+    """
+    Returns the gains and the (negative) losses of the closes as rows of one float64 array.
+    They can be shared by the RSIs of all lengths.
+    """
+    result = np.full((2, len(close)), np.nan)
+    change = np.subtract(
+        close[drift:], close[:-drift], out=result[0, drift:], dtype=np.float64
+    )
+    np.minimum(change, 0.0, out=result[1, drift:])
+    np.maximum(change, 0.0, out=change)
+    return result
+
+
+def rsi_from_gain_and_loss(
+    gains_and_losses: np.ndarray, length: int, scalar: float = 100
+) -> np.ndarray:
+    gain, loss = rma(gains_and_losses, length)
+
+    np.abs(loss, out=loss)
+    loss += gain
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain *= scalar
+        gain /= loss
+    return gain
+
+
+def rma(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Wilder's moving average, which is an exponentially weighted mean with alpha = 1 / length.
+    Like pandas_ta it uses the adjusted weights and needs `length` observations for the first value.
+
+    The values are smoothed along the last axis. Leading NaNs are skipped,
+    where the NaNs of the first row of 2-D values apply to all rows.
+    """
+    result = np.full(values.shape, np.nan)
+    first_valid = _find_first_valid(values)
+    if first_valid is None or values.shape[-1] - first_valid < length:
+        return result
+
+    decay = 1.0 - 1.0 / length
+    smoothed = _linear_scan(values[..., first_valid:], decay)
+
+    # The sum of the weights `1 + decay + decay**2 + ...` is a geometric series.
+    n_obs = np.arange(1, smoothed.shape[-1] + 1)
+    if decay == 0.0:
+        weight_sum = np.ones(len(n_obs))
+    else:
+        weight_sum = -np.expm1(n_obs * math.log(decay)) / (1.0 - decay)
+    smoothed /= weight_sum
+
+    result[..., first_valid + length - 1 :] = smoothed[..., length - 1 :]
+    return result
+
+
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Exponential moving average with alpha = 2 / (length + 1).
+    Like pandas_ta it is seeded with the SMA of the first `length` values and uses no adjusted weights.
+    Leading NaNs are skipped, e.g. of the MACD line.
+    """
+    result = np.full(len(values), np.nan)
+    first_valid = _find_first_valid(values)
+    if length < 1 or first_valid is None or len(values) - first_valid < length:
+        return result
+
+    seed_position = first_valid + length - 1
+    alpha = 2.0 / (length + 1)
+    scaled = np.empty(len(values) - seed_position)
+    scaled[0] = np.mean(values[first_valid : seed_position + 1], dtype=np.float64)
+    np.multiply(values[seed_position + 1 :], alpha, out=scaled[1:], dtype=np.float64)
+    result[seed_position:] = _linear_scan(scaled, 1.0 - alpha)
+    return result
+
+
+def rolling_std(
+    values: np.ndarray, mean: np.ndarray, length: int, ddof: int = 0
+) -> np.ndarray:
+    """
+    Rolling standard deviation around the given rolling `mean`, e.g. of `sma`.
+    The squared deviations are summed per window instead of using prefix sums of squares,
+    which would lose the precision of small deviations from large prices.
+    """
+    result = np.full(len(values), np.nan)
+    if length < 1 or len(values) < length or length <= ddof:
+        return result
+
+    # One pass per position within the windows, so no array of all windows is allocated.
+    n_windows = len(values) - length + 1
+    sums = np.zeros(n_windows)
+    deviations = np.empty(n_windows)
+    window_mean = mean[length - 1 :]
+    for position in range(length):
+        np.subtract(
+            values[position : position + n_windows], window_mean, out=deviations
+        )
+        np.square(deviations, out=deviations)
+        sums += deviations
+
+    sums /= length - ddof
+    np.sqrt(sums, out=result[length - 1 :])
+    return result
+
+
+def rolling_min(values: np.ndarray, length: int) -> np.ndarray:
+    return _rolling_reduce(np.minimum, values, length)
+
+
+def rolling_max(values: np.ndarray, length: int) -> np.ndarray:
+    return _rolling_reduce(np.maximum, values, length)
+
+
+def _rolling_reduce(reduce: np.ufunc, values: np.ndarray, length: int) -> np.ndarray:
+    result = np.full(len(values), np.nan)
+    if length < 1 or len(values) < length:
+        return result
+
+    n_windows = len(values) - length + 1
+    reduced = result[length - 1 :]
+    reduced[:] = values[:n_windows]
+    for position in range(1, length):
+        reduce(reduced, values[position : position + n_windows], out=reduced)
+    return result
+
+
+def true_range(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, drift: int = 1
+) -> np.ndarray:
+    """
+    The largest of HIGH - LOW and the distances of HIGH and LOW to the CLOSE `drift` klines before.
+    The first `drift` values are NaN.
+    """
+    result = np.full(len(close), np.nan)
+    prev_close = close[:-drift]
+    tr = result[drift:]
+    np.subtract(high[drift:], low[drift:], out=tr, dtype=np.float64)
+    np.maximum(
+        tr, np.abs(np.subtract(high[drift:], prev_close, dtype=np.float64)), out=tr
+    )
+    np.maximum(
+        tr, np.abs(np.subtract(low[drift:], prev_close, dtype=np.float64)), out=tr
+    )
+    return result
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9, offset: int = 0
+) -> np.ndarray:
+    """
+    Returns the MACD line, its histogram and its signal line as rows of one array.
+    The MACD line is calculated once and feeds the signal line and the histogram.
+    """
+    result = np.empty((3, len(close)))
+    line, histogram, signal_line = result
+    np.subtract(ema(close, fast), ema(close, slow), out=line)
+    signal_line[:] = ema(line, signal)
+    np.subtract(line, signal_line, out=histogram)
+    return _shift(result.astype(_get_result_dtype(close), copy=False), offset)
+
+
+def bbands(
+    close: np.ndarray, length: int = 5, std: float = 2.0, ddof: int = 0, offset: int = 0
+) -> np.ndarray:
+    """
+    Returns the lower, middle and upper Bollinger band, the bandwidth and the percent B as rows of one array.
+    The rolling mean and standard deviation are calculated once and feed all bands.
+    """
+    result = np.empty((5, len(close)))
+    lower, middle, upper, bandwidth, percent = result
+    middle[:] = sma(close.astype(np.float64, copy=False), length)
+    deviation = rolling_std(close, middle, length, ddof)
+    deviation *= std
+    np.subtract(middle, deviation, out=lower)
+    np.add(middle, deviation, out=upper)
+
+    width = upper - lower
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(width, middle, out=bandwidth)
+        bandwidth *= 100
+        np.subtract(close, lower, out=percent)
+        percent /= width
+    return _shift(result.astype(_get_result_dtype(close), copy=False), offset)
+
+
+def stoch(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    k: int = 14,
+    d: int = 3,
+    smooth_k: int = 3,
+    offset: int = 0,
+) -> np.ndarray:
+    """
+    Returns the stochastic %K and %D as rows of one array.
+    The rolling extremes and the raw %K are calculated once and feed both.
+    """
+    lowest_low = rolling_min(low, k)
+    value_range = rolling_max(high, k) - lowest_low
+    # Like the non_zero_range of pandas_ta a flat range gives a raw %K of 0 instead of NaN.
+    value_range[value_range == 0] = np.finfo(np.float64).eps
+    raw_k = 100 * (close - lowest_low) / value_range
+
+    result = np.empty((2, len(close)))
+    result[0] = _rolling_mean(raw_k, smooth_k)
+    result[1] = _rolling_mean(result[0], d)
+    return _shift(result.astype(_get_result_dtype(close), copy=False), offset)
+
+
+def atr(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    length: int = 14,
+    drift: int = 1,
+    offset: int = 0,
+) -> np.ndarray:
+    """
+    Average true range with Wilder's smoothing of one true range series. Returns one row.
+    """
+    result = rma(true_range(high, low, close, drift), length)[None, :]
+    return _shift(result.astype(_get_result_dtype(close), copy=False), offset)
+
+
+def _rolling_mean(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Like a rolling mean only the windows which contain a NaN are NaN.
+    The NaNs are replaced before the prefix sum, so they don't spoil the following windows.
+    """
+    is_nan = np.isnan(values)
+    first_valid = _find_first_valid(values)
+    reference = values[first_valid] if first_valid is not None else 0.0
+    sums, reference = prefix_sum(np.where(is_nan, reference, values))
+    result = sma_from_prefix_sum(sums, reference, length)
+
+    n_nans = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(is_nan, out=n_nans[1:])
+    result[length - 1 :][n_nans[length:] > n_nans[:-length]] = np.nan
+    return result
+
+
+def _linear_scan(values: np.ndarray, decay: float) -> np.ndarray:
+    """
+    Calculates the recursion `result[t] = decay * result[t - 1] + values[t]` along the last axis
+    without a loop per element.
+
+    The values are split into blocks in which the recursion has the closed form
+    `decay**j * cumsum(values * decay**-j)`. The block size is bounded, so `decay**-j` stays small
+    and the rounding errors stay in the order of 1e-13.
+    The carry between the blocks decays by at least 1e-3 per block,
+    so it is a short weighted sum over the previous block ends.
+    """
+    n = values.shape[-1]
+    if decay == 0.0:
+        return values.astype(np.float64, copy=True)
+
+    block_size = int(math.log(_MAX_BLOCK_AMPLIFICATION) / -math.log(decay))
+    block_size = max(1, min(block_size, n))
+    n_blocks = -(-n // block_size)
+
+    padded = np.zeros(values.shape[:-1] + (n_blocks * block_size,))
+    padded[..., :n] = values
+    blocks = padded.reshape(values.shape[:-1] + (n_blocks, block_size))
+
+    decays = decay ** np.arange(block_size)
+    blocks /= decays
+    np.cumsum(blocks, axis=-1, out=blocks)
+    blocks *= decays
+
+    block_ends = blocks[..., -1].copy()
+    block_decay = decay**block_size
+    carries = np.zeros_like(block_ends)
+    carry_weight = 1.0
+    for lag in range(1, n_blocks):
+        carries[..., lag:] += carry_weight * block_ends[..., :-lag]
+        carry_weight *= block_decay
+        if carry_weight < _NEGLIGIBLE_CARRY_WEIGHT:
+            break
+
+    blocks += carries[..., None] * (decays * decay)
+    return padded[..., :n]
+
+
+def _find_first_valid(values: np.ndarray) -> Optional[int]:
+    first_row = values.reshape(-1, values.shape[-1])[0]
+    valid = np.flatnonzero(~np.isnan(first_row))
+    if len(valid) == 0:
+        return None
+    return int(valid[0])
+
+
+def _get_result_dtype(close: np.ndarray) -> np.dtype:
+    if close.dtype == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def _shift(values: np.ndarray, offset: int) -> np.ndarray:
+    if offset == 0:
+        return values
+
+    shifted = np.full(values.shape, np.nan, dtype=values.dtype)
+    if offset > 0:
+        shifted[..., offset:] = values[..., :-offset]
+    else:
+        shifted[..., :offset] = values[..., -offset:]
+    return shifted
@@ -0,0 +1,93 @@
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis.technical_indicators import TechnicalIndicator
+from py_trading_lib.data_handler.resampling import Resampler
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+__all__ = ["Resampled"]
+
+
+class Resampled(TechnicalIndicator):
+    def __init__(self, ti: TechnicalIndicator, resampler: Resampler) -> None:
+        """
+        Calculates `ti` on the bars of a higher timeframe and aligns the result back onto the base klines,
+        e.g. `Resampled(SMA(20), Resampler("4h", base_interval="1h"))` adds "SMA_20_4h" to a 1h analysis.
+        Every base kline only gets the values of bars which are complete at its TIME, so there is no lookahead.
+        Indicators which share a Resampler resample the klines only once.
+        """
+        self._ti = ti
+        self._resampler = resampler
+
+    def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        bars = self._resampler.resample(klines)
+        indicator = self._ti.calculate(bars)
+        aligned = self._resampler.align(
+            bars["TIME"].to_numpy(), indicator, utils.get_time(klines)
+        )
+        return pd.DataFrame(aligned, index=klines.index, columns=self.get_names())
+
+    def supports_update(self) -> bool:
+        return self._ti.supports_update()
+
+    def _init_update_state(self, tohlcv: pd.DataFrame) -> None:
+        """
+        The updates use their own resampler, so a shared Resampler keeps its cache.
+        Only the bars which get complete are passed on to the update of the wrapped indicator.
+        """
+        self._stream = Resampler(
+            self._resampler.interval, self._resampler.base_interval
+        )
+        complete = self._stream.init_update(tohlcv)
+        self._ti.init_update(complete)
+
+        last_values = self._ti.calculate(complete).iloc[-1:]
+        self._last_bar_time = complete["TIME"].to_numpy()[-1:]
+        self._last_values = last_values.to_numpy(dtype="float64", na_value=np.nan)
+
+    def update(self, klines: pd.DataFrame) -> pd.DataFrame:
+        self._check_update_initialised()
+        sanity.check_tohlcv(klines)
+
+        complete = self._stream.update(klines)
+        bar_times = self._last_bar_time
+        values = self._last_values
+        if len(complete) > 0:
+            new_values = self._ti.update(complete)
+            bar_times = np.r_[bar_times, complete["TIME"].to_numpy()]
+            values = np.vstack([values, new_values.to_numpy(dtype="float64")])
+
+        aligned = self._stream.align(
+            bar_times, pd.DataFrame(values), utils.get_time(klines)
+        )
+        self._last_bar_time = bar_times[-1:]
+        self._last_values = values[-1:]
+        return pd.DataFrame(
+            aligned, index=klines.index, columns=self.get_names(), dtype="float64"
+        )
+
+    def get_min_len(self) -> int:
+        """
+        Without a base interval the number of klines per bar is unknown,
+        so only the minimal number of bars is returned.
+        """
+        ratio = self._resampler.get_ratio()
+        if ratio is None:
+            return self._ti.get_min_len()
+        # The first bucket may only be partially covered by the klines.
+        return (self._ti.get_min_len() + 1) * ratio
+
+    def get_names(self) -> List[str]:
+        """
+        Example return: ["SMA_20_4h"]
+        """
+        return [f"{name}_{self._resampler.interval}" for name in self._ti.get_names()]
+
+    def get_params(self) -> Optional[Dict[str, Hashable]]:
+        ti_key = self._ti.get_cache_key()
+        if ti_key is None:
+            return None
+        return {"ti": ti_key, **self._resampler.get_params()}
@@ -1,20 +1,29 @@
+import math
 from abc import ABC, abstractmethod
-from typing import List
+from collections import deque
+from types import ModuleType
+from typing import Any, Deque, Dict, Hashable, List, Literal, Optional, Tuple, TypeAlias
 
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 
+from py_trading_lib.analysis import kernels
+import py_trading_lib.utils.profiling as profiling
 import py_trading_lib.utils.sanity_checks as sanity
 import py_trading_lib.utils.utils as utils
 
+backends: TypeAlias = Literal["numpy", "pandas_ta"]
 
-__all__ = ["TechnicalIndicator", "SMA", "RSI"]
+
+__all__ = ["TechnicalIndicator", "SMA", "RSI", "MACD", "BBANDS", "STOCH", "ATR"]
 
 
 class TechnicalIndicator(ABC):
     def calculate(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
-        self._perfrom_sanity_checks(tohlcv)
-        indicator = self._try_calculate(tohlcv)
+        with profiling.record("indicator", self.get_names):
+            with profiling.record("sanity_checks", self.get_names):
+                self._perfrom_sanity_checks(tohlcv)
+            indicator = self._try_calculate(tohlcv)
         return indicator
 
     def _perfrom_sanity_checks(self, tohlcv: pd.DataFrame):
@@ -36,21 +45,124 @@ class TechnicalIndicator(ABC):
     def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
         pass
 
+    def _wrap_block(self, block: np.ndarray, index: pd.Index) -> pd.DataFrame:
+        """
+        Wraps the outputs, which are the rows of one array, without copying.
+        The DataFrame thus holds all outputs in one contiguous block.
+        """
+        return pd.DataFrame(block.T, index=index, columns=self.get_names(), copy=False)
+
+    def supports_update(self) -> bool:
+        """
+        Whether the indicator can be calculated incrementally with `init_update` and `update`.
+        """
+        return False
+
+    def init_update(self, tohlcv: pd.DataFrame) -> None:
+        """
+        Initialises the state needed by `update` from the already known klines.
+        Raises a ValueError if the indicator doesn't support updates.
+        """
+        if not self.supports_update():
+            raise ValueError(
+                f"The indicator: {self.get_names()} does not support incremental updates."
+            )
+        self._perfrom_sanity_checks(tohlcv)
+        self._init_update_state(tohlcv)
+        self._is_update_initialised = True
+
+    def update(self, klines: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calculates the indicator only for the appended klines in O(1) per kline.
+        The klines must directly follow the ones passed to `init_update` or a previous `update`.
+        """
+        self._check_update_initialised()
+        sanity.check_tohlcv(klines)
+
+        values = [self._try_update(kline) for kline in klines.itertuples(index=False)]
+        indicator = pd.DataFrame(
+            values, index=klines.index, columns=self.get_names(), dtype="float64"
+        )
+        return indicator
+
+    def _check_update_initialised(self) -> None:
+        if not getattr(self, "_is_update_initialised", False):
+            raise RuntimeError(
+                f"The indicator: {self.get_names()} must be initialised with init_update before it can be updated."
+            )
+
+    def _try_update(self, kline: Any) -> List[float]:
+        try:
+            values = self._update_indicator(kline)
+        except Exception as e:
+            raise RuntimeError(
+                f"Something went wrong during the update of the indicator: {self.get_names()}. {e}"
+            )
+
+        return values
+
+    def _init_update_state(self, tohlcv: pd.DataFrame) -> None:
+        """
+        Must be implemented by the indicators whose `supports_update` returns True, like `_update_indicator`.
+        """
+        raise NotImplementedError
+
+    def _update_indicator(self, kline: Any) -> List[float]:
+        raise NotImplementedError
+
+    def _check_backend(self, backend: backends) -> None:
+        if backend not in ("numpy", "pandas_ta"):
+            raise ValueError(
+                f"Invalid backend: {backend}. Use either 'numpy' or 'pandas_ta'."
+            )
+
+    def _check_no_offset_for_update(self, offset: int) -> None:
+        if offset != 0:
+            raise ValueError(
+                "Incremental updates are only supported with an offset of 0."
+            )
+
     @abstractmethod
     def get_names(self) -> List[str]:
         pass
 
+    def get_params(self) -> Optional[Dict[str, Hashable]]:
+        """
+        Returns the parameters which fully define the result of the indicator.
+        Indicators returning None are never deduplicated or cached.
+        """
+        return None
+
+    def get_cache_key(self) -> Optional[Tuple[Any, ...]]:
+        params = self.get_params()
+        if params is None:
+            return None
+        return (type(self), tuple(sorted(params.items())))
+
     @abstractmethod
     def get_min_len(self) -> int:
         pass
 
 
 class SMA(TechnicalIndicator):
-    def __init__(self, length: int, offset: int = 0) -> None:
+    def __init__(
+        self, length: int, offset: int = 0, backend: backends = "numpy"
+    ) -> None:
+        self._check_backend(backend)
         self._length = length
         self._offset = offset
+        self._backend = backend
 
     def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        if self._backend == "pandas_ta":
+            return self._calculate_with_pandas_ta(klines)
+
+        close = _get_close(klines)
+        sma = kernels.sma(close, self._length, self._offset)
+        return pd.DataFrame({self.get_names()[0]: sma}, index=klines.index)
+
+    def _calculate_with_pandas_ta(self, klines: pd.DataFrame) -> pd.DataFrame:
+        ta = _import_pandas_ta()
         sma = ta.sma(
             close=klines["CLOSE"],
             length=self._length,
@@ -59,6 +171,34 @@ class SMA(TechnicalIndicator):
         sma = utils.convert_to_df_from_sr_or_df(sma)
         return sma
 
+    def supports_update(self) -> bool:
+        return True
+
+    def _init_update_state(self, tohlcv: pd.DataFrame) -> None:
+        """
+        Keeps a running sum over the last `length` closes.
+        The sum is recalculated exactly every `length` updates,
+        so the result stays within a relative tolerance of 1e-9 of `calculate`.
+        """
+        self._check_no_offset_for_update(self._offset)
+
+        closes = tohlcv["CLOSE"].iloc[-self._length :].astype("float64").tolist()
+        self._window: Deque[float] = deque(closes, maxlen=self._length)
+        self._window_sum = math.fsum(self._window)
+        self._updates_since_resum = 0
+
+    def _update_indicator(self, kline: Any) -> List[float]:
+        close = float(kline.CLOSE)
+        self._window_sum += close - self._window[0]
+        self._window.append(close)
+
+        self._updates_since_resum += 1
+        if self._updates_since_resum >= self._length:
+            self._window_sum = math.fsum(self._window)
+            self._updates_since_resum = 0
+
+        return [self._window_sum / self._length]
+
     def get_min_len(self) -> int:
         return self._length
 
@@ -68,17 +208,40 @@ class SMA(TechnicalIndicator):
         """
         return [f"SMA_{self._length}"]
 
+    def get_params(self) -> Dict[str, Hashable]:
+        return {
+            "length": self._length,
+            "offset": self._offset,
+            "backend": self._backend,
+        }
+
 
 class RSI(TechnicalIndicator):
     def __init__(
-        self, length: int = 14, scalar: float = 100, drift: int = 1, offset: int = 0
+        self,
+        length: int = 14,
+        scalar: float = 100,
+        drift: int = 1,
+        offset: int = 0,
+        backend: backends = "numpy",
     ) -> None:
+        self._check_backend(backend)
         self._length = length
         self._scalar = scalar
         self._drift = drift
         self._offset = offset
+        self._backend = backend
 
     def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        if self._backend == "pandas_ta":
+            return self._calculate_with_pandas_ta(klines)
+
+        close = _get_close(klines)
+        rsi = kernels.rsi(close, self._length, self._scalar, self._drift, self._offset)
+        return pd.DataFrame({self.get_names()[0]: rsi}, index=klines.index)
+
+    def _calculate_with_pandas_ta(self, klines: pd.DataFrame) -> pd.DataFrame:
+        ta = _import_pandas_ta()
         rsi = ta.rsi(
             close=klines["CLOSE"],
             length=self._length,
@@ -89,6 +252,42 @@ class RSI(TechnicalIndicator):
         rsi = utils.convert_to_df_from_sr_or_df(rsi)
         return rsi
 
+    def supports_update(self) -> bool:
+        return True
+
+    def _init_update_state(self, tohlcv: pd.DataFrame) -> None:
+        """
+        Keeps the Wilder-smoothed gains and losses.
+        The smoothing replicates the recursion of pandas_ta, thus the result equals `calculate`
+        exactly with the pandas_ta backend and within a relative tolerance of 1e-9 with the numpy backend.
+        """
+        self._check_no_offset_for_update(self._offset)
+
+        close = tohlcv["CLOSE"].astype("float64")
+        change = close.diff(self._drift)
+        alpha = 1.0 / self._length
+
+        self._last_closes: Deque[float] = deque(
+            close.iloc[-self._drift :].tolist(), maxlen=self._drift
+        )
+        self._gain = _EwmMeanState(alpha, self._length)
+        self._gain.init(change.clip(lower=0))
+        self._loss = _EwmMeanState(alpha, self._length)
+        self._loss.init(change.clip(upper=0))
+
+    def _update_indicator(self, kline: Any) -> List[float]:
+        close = float(kline.CLOSE)
+        change = close - self._last_closes[0]
+        self._last_closes.append(close)
+
+        gain = self._gain.update(max(change, 0.0))
+        loss = self._loss.update(min(change, 0.0))
+        total = gain + abs(loss)
+        if total == 0:
+            # Flat prices, like `calculate` 0 / 0 gives NaN.
+            return [math.nan]
+        return [self._scalar * gain / total]
+
     def get_min_len(self) -> int:
         return self._length
 
@@ -97,3 +296,314 @@ class RSI(TechnicalIndicator):
         Example return: ["RSI_5"]
         """
         return [f"RSI_{self._length}"]
+
+    def get_params(self) -> Dict[str, Hashable]:
+        return {
+            "length": self._length,
+            "scalar": self._scalar,
+            "drift": self._drift,
+            "offset": self._offset,
+            "backend": self._backend,
+        }
+
+
+class MACD(TechnicalIndicator):
+    def __init__(
+        self,
+        fast: int = 12,
+        slow: int = 26,
+        signal: int = 9,
+        offset: int = 0,
+        backend: backends = "numpy",
+    ) -> None:
+        """
+        Outputs the MACD line, its histogram and its signal line.
+        """
+        self._check_backend(backend)
+        # Like pandas_ta the slow EMA is always the longer one.
+        self._fast, self._slow = min(fast, slow), max(fast, slow)
+        self._signal = signal
+        self._offset = offset
+        self._backend = backend
+
+    def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        if self._backend == "pandas_ta":
+            return self._calculate_with_pandas_ta(klines)
+
+        close = _get_close(klines)
+        macd = kernels.macd(close, self._fast, self._slow, self._signal, self._offset)
+        return self._wrap_block(macd, klines.index)
+
+    def _calculate_with_pandas_ta(self, klines: pd.DataFrame) -> pd.DataFrame:
+        ta = _import_pandas_ta()
+        return ta.macd(
+            close=klines["CLOSE"],
+            fast=self._fast,
+            slow=self._slow,
+            signal=self._signal,
+            offset=self._offset,
+        )
+
+    def get_min_len(self) -> int:
+        return self._slow + self._signal - 1
+
+    def get_names(self) -> List[str]:
+        """
+        Example return: ["MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"]
+        """
+        suffix = f"_{self._fast}_{self._slow}_{self._signal}"
+        return [f"MACD{suffix}", f"MACDh{suffix}", f"MACDs{suffix}"]
+
+    def get_params(self) -> Dict[str, Hashable]:
+        return {
+            "fast": self._fast,
+            "slow": self._slow,
+            "signal": self._signal,
+            "offset": self._offset,
+            "backend": self._backend,
+        }
+
+
+class BBANDS(TechnicalIndicator):
+    def __init__(
+        self,
+        length: int = 5,
+        std: float = 2.0,
+        ddof: int = 0,
+        offset: int = 0,
+        backend: backends = "numpy",
+    ) -> None:
+        """
+        Outputs the lower, middle and upper Bollinger band, the bandwidth and the percent B.
+        """
+        self._check_backend(backend)
+        self._length = length
+        self._std = float(std)
+        self._ddof = ddof
+        self._offset = offset
+        self._backend = backend
+
+    def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        if self._backend == "pandas_ta":
+            return self._calculate_with_pandas_ta(klines)
+
+        close = _get_close(klines)
+        bbands = kernels.bbands(
+            close, self._length, self._std, self._ddof, self._offset
+        )
+        return self._wrap_block(bbands, klines.index)
+
+    def _calculate_with_pandas_ta(self, klines: pd.DataFrame) -> pd.DataFrame:
+        ta = _import_pandas_ta()
+        return ta.bbands(
+            close=klines["CLOSE"],
+            length=self._length,
+            std=self._std,
+            ddof=self._ddof,
+            offset=self._offset,
+        )
+
+    def get_min_len(self) -> int:
+        return self._length
+
+    def get_names(self) -> List[str]:
+        """
+        Example return: ["BBL_5_2.0", "BBM_5_2.0", "BBU_5_2.0", "BBB_5_2.0", "BBP_5_2.0"]
+        """
+        suffix = f"_{self._length}_{self._std}"
+        return [f"BB{band}{suffix}" for band in "LMUBP"]
+
+    def get_params(self) -> Dict[str, Hashable]:
+        return {
+            "length": self._length,
+            "std": self._std,
+            "ddof": self._ddof,
+            "offset": self._offset,
+            "backend": self._backend,
+        }
+
+
+class STOCH(TechnicalIndicator):
+    def __init__(
+        self,
+        k: int = 14,
+        d: int = 3,
+        smooth_k: int = 3,
+        offset: int = 0,
+        backend: backends = "numpy",
+    ) -> None:
+        """
+        Outputs the stochastic %K and %D.
+        """
+        self._check_backend(backend)
+        self._k = k
+        self._d = d
+        self._smooth_k = smooth_k
+        self._offset = offset
+        self._backend = backend
+
+    def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        if self._backend == "pandas_ta":
+            return self._calculate_with_pandas_ta(klines)
+
+        high, low, close = _get_prices(klines, ["HIGH", "LOW", "CLOSE"])
+        stoch = kernels.stoch(
+            high, low, close, self._k, self._d, self._smooth_k, self._offset
+        )
+        return self._wrap_block(stoch, klines.index)
+
+    def _calculate_with_pandas_ta(self, klines: pd.DataFrame) -> pd.DataFrame:
+        ta = _import_pandas_ta()
+        return ta.stoch(
+            high=klines["HIGH"],
+            low=klines["LOW"],
+            close=klines["CLOSE"],
+            k=self._k,
+            d=self._d,
+            smooth_k=self._smooth_k,
+            offset=self._offset,
+        )
+
+    def get_min_len(self) -> int:
+        return self._k + self._smooth_k + self._d - 2
+
+    def get_names(self) -> List[str]:
+        """
+        Example return: ["STOCHk_14_3_3", "STOCHd_14_3_3"]
+        """
+        suffix = f"_{self._k}_{self._d}_{self._smooth_k}"
+        return [f"STOCHk{suffix}", f"STOCHd{suffix}"]
+
+    def get_params(self) -> Dict[str, Hashable]:
+        return {
+            "k": self._k,
+            "d": self._d,
+            "smooth_k": self._smooth_k,
+            "offset": self._offset,
+            "backend": self._backend,
+        }
+
+
+class ATR(TechnicalIndicator):
+    def __init__(
+        self,
+        length: int = 14,
+        drift: int = 1,
+        offset: int = 0,
+        backend: backends = "numpy",
+    ) -> None:
+        """
+        Average true range with Wilder's smoothing.
+        """
+        self._check_backend(backend)
+        self._length = length
+        self._drift = drift
+        self._offset = offset
+        self._backend = backend
+
+    def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        if self._backend == "pandas_ta":
+            return self._calculate_with_pandas_ta(klines)
+
+        high, low, close = _get_prices(klines, ["HIGH", "LOW", "CLOSE"])
+        atr = kernels.atr(high, low, close, self._length, self._drift, self._offset)
+        return self._wrap_block(atr, klines.index)
+
+    def _calculate_with_pandas_ta(self, klines: pd.DataFrame) -> pd.DataFrame:
+        ta = _import_pandas_ta()
+        atr = ta.atr(
+            high=klines["HIGH"],
+            low=klines["LOW"],
+            close=klines["CLOSE"],
+            length=self._length,
+            mamode="rma",
+            drift=self._drift,
+            offset=self._offset,
+        )
+        atr = utils.convert_to_df_from_sr_or_df(atr)
+        return atr
+
+    def get_min_len(self) -> int:
+        return self._length + self._drift
+
+    def get_names(self) -> List[str]:
+        """
+        Example return: ["ATRr_14"]
+        """
+        return [f"ATRr_{self._length}"]
+
+    def get_params(self) -> Dict[str, Hashable]:
+        return {
+            "length": self._length,
+            "drift": self._drift,
+            "offset": self._offset,
+            "backend": self._backend,
+        }
+
+
+def _get_close(klines: pd.DataFrame) -> np.ndarray:
+    """
+    The float32 closes of compact TOHLCV data are kept, so the indicators are float32 too.
+    """
+    return _get_prices(klines, ["CLOSE"])[0]
+
+
+def _get_prices(klines: pd.DataFrame, names: List[str]) -> List[np.ndarray]:
+    """
+    Like `_get_close`, the prices are float32 only if all of them are float32.
+    """
+    prices = klines[names]
+    is_float32 = (prices.dtypes == np.float32).all()
+    dtype = "float32" if is_float32 else "float64"
+    return [prices[name].to_numpy(dtype=dtype) for name in names]
+
+
+def _import_pandas_ta() -> ModuleType:
+    try:
+        import pandas_ta
+    except ImportError as e:
+        raise ImportError(
+            "The pandas_ta backend needs the optional dependency pandas_ta. Install it with: pip install pandas_ta"
+        ) from e
+    return pandas_ta
+
+
+class _EwmMeanState:
+    """
+    Replicates the recursion of `pd.Series.ewm(alpha=alpha, min_periods=min_periods).mean()`
+    one value at a time, so that incremental results equal the batch results.
+    """
+
+    def __init__(self, alpha: float, min_periods: int) -> None:
+        self._alpha = alpha
+        self._old_wt_factor = 1.0 - alpha
+        self._min_periods = min_periods
+
+    def init(self, values: pd.Series) -> None:
+        self._weighted = float(values.ewm(alpha=self._alpha).mean().iloc[-1])
+        self._nobs = int(values.notna().sum())
+        self._old_wt = self._calc_old_wt(self._nobs)
+
+    def _calc_old_wt(self, nobs: int) -> float:
+        old_wt = 1.0
+        for _ in range(nobs - 1):
+            new_old_wt = old_wt * self._old_wt_factor + 1.0
+            if new_old_wt == old_wt:  # the weight has converged
+                break
+            old_wt = new_old_wt
+        return old_wt
+
+    def update(self, value: float) -> float:
+        if math.isnan(self._weighted):
+            self._weighted = value
+        else:
+            self._old_wt *= self._old_wt_factor
+            if self._weighted != value:
+                self._weighted = self._old_wt * self._weighted + value
+                self._weighted /= self._old_wt + 1.0
+            self._old_wt += 1.0
+        self._nobs += 1
+
+        if self._nobs < self._min_periods:
+            return math.nan
+        return self._weighted
@@ -0,0 +1,5 @@
+from .backtest import Backtest, BacktestResult
+from .sweep import ParameterSweep
+from .walk_forward import WalkForward
+
+__all__ = ["Backtest", "BacktestResult", "ParameterSweep", "WalkForward"]
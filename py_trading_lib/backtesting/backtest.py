@@ -0,0 +1,161 @@
+from typing import Literal, NamedTuple, TypeAlias
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.backtesting import kernels
+from py_trading_lib.orders.orders import ORDER_CODES, OrderLongClose, OrderLongOpen
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+fills: TypeAlias = Literal["next_open", "close"]
+
+__all__ = ["Backtest", "BacktestResult"]
+
+
+class BacktestResult(NamedTuple):
+    """
+    - positions: 1 for every kline at whose close a position is held, otherwise 0.
+    - fills: one row per execution with its TIME, PRICE and ORDER code (see ORDER_CODES).
+    - equity: the equity at the close of every kline.
+    - trades: one row per trade. A trade which is still open at the end is valued at the last close.
+    """
+
+    positions: pd.Series
+    fills: pd.DataFrame
+    equity: pd.Series
+    trades: pd.DataFrame
+
+
+# The metrics of the results of the ParameterSweep and the WalkForward.
+METRICS = ["TOTAL_RETURN", "MAX_DRAWDOWN", "N_TRADES", "EXPOSURE"]
+
+
+class Backtest:
+    def __init__(
+        self,
+        open_signal: str,
+        close_signal: str,
+        fill: fills = "next_open",
+        fee: float = 0.0,
+        initial_capital: float = 1.0,
+    ) -> None:
+        """
+        A long only backtest which is always fully invested while a position is held.
+
+        `open_signal` and `close_signal` are the names of the boolean signal columns, e.g. of CheckAllTrue conditions,
+        which generate OrderLongOpen and OrderLongClose orders. A kline with both signals doesn't change the position.
+        With `fill="next_open"` the orders are filled at the open of the following kline,
+        with `fill="close"` at the close of the signalling kline.
+        The `fee` is a fraction of the traded value, which is paid on every fill.
+        """
+        self._check_fill(fill)
+        self._check_fee(fee)
+        self._open_signal = open_signal
+        self._close_signal = close_signal
+        self._fill = fill
+        self._fee = fee
+        self._initial_capital = initial_capital
+
+    @property
+    def initial_capital(self) -> float:
+        return self._initial_capital
+
+    def _check_fill(self, fill: fills) -> None:
+        if fill not in ("next_open", "close"):
+            raise ValueError(
+                f"Invalid fill: {fill}. Use either 'next_open' or 'close'."
+            )
+
+    def _check_fee(self, fee: float) -> None:
+        if not 0 <= fee < 1:
+            raise ValueError(f"The fee must be in the range [0, 1) but is {fee}.")
+
+    def run(self, data: pd.DataFrame) -> BacktestResult:
+        """
+        `data` contains the TOHLCV columns and the signal columns, e.g. the output of `Analysis.calculate_analysis_data`.
+        All steps are vectorized, there is no loop over the klines.
+        """
+        self._perform_sanity_checks(data)
+
+        close = data["CLOSE"].to_numpy(dtype="float64")
+        if self._fill == "next_open":
+            fill_price = data["OPEN"].to_numpy(dtype="float64")
+        else:
+            fill_price = close
+
+        position = kernels.positions(
+            data[self._open_signal].to_numpy(),
+            data[self._close_signal].to_numpy(),
+            next_open=self._fill == "next_open",
+        )
+        returns = kernels.returns(close, fill_price, position, self._fee)
+        equity = self._initial_capital * np.cumprod(returns)
+
+        previous_position = np.concatenate(([False], position[:-1]))
+        fill_bars = np.flatnonzero(position != previous_position)
+        time = utils.get_time(data)
+
+        return BacktestResult(
+            positions=pd.Series(
+                position.astype(np.int8), index=data.index, name="POSITION"
+            ),
+            fills=self._get_fills(fill_bars, position, time, fill_price),
+            equity=pd.Series(equity, index=data.index, name="EQUITY"),
+            trades=self._get_trades(fill_bars, time, fill_price, close),
+        )
+
+    def _perform_sanity_checks(self, data: pd.DataFrame) -> None:
+        sanity.check_not_empty(data)
+        sanity.check_cols_for_tohlcv(data)
+        # The indicator columns of the analysis data may contain NaNs, so only the needed columns are checked.
+        sanity.check_frame(data, ["TIME", "OPEN", "CLOSE"])
+        signals = [self._open_signal, self._close_signal]
+        sanity.check_cols_exist_in_df(signals, data)
+        sanity.check_frame(data, signals, only_bools=True)
+
+    def _get_fills(
+        self,
+        fill_bars: np.ndarray,
+        position: np.ndarray,
+        time: np.ndarray,
+        fill_price: np.ndarray,
+    ) -> pd.DataFrame:
+        order = np.where(
+            position[fill_bars], ORDER_CODES[OrderLongOpen], ORDER_CODES[OrderLongClose]
+        ).astype(np.int8)
+        return pd.DataFrame(
+            {"TIME": time[fill_bars], "PRICE": fill_price[fill_bars], "ORDER": order}
+        )
+
+    def _get_trades(
+        self,
+        fill_bars: np.ndarray,
+        time: np.ndarray,
+        fill_price: np.ndarray,
+        close: np.ndarray,
+    ) -> pd.DataFrame:
+        # The fills alternate between entries and exits, starting with an entry.
+        entries = fill_bars[0::2]
+        exits = fill_bars[1::2]
+        is_open = np.zeros(len(entries), dtype=bool)
+
+        entry_price = fill_price[entries]
+        exit_price = fill_price[exits]
+        exit_time = time[exits]
+        if len(exits) < len(entries):
+            is_open[-1] = True
+            exit_price = np.append(exit_price, close[-1])
+            exit_time = np.append(exit_time, time[-1])
+
+        fee_factor = np.where(is_open, 1.0 - self._fee, (1.0 - self._fee) ** 2)
+        return pd.DataFrame(
+            {
+                "ENTRY_TIME": time[entries],
+                "ENTRY_PRICE": entry_price,
+                "EXIT_TIME": exit_time,
+                "EXIT_PRICE": exit_price,
+                "RETURN": exit_price / entry_price * fee_factor - 1.0,
+                "IS_OPEN": is_open,
+            }
+        )
@@ -0,0 +1,78 @@
+"""
+Vectorized NumPy kernels for the backtests.
+
+The signals and positions may have leading axes, e.g. one row per parameter combination.
+The prices are 1-D and broadcast over these rows.
+"""
+
+import numpy as np
+
+__all__ = ["positions", "returns", "max_drawdown"]
+
+
+def positions(
+    open_signal: np.ndarray, close_signal: np.ndarray, next_open: bool = True
+) -> np.ndarray:
+    """
+    The position after a signal is carried forward until the next opposite signal.
+    A kline with both signals doesn't change the position.
+    With `next_open` the position decided at a close is only held from the next kline on.
+    """
+    open_only = open_signal & ~close_signal
+    close_only = close_signal & ~open_signal
+
+    # The position is held if the last open signal came after the last close signal.
+    n = open_only.shape[-1]
+    bars = np.arange(n, dtype=np.int32 if n < np.iinfo(np.int32).max else np.int64)
+    last_open = np.where(open_only, bars, -1)
+    np.maximum.accumulate(last_open, axis=-1, out=last_open)
+    last_close = np.where(close_only, bars, -1)
+    np.maximum.accumulate(last_close, axis=-1, out=last_close)
+    position = last_open > last_close
+
+    if next_open:
+        position = _shift_right(position)
+    return position
+
+
+def returns(
+    close: np.ndarray, fill_price: np.ndarray, position: np.ndarray, fee: float = 0.0
+) -> np.ndarray:
+    """
+    The return of every kline depends on whether the position was held before and after it:
+    held -> held: close / previous close, held -> flat: fill / previous close,
+    flat -> held: close / fill, flat -> flat: 1.
+    The `fee` is paid on every change of the position.
+    """
+    previous_position = _shift_right(position)
+    previous_close = np.concatenate((close[:1], close[:-1]))
+    # The price ratios are 1-D and shared by all rows of positions.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        held_return = close / previous_close
+        exit_return = fill_price / previous_close
+        entry_return = close / fill_price
+
+    is_held = position & previous_position
+    is_entry = position & ~previous_position
+    is_exit = previous_position & ~position
+
+    result = np.ones(position.shape)
+    np.copyto(result, held_return, where=is_held)
+    np.copyto(result, entry_return, where=is_entry)
+    np.copyto(result, exit_return, where=is_exit)
+    np.multiply(result, 1.0 - fee, out=result, where=is_entry | is_exit)
+    return result
+
+
+def max_drawdown(equity: np.ndarray) -> np.ndarray:
+    """
+    Returns the largest relative drop from a previous peak as a negative fraction.
+    """
+    peak = np.maximum.accumulate(equity, axis=-1)
+    return np.min(equity / peak, axis=-1) - 1.0
+
+
+def _shift_right(values: np.ndarray) -> np.ndarray:
+    shifted = np.zeros_like(values)
+    shifted[..., 1:] = values[..., :-1]
+    return shifted
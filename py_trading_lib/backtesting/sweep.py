@@ -0,0 +1,200 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis import kernels as ti_kernels
+from py_trading_lib.analysis.conditions import operators
+from py_trading_lib.backtesting import kernels
+from py_trading_lib.backtesting.backtest import METRICS, fills
+import py_trading_lib.utils.sanity_checks as sanity
+
+__all__ = ["ParameterSweep"]
+
+_OPERATOR_FUNCS: Dict[str, Callable[[Any, Any], np.ndarray]] = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+}
+# The thresholds are backtested in chunks, so that one chunk holds at most this many values per array.
+_MAX_CHUNK_VALUES = 1 << 22
+
+
+class ParameterSweep:
+    def __init__(
+        self,
+        sma_lengths: Sequence[int],
+        rsi_lengths: Sequence[int],
+        rsi_thresholds: Sequence[float],
+        open_operator: operators = ">",
+        rsi_operator: operators = "<",
+        close_operator: operators = "<",
+        fill: fills = "next_open",
+        fee: float = 0.0,
+    ) -> None:
+        """
+        Backtests every combination of the parameter grids with the strategy:
+        - open when `CLOSE {open_operator} SMA_length` and `RSI_length {rsi_operator} threshold`
+        - close when `CLOSE {close_operator} SMA_length`
+
+        This equals running an Analysis with SMA, RSI, CheckRelation and CheckAllTrue and a Backtest per combination,
+        but the work is shared: one prefix sum of the closes serves all SMA lengths,
+        one gain/loss series serves all RSI lengths and the thresholds are compared by broadcasting.
+        """
+        self._check_lengths(sma_lengths)
+        self._check_lengths(rsi_lengths)
+        if len(rsi_thresholds) == 0:
+            raise ValueError("There must be at least one RSI threshold.")
+        for operator in (open_operator, rsi_operator, close_operator):
+            self._check_operator(operator)
+        if fill not in ("next_open", "close"):
+            raise ValueError(
+                f"Invalid fill: {fill}. Use either 'next_open' or 'close'."
+            )
+        if not 0 <= fee < 1:
+            raise ValueError(f"The fee must be in the range [0, 1) but is {fee}.")
+
+        self._sma_lengths = list(sma_lengths)
+        self._rsi_lengths = list(rsi_lengths)
+        self._rsi_thresholds = np.asarray(rsi_thresholds, dtype=np.float64)
+        self._open_operator = open_operator
+        self._rsi_operator = rsi_operator
+        self._close_operator = close_operator
+        self._fill = fill
+        self._fee = fee
+
+    def _check_lengths(self, lengths: Sequence[int]) -> None:
+        if len(lengths) == 0:
+            raise ValueError("There must be at least one length.")
+        if min(lengths) < 1:
+            raise ValueError(f"All lengths must be at least 1: {lengths}.")
+
+    def _check_operator(self, operator: operators) -> None:
+        if operator not in _OPERATOR_FUNCS:
+            raise ValueError(f"Invalid relational operator: {operator}")
+
+    def run(
+        self, tohlcv: pd.DataFrame, max_workers: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Returns a tidy table with one row per combination, sorted by the parameters.
+        The RSI lengths are spread over a process pool of `max_workers` processes.
+        With `max_workers=1` or a single RSI length the sweep runs in this process,
+        which saves starting the pool and sending the prices to it.
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but is {max_workers}.")
+        sanity.check_tohlcv(tohlcv)
+        sanity.check_has_min_len(tohlcv, max(self._sma_lengths + self._rsi_lengths))
+
+        close = tohlcv["CLOSE"].to_numpy(dtype="float64")
+        fill_price = tohlcv["OPEN" if self._fill == "next_open" else "CLOSE"]
+        prices = _Prices(close, fill_price.to_numpy(dtype="float64"))
+
+        if max_workers == 1 or len(self._rsi_lengths) == 1:
+            shared = _SharedPrecomputation(prices)
+            tables = [
+                self._run_rsi_length(shared, rsi_length)
+                for rsi_length in self._rsi_lengths
+            ]
+        else:
+            with ProcessPoolExecutor(
+                max_workers, initializer=_init_worker, initargs=(self, prices)
+            ) as executor:
+                tables = list(executor.map(_run_rsi_length, self._rsi_lengths))
+
+        results = pd.concat(tables, ignore_index=True)
+        results = results.sort_values(["SMA_LENGTH", "RSI_LENGTH", "RSI_THRESHOLD"])
+        return results.reset_index(drop=True)
+
+    def _run_rsi_length(
+        self, shared: "_SharedPrecomputation", rsi_length: int
+    ) -> pd.DataFrame:
+        rsi = ti_kernels.rsi_from_gain_and_loss(shared.gains_and_losses, rsi_length)
+        # One row per threshold, NaNs compare as False like in CheckRelation.
+        with np.errstate(invalid="ignore"):
+            rsi_relations = _OPERATOR_FUNCS[self._rsi_operator](
+                rsi, self._rsi_thresholds[:, None]
+            )
+
+        tables = []
+        for sma_length in self._sma_lengths:
+            sma = ti_kernels.sma_from_prefix_sum(
+                shared.sums, shared.reference, sma_length
+            )
+            with np.errstate(invalid="ignore"):
+                sma_open = _OPERATOR_FUNCS[self._open_operator](
+                    shared.prices.close, sma
+                )
+                sma_close = _OPERATOR_FUNCS[self._close_operator](
+                    shared.prices.close, sma
+                )
+
+            metrics = self._backtest(shared.prices, rsi_relations & sma_open, sma_close)
+            metrics["SMA_LENGTH"] = sma_length
+            metrics["RSI_LENGTH"] = rsi_length
+            metrics["RSI_THRESHOLD"] = self._rsi_thresholds
+            tables.append(pd.DataFrame(metrics))
+
+        columns = ["SMA_LENGTH", "RSI_LENGTH", "RSI_THRESHOLD"] + METRICS
+        return pd.concat(tables, ignore_index=True)[columns]
+
+    def _backtest(
+        self, prices: "_Prices", open_signals: np.ndarray, close_signal: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        n = len(prices.close)
+        chunk_size = max(1, _MAX_CHUNK_VALUES // n)
+        chunks: Dict[str, List[np.ndarray]] = {metric: [] for metric in METRICS}
+
+        for start in range(0, len(open_signals), chunk_size):
+            position = kernels.positions(
+                open_signals[start : start + chunk_size],
+                close_signal,
+                next_open=self._fill == "next_open",
+            )
+            returns = kernels.returns(
+                prices.close, prices.fill_price, position, self._fee
+            )
+            equity = np.cumprod(returns, axis=-1)
+            entries = position[:, 1:] & ~position[:, :-1]
+
+            chunks["TOTAL_RETURN"].append(equity[:, -1] - 1.0)
+            chunks["MAX_DRAWDOWN"].append(kernels.max_drawdown(equity))
+            chunks["N_TRADES"].append(entries.sum(axis=-1) + position[:, 0])
+            chunks["EXPOSURE"].append(position.mean(axis=-1))
+
+        return {metric: np.concatenate(values) for metric, values in chunks.items()}
+
+
+class _Prices(NamedTuple):
+    close: np.ndarray
+    fill_price: np.ndarray
+
+
+class _SharedPrecomputation:
+    """
+    The intermediates shared by all combinations, calculated once per worker.
+    """
+
+    def __init__(self, prices: _Prices) -> None:
+        self.prices = prices
+        self.sums, self.reference = ti_kernels.prefix_sum(prices.close)
+        self.gains_and_losses = ti_kernels.gain_and_loss(prices.close)
+
+
+_worker_sweep: Optional[ParameterSweep] = None
+_worker_shared: Optional[_SharedPrecomputation] = None
+
+
+def _init_worker(sweep: ParameterSweep, prices: _Prices) -> None:
+    global _worker_sweep, _worker_shared
+    _worker_sweep = sweep
+    _worker_shared = _SharedPrecomputation(prices)
+
+
+def _run_rsi_length(rsi_length: int) -> pd.DataFrame:
+    assert _worker_sweep is not None and _worker_shared is not None
+    return _worker_sweep._run_rsi_length(_worker_shared, rsi_length)
@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.backtesting import kernels
+from py_trading_lib.backtesting.backtest import METRICS, Backtest, BacktestResult
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+if TYPE_CHECKING:
+    from py_trading_lib.analysis import Analysis
+
+__all__ = ["WalkForward"]
+
+
+class WalkForward:
+    def __init__(
+        self,
+        analysis: "Analysis",
+        backtest: Backtest,
+        window_size: int,
+        step: Optional[int] = None,
+        anchored: bool = False,
+    ) -> None:
+        """
+        Backtests the analysis on consecutive windows of `window_size` klines, which start every `step` klines.
+        By default the windows don't overlap. With `anchored` all windows start at the first kline
+        and grow by `step` klines instead.
+
+        The analysis data is calculated only once over the whole series and every window is sliced out of it
+        with `Analysis.calculate_windows`, which masks the first `get_min_len() - 1` values of every indicator
+        at the start of the window. Indicators over a fixed window of klines like the SMA thus equal a run
+        on the window alone. Smoothed indicators like the RSI or the MACD keep the history before the window,
+        so they differ slightly from a run started fresh at the start of the window.
+        """
+        step = window_size if step is None else step
+        if window_size < 1 or step < 1:
+            raise ValueError(
+                f"The window size: {window_size} and the step: {step} must be at least 1."
+            )
+        self._analysis = analysis
+        self._backtest = backtest
+        self._window_size = window_size
+        self._step = step
+        self._anchored = anchored
+
+    def get_windows(self, n_klines: int) -> List[Tuple[int, int]]:
+        """
+        Returns the [start, stop) ranges of all complete windows within `n_klines` klines.
+        """
+        stops = range(self._window_size, n_klines + 1, self._step)
+        if self._anchored:
+            return [(0, stop) for stop in stops]
+        return [(stop - self._window_size, stop) for stop in stops]
+
+    def run(
+        self,
+        tohlcv: pd.DataFrame,
+        max_workers: Optional[int] = None,
+        chunksize: int = 16,
+    ) -> pd.DataFrame:
+        """
+        Returns one row per window with its range, its first and last TIME and the metrics of its backtest.
+        The windows are spread over a process pool of `max_workers` processes in chunks of `chunksize` windows,
+        whose warm-ups are calculated together. With `max_workers=1` or a single chunk the windows are
+        backtested in this process, which saves starting the pool and sending the analysis data to it.
+        """
+        if chunksize < 1:
+            raise ValueError(f"The chunksize must be at least 1 but is {chunksize}.")
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but is {max_workers}.")
+        sanity.check_tohlcv(tohlcv)
+        sanity.check_has_min_len(tohlcv, self._window_size)
+        min_len = self._analysis.get_min_len()
+        if self._window_size < min_len:
+            raise ValueError(
+                f"The window size: {self._window_size} must be at least the min len of the analysis: {min_len}."
+            )
+
+        analysis_data = self._analysis.calculate_analysis_data(tohlcv)
+        windows = self.get_windows(len(tohlcv))
+        chunks = [
+            windows[start : start + chunksize]
+            for start in range(0, len(windows), chunksize)
+        ]
+        if max_workers == 1 or len(chunks) == 1:
+            metrics = [
+                window_metrics
+                for chunk in chunks
+                for window_metrics in self._run_windows(analysis_data, chunk)
+            ]
+        else:
+            with ProcessPoolExecutor(
+                max_workers, initializer=_init_worker, initargs=(self, analysis_data)
+            ) as executor:
+                metrics = [
+                    window_metrics
+                    for chunk_metrics in executor.map(_run_windows, chunks)
+                    for window_metrics in chunk_metrics
+                ]
+
+        time = utils.get_time(tohlcv)
+        starts, stops = np.array(windows).T
+        results = pd.DataFrame(
+            {
+                "START": starts,
+                "STOP": stops,
+                "START_TIME": time[starts],
+                "END_TIME": time[stops - 1],
+            }
+        )
+        return pd.concat([results, pd.DataFrame(metrics, columns=METRICS)], axis=1)
+
+    def _run_windows(
+        self, analysis_data: pd.DataFrame, windows: List[Tuple[int, int]]
+    ) -> List[Dict[str, float]]:
+        return [
+            self._get_metrics(self._backtest.run(data))
+            for data in self._analysis.calculate_windows(analysis_data, windows)
+        ]
+
+    def _get_metrics(self, result: BacktestResult) -> Dict[str, float]:
+        equity = result.equity.to_numpy()
+        return {
+            "TOTAL_RETURN": equity[-1] / self._backtest.initial_capital - 1.0,
+            "MAX_DRAWDOWN": float(kernels.max_drawdown(equity)),
+            "N_TRADES": len(result.trades),
+            "EXPOSURE": float(result.positions.mean()),
+        }
+
+
+_worker_walk_forward: Optional[WalkForward] = None
+_worker_analysis_data: Optional[pd.DataFrame] = None
+
+
+def _init_worker(walk_forward: WalkForward, analysis_data: pd.DataFrame) -> None:
+    global _worker_walk_forward, _worker_analysis_data
+    _worker_walk_forward = walk_forward
+    _worker_analysis_data = analysis_data
+
+
+def _run_windows(windows: List[Tuple[int, int]]) -> List[Dict[str, float]]:
+    assert _worker_walk_forward is not None and _worker_analysis_data is not None
+    return _worker_walk_forward._run_windows(_worker_analysis_data, windows)
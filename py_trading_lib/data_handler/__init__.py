@@ -1,3 +1,22 @@
 from .historic_data import LocalKlines
+from .resampling import Resampler, parse_interval
+from .live_feed import KlineFeed, SocketKlineFeed
+from .replay import ReplayServer
+from .kline_window import KlineWindow
+from .kline_store import KlineStore
+from .time_index import KlineGaps, find_gaps, fill_gaps, set_time_index
 
-__all__ = ["LocalKlines"]
+__all__ = [
+    "LocalKlines",
+    "Resampler",
+    "parse_interval",
+    "KlineFeed",
+    "SocketKlineFeed",
+    "ReplayServer",
+    "KlineWindow",
+    "KlineStore",
+    "KlineGaps",
+    "find_gaps",
+    "fill_gaps",
+    "set_time_index",
+]
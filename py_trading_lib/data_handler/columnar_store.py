@@ -0,0 +1,148 @@
+"""
+A directory based columnar store for DataFrames.
+
+Every column is saved as one `.npy` file, so the columns can be memory-mapped independently.
+The columns of every save are written into a new version directory inside the store.
+`meta.json` names the current version and the column order. It is written last and replaced atomically,
+so readers only ever see complete stores and never mix the columns of two saves.
+Versions which are no longer current are removed after the replacement.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["save_columns", "load_columns", "load_metadata", "remove_store"]
+
+_META_FILE = "meta.json"
+_FORMAT_VERSION = 2
+_LOAD_ATTEMPTS = 3
+_VERSION_PREFIX = "version-"
+_VERSION_PATTERN = re.compile(rf"{_VERSION_PREFIX}[0-9a-f]{{32}}")
+
+
+def save_columns(df: pd.DataFrame, directory: str, metadata: Dict[str, Any]) -> None:
+    """
+    Saves the columns of the DataFrame atomically into the directory and replaces the existing store.
+    Concurrent saves never mix their columns. At worst the store refers to a version which was removed
+    by the other save and fails to load with a FileNotFoundError until it is saved again.
+    """
+    os.makedirs(directory, exist_ok=True)
+    version_directory = os.path.join(directory, f"{_VERSION_PREFIX}{uuid.uuid4().hex}")
+    os.mkdir(version_directory)
+
+    try:
+        file_names = []
+        for position, (name, col) in enumerate(df.items()):
+            file_name = f"{position}.npy"
+            np.save(os.path.join(version_directory, file_name), col.to_numpy())
+            file_names.append([str(name), file_name])
+
+        meta = {
+            "format_version": _FORMAT_VERSION,
+            "version": os.path.basename(version_directory),
+            "columns": file_names,
+            "metadata": metadata,
+        }
+        _write_meta(directory, meta)
+    except BaseException:
+        shutil.rmtree(version_directory, ignore_errors=True)
+        raise
+
+    _remove_old_versions(directory, meta["version"])
+
+
+def _write_meta(directory: str, meta: Dict[str, Any]) -> None:
+    file_descriptor, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(file_descriptor, "w") as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, os.path.join(directory, _META_FILE))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _remove_old_versions(directory: str, version: str) -> None:
+    """
+    Readers which already mapped the columns of an old version keep them, the files are only unlinked.
+    A reader which read the old `meta.json` but not the columns yet retries with the new one.
+    Only the version directories of the store are removed, all other entries of the directory are kept.
+    """
+    for entry in os.listdir(directory):
+        if entry != version and _VERSION_PATTERN.fullmatch(entry):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def load_columns(
+    directory: str, mmap: bool = True
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Loads the store as DataFrame together with its metadata.
+    With `mmap` the columns are memory-mapped copy-on-write,
+    so the data is only read from disk when accessed and changes never reach the file.
+    Raises a FileNotFoundError if there is no complete store in the directory.
+    """
+    meta = _load_meta(directory)
+    attempts = 1
+    while True:
+        if meta is None:
+            raise FileNotFoundError(f"There is no columnar store in: {directory}.")
+
+        try:
+            return _load_version(directory, meta, mmap), meta["metadata"]
+        except FileNotFoundError:
+            # The store was replaced or removed after its meta file was read.
+            curr_meta = _load_meta(directory)
+            if curr_meta == meta or attempts == _LOAD_ATTEMPTS:
+                raise
+            meta = curr_meta
+            attempts += 1
+
+
+def _load_version(directory: str, meta: Dict[str, Any], mmap: bool) -> pd.DataFrame:
+    version_directory = os.path.join(directory, meta["version"])
+    mmap_mode = "c" if mmap else None
+    # np.asarray turns the memmaps into plain ndarray views, which keep the mapping alive.
+    columns = {
+        position: np.asarray(
+            np.load(os.path.join(version_directory, file_name), mmap_mode=mmap_mode)
+        )
+        for position, (_, file_name) in enumerate(meta["columns"])
+    }
+    df = pd.DataFrame(columns, copy=False)
+    df.columns = [name for name, _ in meta["columns"]]
+    return df
+
+
+def load_metadata(directory: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns None if there is no complete store of the current format in the directory.
+    """
+    meta = _load_meta(directory)
+    if meta is None:
+        return None
+    return meta["metadata"]
+
+
+def _load_meta(directory: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, _META_FILE)) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("format_version") != _FORMAT_VERSION:
+        return None
+    return meta
+
+
+def remove_store(directory: str) -> None:
+    shutil.rmtree(directory, ignore_errors=True)
@@ -1,24 +1,129 @@
+import hashlib
+import io
+import os
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
+import py_trading_lib.data_handler.columnar_store as columnar
+import py_trading_lib.data_handler.time_index as times
+from py_trading_lib.data_handler.resampling import parse_interval
 import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
 
 __all__ = ["LocalKlines"]
 
 
 class LocalKlines:
-    def get_tohlcv_from_csv(self, path: str) -> pd.DataFrame:
+    def __init__(
+        self,
+        use_binary_cache: bool = False,
+        cache_dir: Optional[str] = None,
+        compact: bool = False,
+        interval: Optional[str] = None,
+        fill_gaps: bool = False,
+        time_index: bool = False,
+    ) -> None:
+        """
+        With `use_binary_cache` a CSV is converted on the first read into a binary columnar sidecar.
+        All later reads are served memory-mapped from the sidecar without parsing and validating the CSV again.
+        The sidecar is rebuilt automatically when the mtime or the size of the CSV changes.
+
+        By default the sidecar is placed next to the CSV as `.<file name>.klines`.
+        Use `cache_dir` to collect the sidecars of all CSVs in one directory instead.
+
+        With `compact` the klines are returned with float32 prices and volumes and int32 TIME offsets,
+        which halves their memory (see `utils.to_compact`). The CSV is still parsed as float64.
+        Compact sidecars are stored separately and already hold the compact columns.
+
+        With an `interval` like "1h" the loaded klines are checked for gaps, duplicates and misaligned TIMEs,
+        which raise a ValueError (see `find_gaps`). With `fill_gaps` gaps and duplicates
+        are repaired instead (see `fill_gaps`).
+
+        With `time_index` the klines get a UTC DatetimeIndex of their TIME,
+        so time windows can be sliced with `.loc` by a binary search.
+        """
+        if fill_gaps and interval is None:
+            raise ValueError("fill_gaps needs the interval of the klines.")
+        if interval is not None:
+            parse_interval(interval)
+
+        self._use_binary_cache = use_binary_cache
+        self._cache_dir = cache_dir
+        self._compact = compact
+        self._interval = interval
+        self._fill_gaps = fill_gaps
+        self._time_index = time_index
+
+    def get_tohlcv_from_csv(
+        self,
+        path: str,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        last_n: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Without a range the whole file is loaded.
+        Otherwise only the klines with `start_time <= TIME <= end_time` are loaded,
+        of which `last_n` keeps only the last n klines. The range is found with a binary search
+        on the sorted TIME column, so only the requested window is read and parsed.
+        Without `time_index` the returned window always has a RangeIndex starting at 0.
+        The prices and volumes are float64, unless `compact` is set.
+        """
         self._perform_sanity_checks(path)
+        self._check_range(start_time, end_time, last_n)
+        is_range = start_time is not None or end_time is not None or last_n is not None
 
-        data = self._try_read_data(path)
+        if self._use_binary_cache:
+            data = self._get_tohlcv_from_binary_cache(path)
+            if is_range:
+                data = self._slice_range(data, start_time, end_time, last_n)
+            return self._check_time(data)
+
+        if is_range:
+            data = self._try_read_range(path, start_time, end_time, last_n)
+        else:
+            data = self._try_read_data(path)
 
         self._validate(data)
 
-        return data
+        if self._compact:
+            data = utils.to_compact(data)
+            sanity.mark_validated(data)
+        return self._check_time(data)
+
+    def _check_time(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
+        if self._interval is not None:
+            kline_gaps = times.find_gaps(tohlcv, self._interval)
+            if self._fill_gaps:
+                if not kline_gaps.is_regular():
+                    tohlcv = times.fill_gaps(tohlcv, self._interval)
+            elif not kline_gaps.is_regular():
+                raise ValueError(
+                    f"The klines of the interval: {self._interval} have {kline_gaps}."
+                )
+        if self._time_index:
+            times.set_time_index(tohlcv)
+        return tohlcv
 
     def _perform_sanity_checks(self, path):
         sanity.check_file_exist(path)
         sanity.check_is_file_csv(path)
 
+    def _check_range(
+        self,
+        start_time: Optional[int],
+        end_time: Optional[int],
+        last_n: Optional[int],
+    ) -> None:
+        if last_n is not None and last_n < 1:
+            raise ValueError(f"last_n must be at least 1 but is {last_n}.")
+        if start_time is not None and end_time is not None and start_time > end_time:
+            raise ValueError(
+                f"The start_time: {start_time} must not be after the end_time: {end_time}."
+            )
+
     def _try_read_data(self, path: str):
         try:
             data = pd.read_csv(path)
@@ -30,5 +135,228 @@ class LocalKlines:
         return data
 
     def _validate(self, tohlcv: pd.DataFrame):
-        sanity.check_tohlcv(tohlcv)
-        sanity.check_contains_only_numbers(tohlcv)
+        sanity.check_tohlcv(tohlcv, only_numbers=True)
+
+    def _try_read_range(
+        self,
+        path: str,
+        start_time: Optional[int],
+        end_time: Optional[int],
+        last_n: Optional[int],
+    ) -> pd.DataFrame:
+        with open(path, "rb") as file:
+            header, window = _CsvRange(file).read(start_time, end_time, last_n)
+
+        try:
+            data = pd.read_csv(io.BytesIO(header + window))
+        except Exception as e:
+            raise RuntimeError(
+                f"Something went wrong while reading the data from the file: {path}."
+            ) from e
+
+        self._check_is_sorted(data)
+        return self._convert_int_prices_to_float(data)
+
+    def _convert_int_prices_to_float(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
+        """
+        A small window may only contain whole numbers, so its prices would be parsed as int64.
+        Converting them keeps the dtypes independent of the window.
+        """
+        price_cols = ["OPEN", "HIGH", "LOW", "CLOSE", "VOLUME"]
+        int_cols = [
+            col
+            for col in price_cols
+            if col in tohlcv and pd.api.types.is_integer_dtype(tohlcv[col])
+        ]
+        return tohlcv.astype({col: "float64" for col in int_cols})
+
+    def _check_is_sorted(self, tohlcv: pd.DataFrame) -> None:
+        if "TIME" in tohlcv and not tohlcv["TIME"].is_monotonic_increasing:
+            raise ValueError("The TIME column must be sorted to read a range.")
+
+    def _slice_range(
+        self,
+        tohlcv: pd.DataFrame,
+        start_time: Optional[int],
+        end_time: Optional[int],
+        last_n: Optional[int],
+    ) -> pd.DataFrame:
+        time = tohlcv["TIME"].to_numpy()
+        start = (
+            0
+            if start_time is None
+            else np.searchsorted(
+                time, self._to_time_col(tohlcv, start_time, True), "left"
+            )
+        )
+        end = (
+            len(time)
+            if end_time is None
+            else np.searchsorted(
+                time, self._to_time_col(tohlcv, end_time, False), "right"
+            )
+        )
+        if last_n is not None:
+            start = max(start, end - last_n)
+
+        window = tohlcv.iloc[start:end]
+        window.index = pd.RangeIndex(len(window))
+        sanity.check_not_empty(window)
+        sanity.mark_validated(window)
+        return window
+
+    def _to_time_col(self, tohlcv: pd.DataFrame, time: int, round_up: bool) -> int:
+        """
+        Converts a TIME into the value of the TIME column, which is an int32 offset for compact data.
+        """
+        if not utils.is_compact(tohlcv):
+            return time
+        base, unit = tohlcv.attrs[utils.TIME_BASE], tohlcv.attrs[utils.TIME_UNIT]
+        offset = -(-(time - base) // unit) if round_up else (time - base) // unit
+        int32_range = np.iinfo(np.int32)
+        return int(np.clip(offset, int32_range.min, int32_range.max))
+
+    def _get_tohlcv_from_binary_cache(self, path: str) -> pd.DataFrame:
+        sidecar = self._get_sidecar_path(path)
+        source_stat = self._get_source_stat(path)
+
+        metadata = columnar.load_metadata(sidecar)
+        if metadata is not None:
+            # The attrs hold the TIME base of compact sidecars.
+            attrs = metadata.pop("attrs", {})
+            if metadata == source_stat:
+                try:
+                    data, _ = columnar.load_columns(sidecar)
+                except (OSError, ValueError):
+                    # E.g. the sidecar was replaced by another process meanwhile, the CSV is read again.
+                    data = None
+                if data is not None:
+                    data.attrs = attrs
+                    # The sidecar is only written after the validation of the CSV.
+                    sanity.mark_validated(data)
+                    return data
+
+        data = self._try_read_data(path)
+        self._validate(data)
+        if self._compact:
+            data = utils.to_compact(data)
+            sanity.mark_validated(data)
+        self._try_write_sidecar(data, sidecar, {**source_stat, "attrs": data.attrs})
+        return data
+
+    def _get_sidecar_path(self, path: str) -> str:
+        directory, file_name = os.path.split(os.path.abspath(path))
+        suffix = "compact.klines" if self._compact else "klines"
+        if self._cache_dir is None:
+            return os.path.join(directory, f".{file_name}.{suffix}")
+
+        path_hash = hashlib.blake2b(
+            os.path.abspath(path).encode(), digest_size=8
+        ).hexdigest()
+        return os.path.join(self._cache_dir, f"{file_name}-{path_hash}.{suffix}")
+
+    def _get_source_stat(self, path: str) -> Dict[str, Any]:
+        stat = os.stat(path)
+        return {"source_mtime_ns": stat.st_mtime_ns, "source_size": stat.st_size}
+
+    def _try_write_sidecar(
+        self, data: pd.DataFrame, sidecar: str, source_stat: Dict[str, Any]
+    ) -> None:
+        """
+        A sidecar that can't be written (e.g. read only directory) only costs the speedup, so it is ignored.
+        """
+        try:
+            columnar.save_columns(data, sidecar, source_stat)
+        except OSError:
+            pass
+
+
+class _CsvRange:
+    """
+    Finds the byte range of a time window in a CSV file sorted by TIME without reading the whole file.
+    """
+
+    _BLOCK_SIZE = 1 << 16
+
+    def __init__(self, file: IO[bytes]) -> None:
+        self._file = file
+        self._header = file.readline()
+        self._time_col = self._get_time_col(self._header)
+        self._data_start = file.tell()
+        self._data_end = file.seek(0, io.SEEK_END)
+
+    def _get_time_col(self, header: bytes) -> int:
+        columns: List[str] = header.decode().strip().split(",")
+        if "TIME" not in columns:
+            raise ValueError(f"The CSV header: {columns} has no TIME column.")
+        return columns.index("TIME")
+
+    def read(
+        self,
+        start_time: Optional[int],
+        end_time: Optional[int],
+        last_n: Optional[int],
+    ) -> Tuple[bytes, bytes]:
+        start, end = self._data_start, self._data_end
+        if start_time is not None:
+            start = self._find_first_line(lambda time: time >= start_time)
+        if end_time is not None:
+            end = self._find_first_line(lambda time: time > end_time)
+        if last_n is not None:
+            start = max(start, self._find_nth_line_before(end, last_n))
+
+        self._file.seek(start)
+        window = self._file.read(max(0, end - start))
+        return self._header, window
+
+    def _find_first_line(self, is_after: Callable[[int], bool]) -> int:
+        """
+        Binary search over the byte offsets for the first line whose TIME fulfills `is_after`.
+        """
+        low, high = self._data_start, self._data_end
+        while low < high:
+            middle = (low + high) // 2
+            line_start = self._get_next_line_start(middle)
+            if line_start >= self._data_end or is_after(self._read_time(line_start)):
+                high = middle
+            else:
+                low = middle + 1
+        return self._get_next_line_start(low)
+
+    def _get_next_line_start(self, position: int) -> int:
+        if position <= self._data_start:
+            return self._data_start
+        self._file.seek(position - 1)
+        self._file.readline()
+        return self._file.tell()
+
+    def _read_time(self, line_start: int) -> int:
+        self._file.seek(line_start)
+        line = self._file.readline()
+        if not line.strip():
+            return np.iinfo(np.int64).max  # trailing empty lines are treated as the end
+        return int(float(line.split(b",")[self._time_col]))
+
+    def _find_nth_line_before(self, end: int, n: int) -> int:
+        """
+        Reads backwards from `end` in blocks until the start of the n-th line before `end` is found.
+        """
+        position = end
+        newlines = 0
+        while position > self._data_start:
+            block_start = max(self._data_start, position - self._BLOCK_SIZE)
+            self._file.seek(block_start)
+            block = self._file.read(position - block_start)
+            # The newline which terminates the line right before `end` does not start a new line.
+            if position == end and block.endswith(b"\n"):
+                block = block[:-1]
+            offset = len(block)
+            while offset > 0:
+                offset = block.rfind(b"\n", 0, offset)
+                if offset == -1:
+                    break
+                newlines += 1
+                if newlines == n:
+                    return block_start + offset + 1
+            position = block_start
+        return self._data_start
@@ -0,0 +1,279 @@
+"""
+A local store for the klines of many symbols and timeframes.
+
+All klines share one raw binary file per column, to which new klines are only ever appended.
+`index.json` maps every (symbol, timeframe) to its segments, i.e. row ranges of the column files,
+together with their first and last TIME. The index is replaced atomically after the columns are written,
+so rows of an interrupted append are invisible and overwritten by the next append.
+The store assumes a single writer.
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.data_handler.resampling import parse_interval
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+__all__ = ["KlineStore"]
+
+_COLUMNS: Dict[str, np.dtype] = {
+    "TIME": np.dtype("int64"),
+    "OPEN": np.dtype("float64"),
+    "HIGH": np.dtype("float64"),
+    "LOW": np.dtype("float64"),
+    "CLOSE": np.dtype("float64"),
+    "VOLUME": np.dtype("float64"),
+}
+_INDEX_FILE = "index.json"
+_FORMAT_VERSION = 1
+
+
+class _Segment(NamedTuple):
+    start: int
+    stop: int
+    first_time: int
+    last_time: int
+
+
+class KlineStore:
+    def __init__(self, directory: str) -> None:
+        """
+        Opens the store in the directory, which is created if it doesn't exist.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._n_rows = 0
+        self._segments: Dict[Tuple[str, str], List[_Segment]] = {}
+        self._load_index()
+        self._maps: Dict[str, np.ndarray] = {}
+
+    def _get_col_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def _load_index(self) -> None:
+        try:
+            with open(os.path.join(self.directory, _INDEX_FILE)) as file:
+                index = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            raise RuntimeError(
+                f"Something went wrong while reading the index of the kline store: {self.directory}."
+            ) from e
+
+        if index.get("format_version") != _FORMAT_VERSION:
+            raise ValueError(
+                f"The kline store: {self.directory} has the unsupported format version: {index.get('format_version')}."
+            )
+        self._n_rows = index["n_rows"]
+        for entry in index["keys"]:
+            key = (entry["symbol"], entry["timeframe"])
+            self._segments[key] = [_Segment(*segment) for segment in entry["segments"]]
+
+    def _save_index(self) -> None:
+        index = {
+            "format_version": _FORMAT_VERSION,
+            "n_rows": self._n_rows,
+            "keys": [
+                {"symbol": symbol, "timeframe": timeframe, "segments": segments}
+                for (symbol, timeframe), segments in self._segments.items()
+            ],
+        }
+        file_descriptor, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+        try:
+            with os.fdopen(file_descriptor, "w") as file:
+                json.dump(index, file)
+            os.replace(tmp_path, os.path.join(self.directory, _INDEX_FILE))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get_keys(self) -> List[Tuple[str, str]]:
+        """
+        Returns all stored (symbol, timeframe) pairs.
+        """
+        return list(self._segments)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._segments
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    def append(self, symbol: str, timeframe: str, tohlcv: pd.DataFrame) -> None:
+        """
+        Appends the klines to the ones of the symbol and timeframe. Their TIME must be sorted and
+        after the last stored TIME. Only the new rows are written, existing data is never rewritten.
+        """
+        parse_interval(timeframe)
+        sanity.check_tohlcv(tohlcv, only_numbers=True)
+        time = utils.get_time(tohlcv).astype(np.int64, copy=False)
+        self._check_is_sorted(time)
+        key = (symbol, timeframe)
+        segments = self._segments.get(key, [])
+        if segments and time[0] <= segments[-1].last_time:
+            raise ValueError(
+                f"The klines of {symbol} {timeframe} must start after the last stored TIME: {segments[-1].last_time}."
+            )
+
+        self._truncate_interrupted_append()
+        for name, dtype in _COLUMNS.items():
+            values = time if name == "TIME" else tohlcv[name].to_numpy(dtype=dtype)
+            with open(self._get_col_path(name), "ab") as file:
+                np.ascontiguousarray(values, dtype=dtype).tofile(file)
+
+        start, stop = self._n_rows, self._n_rows + len(time)
+        if segments and segments[-1].stop == start:
+            # The klines directly continue the last segment, e.g. repeated appends of one symbol.
+            segments[-1] = segments[-1]._replace(stop=stop, last_time=int(time[-1]))
+        else:
+            segments.append(_Segment(start, stop, int(time[0]), int(time[-1])))
+        self._segments[key] = segments
+        self._n_rows = stop
+        self._save_index()
+        # The maps only cover the old rows. Views handed out before stay valid.
+        self._maps.clear()
+
+    def _check_is_sorted(self, time: np.ndarray) -> None:
+        if not np.all(time[1:] >= time[:-1]):
+            raise ValueError("The TIME column must be sorted.")
+
+    def _truncate_interrupted_append(self) -> None:
+        for name, dtype in _COLUMNS.items():
+            path = self._get_col_path(name)
+            size = self._n_rows * dtype.itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def _get_col(self, name: str) -> np.ndarray:
+        """
+        Returns the whole column memory-mapped read only.
+        """
+        if name not in self._maps:
+            dtype = _COLUMNS[name]
+            if self._n_rows == 0:
+                col = np.empty(0, dtype=dtype)
+            else:
+                col = np.asarray(
+                    np.memmap(
+                        self._get_col_path(name),
+                        dtype=dtype,
+                        mode="r",
+                        shape=(self._n_rows,),
+                    )
+                )
+            self._maps[name] = col
+        return self._maps[name]
+
+    def get_arrays(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        last_n: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Returns the columns of the klines with `start_time <= TIME <= end_time`, of which `last_n` keeps
+        only the last n klines. The arrays are read only views of the memory-mapped column files,
+        if the klines are contiguous in the files. This is always the case for klines of one append
+        or of consecutive appends of the same symbol and timeframe. Otherwise the segments are concatenated.
+        """
+        self._check_range(start_time, end_time, last_n)
+        ranges = self._find_ranges(symbol, timeframe, start_time, end_time)
+        if last_n is not None:
+            ranges = self._keep_last_n(ranges, last_n)
+
+        if len(ranges) == 1:
+            start, stop = ranges[0]
+            return {name: self._get_col(name)[start:stop] for name in _COLUMNS}
+        return {
+            name: np.concatenate(
+                [self._get_col(name)[start:stop] for start, stop in ranges]
+                or [np.empty(0, dtype=_COLUMNS[name])]
+            )
+            for name in _COLUMNS
+        }
+
+    def get_tohlcv(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        last_n: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Like `get_arrays`, but wrapped into a TOHLCV DataFrame without copying.
+        Like `LocalKlines.get_tohlcv_from_csv` the DataFrame has a RangeIndex and an empty range raises a ValueError.
+        """
+        arrays = self.get_arrays(symbol, timeframe, start_time, end_time, last_n)
+        tohlcv = pd.DataFrame(arrays, copy=False)
+        sanity.check_not_empty(tohlcv)
+        # The klines were validated when they were appended.
+        sanity.mark_validated(tohlcv)
+        return tohlcv
+
+    def _check_range(
+        self,
+        start_time: Optional[int],
+        end_time: Optional[int],
+        last_n: Optional[int],
+    ) -> None:
+        if last_n is not None and last_n < 1:
+            raise ValueError(f"last_n must be at least 1 but is {last_n}.")
+        if start_time is not None and end_time is not None and start_time > end_time:
+            raise ValueError(
+                f"The start_time: {start_time} must not be after the end_time: {end_time}."
+            )
+
+    def _find_ranges(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_time: Optional[int],
+        end_time: Optional[int],
+    ) -> List[Tuple[int, int]]:
+        """
+        Returns the row ranges of the klines within the time range in chronological order.
+        Only the TIME of the segments at the borders of the time range is searched.
+        """
+        if (symbol, timeframe) not in self._segments:
+            raise ValueError(
+                f"There are no klines of {symbol} {timeframe} in the store: {self.directory}."
+            )
+
+        ranges = []
+        for segment in self._segments[(symbol, timeframe)]:
+            if start_time is not None and segment.last_time < start_time:
+                continue
+            if end_time is not None and segment.first_time > end_time:
+                break
+
+            start, stop = segment.start, segment.stop
+            if start_time is not None and segment.first_time < start_time:
+                time = self._get_col("TIME")[start:stop]
+                start += int(np.searchsorted(time, start_time, "left"))
+            if end_time is not None and segment.last_time > end_time:
+                time = self._get_col("TIME")[segment.start : stop]
+                stop = segment.start + int(np.searchsorted(time, end_time, "right"))
+            ranges.append((start, stop))
+        return ranges
+
+    def _keep_last_n(
+        self, ranges: List[Tuple[int, int]], last_n: int
+    ) -> List[Tuple[int, int]]:
+        kept: List[Tuple[int, int]] = []
+        for start, stop in reversed(ranges):
+            if last_n <= 0:
+                break
+            start = max(start, stop - last_n)
+            last_n -= stop - start
+            kept.append((start, stop))
+        return kept[::-1]
@@ -0,0 +1,142 @@
+from typing import TYPE_CHECKING, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+if TYPE_CHECKING:
+    from py_trading_lib.analysis import Analysis
+
+__all__ = ["KlineWindow"]
+
+_PRICE_COLS = ["OPEN", "HIGH", "LOW", "CLOSE", "VOLUME"]
+
+
+class KlineWindow:
+    """
+    A fixed capacity window over the latest TOHLCV klines for live mode.
+
+    The klines are stored in a ring buffer, where every kline is written twice: at its position and
+    at its position plus the capacity. Thus the window is always one contiguous slice in chronological order,
+    which is returned as a view without copying. Appending costs O(1) per kline and never reallocates.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError(f"The capacity must be at least 1 but is {capacity}.")
+        self.capacity = capacity
+        self._time = np.zeros(2 * capacity, dtype=np.int64)
+        self._prices = np.zeros((len(_PRICE_COLS), 2 * capacity), dtype=np.float64)
+        self._start = 0
+        self._len = 0
+        self._n_appended = 0
+
+    @classmethod
+    def for_analysis(cls, analysis: "Analysis", margin: int = 0) -> "KlineWindow":
+        """
+        Creates a window which holds the klines needed by the analysis plus `margin` klines.
+        """
+        if margin < 0:
+            raise ValueError(f"The margin must not be negative but is {margin}.")
+        return cls(analysis.get_min_len() + margin)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def is_full(self) -> bool:
+        return self._len == self.capacity
+
+    def append(self, kline: Sequence[float]) -> None:
+        """
+        Appends one kline given as TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, e.g. a row of a KlineFeed.
+        """
+        if len(kline) != len(_PRICE_COLS) + 1:
+            raise ValueError(
+                f"A kline needs the values of {['TIME'] + _PRICE_COLS} but has {len(kline)} values."
+            )
+        time = int(kline[0])
+        prices = np.asarray(kline[1:], dtype=np.float64)
+        self._check_time(time)
+        if np.isnan(prices).any():
+            raise ValueError(f"The kline: {kline} contains NaNs.")
+
+        position = self._next_position()
+        mirror = position + self.capacity
+        self._time[position] = self._time[mirror] = time
+        self._prices[:, position] = self._prices[:, mirror] = prices
+        self._advance(1)
+
+    def extend(self, klines: pd.DataFrame) -> None:
+        """
+        Appends the TOHLCV klines. Only the last `capacity` klines are kept.
+        An empty batch, e.g. of a feed without new klines, is ignored.
+        """
+        if len(klines) == 0:
+            return
+        sanity.check_tohlcv(klines, only_numbers=True)
+        time = utils.get_time(klines)
+        self._check_time(int(time[0]))
+        self._check_is_sorted(time)
+
+        # Klines which would be overwritten within this call are skipped.
+        n_skipped = max(0, len(klines) - self.capacity)
+        prices = klines[_PRICE_COLS].to_numpy(dtype=np.float64)[n_skipped:].T
+        positions = (self._next_position() + n_skipped + np.arange(prices.shape[1])) % (
+            self.capacity
+        )
+        for offset in (positions, positions + self.capacity):
+            self._time[offset] = time[n_skipped:]
+            self._prices[:, offset] = prices
+        self._advance(len(klines))
+
+    def _next_position(self) -> int:
+        return (self._start + self._len) % self.capacity
+
+    def _advance(self, n_klines: int) -> None:
+        n_overwritten = max(0, self._len + n_klines - self.capacity)
+        self._start = (self._start + n_overwritten) % self.capacity
+        self._len = min(self.capacity, self._len + n_klines)
+        self._n_appended += n_klines
+
+    def _check_time(self, time: int) -> None:
+        if self._len > 0 and time < self._time[self._start + self._len - 1]:
+            raise ValueError(
+                f"The klines must be appended in chronological order but {time} is before the last TIME."
+            )
+
+    def _check_is_sorted(self, time: np.ndarray) -> None:
+        if not np.all(time[1:] >= time[:-1]):
+            raise ValueError("The TIME column must be sorted.")
+
+    def get_col(self, name: str) -> np.ndarray:
+        """
+        Returns a read only, contiguous view of the column in chronological order.
+        The view is only valid until the next append.
+        """
+        window = slice(self._start, self._start + self._len)
+        if name == "TIME":
+            view = self._time[window]
+        elif name in _PRICE_COLS:
+            view = self._prices[_PRICE_COLS.index(name), window]
+        else:
+            raise ValueError(
+                f"Unknown column: {name}. Use one of {['TIME'] + _PRICE_COLS}."
+            )
+        view = view.view()
+        view.flags.writeable = False
+        return view
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Wraps the views of the columns in a DataFrame without copying them.
+        The index counts all klines ever appended, so the rows of consecutive frames line up.
+        Like the views the frame is only valid until the next append.
+        Therefore it isn't marked as validated, as the next append may reorder its rows.
+        """
+        cols: Dict[str, np.ndarray] = {
+            name: self.get_col(name) for name in ["TIME"] + _PRICE_COLS
+        }
+        index = pd.RangeIndex(self._n_appended - self._len, self._n_appended)
+        return pd.DataFrame(cols, index=index, copy=False)
@@ -0,0 +1,200 @@
+"""
+Asyncio based live kline feeds.
+
+A feed reads the klines in a background task into a bounded queue.
+If the consumer is slower than the feed, the queue fills up and the reading pauses,
+so the backpressure reaches the source instead of buffering without limit.
+Lost connections are reestablished and resumed after the last received TIME.
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["KlineFeed", "SocketKlineFeed"]
+
+# Returns False to stop reconnecting. Called with the number of the attempt and the error.
+ReconnectHook = Callable[[int, Exception], Awaitable[bool]]
+
+_END = None
+
+
+class KlineFeed(ABC):
+    def __init__(
+        self,
+        max_queue_size: int = 1024,
+        max_batch_size: int = 1024,
+        max_reconnects: int = 5,
+        reconnect_delay: float = 1.0,
+        on_reconnect: Optional[ReconnectHook] = None,
+    ) -> None:
+        """
+        The feed is consumed with `async for klines in feed`, where every `klines` is a TOHLCV DataFrame
+        with all klines that arrived since the previous iteration, but at most `max_batch_size`.
+        `on_reconnect` is awaited before every reconnect and can cancel it by returning False.
+        """
+        if max_queue_size < 1 or max_batch_size < 1:
+            raise ValueError("The queue size and the batch size must be at least 1.")
+        self._max_queue_size = max_queue_size
+        self._max_batch_size = max_batch_size
+        self._max_reconnects = max_reconnects
+        self._reconnect_delay = reconnect_delay
+        self._on_reconnect = on_reconnect
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[Exception] = None
+        self._columns: List[str] = []
+        self.last_time: Optional[int] = None
+        self.n_reconnects = 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            raise RuntimeError("The feed is already running.")
+        self._queue = asyncio.Queue(self._max_queue_size)
+        self._task = asyncio.create_task(self._produce())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def __aenter__(self) -> "KlineFeed":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    async def _produce(self) -> None:
+        try:
+            await self._produce_with_reconnects()
+        except Exception as e:
+            self._error = e
+        finally:
+            # The consumer must not hang, even if the feed is cancelled.
+            self._put_end()
+
+    async def _produce_with_reconnects(self) -> None:
+        assert self._queue is not None
+        attempt = 0
+        while True:
+            try:
+                async for kline in self._stream(self.last_time):
+                    await self._queue.put(kline)
+                    self.last_time = int(kline[0])
+                    attempt = 0
+                return
+            except (OSError, asyncio.IncompleteReadError) as e:
+                attempt += 1
+                if not await self._should_reconnect(attempt, e):
+                    raise
+                self.n_reconnects += 1
+                await asyncio.sleep(self._reconnect_delay)
+
+    def _put_end(self) -> None:
+        assert self._queue is not None
+        try:
+            self._queue.put_nowait(_END)
+        except asyncio.QueueFull:
+            # The end is queued after the klines the consumer has not read yet.
+            asyncio.get_running_loop().create_task(self._queue.put(_END))
+
+    async def _should_reconnect(self, attempt: int, error: Exception) -> bool:
+        if attempt > self._max_reconnects:
+            return False
+        if self._on_reconnect is not None:
+            return await self._on_reconnect(attempt, error)
+        return True
+
+    def __aiter__(self) -> AsyncIterator[pd.DataFrame]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[pd.DataFrame]:
+        if self._queue is None:
+            raise RuntimeError("The feed must be started before it can be consumed.")
+
+        is_end = False
+        while not is_end:
+            batch = [await self._queue.get()]
+            while len(batch) < self._max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            if batch[-1] is _END:
+                batch.pop()
+                is_end = True
+            if batch:
+                yield self._to_frame(batch)
+
+        if self._error is not None:
+            raise RuntimeError(
+                f"Something went wrong while reading the feed after {self.n_reconnects} reconnects."
+            ) from self._error
+
+    def _to_frame(self, batch: List[Sequence[float]]) -> pd.DataFrame:
+        values = np.array(batch, dtype="float64")
+        klines = pd.DataFrame(values, columns=self._columns)
+        return klines.astype({"TIME": "int64"})
+
+    @abstractmethod
+    def _stream(self, since: Optional[int]) -> AsyncIterator[Sequence[float]]:
+        """
+        Yields the klines after the TIME `since` (all if None) as rows in the order of `self._columns`.
+        The TIME must be the first column. Connection errors are raised as OSError.
+        """
+        pass
+
+
+class SocketKlineFeed(KlineFeed):
+    def __init__(self, host: str, port: int, **kwargs) -> None:
+        """
+        Reads klines from a TCP socket, e.g. of the ReplayServer.
+        After connecting a JSON line with the `since` TIME is sent, then the server responds with a CSV header
+        followed by one CSV line per kline and an empty line at the end of the stream.
+        A connection closed without the empty line is reconnected. The keyword arguments are passed on to KlineFeed.
+        """
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+
+    async def _stream(self, since: Optional[int]) -> AsyncIterator[Sequence[float]]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(json.dumps({"since": since}).encode() + b"\n")
+            await writer.drain()
+
+            header = await reader.readline()
+            if not header.endswith(b"\n"):
+                raise ConnectionError("The connection was closed before the header.")
+            self._columns = self._parse_header(header)
+
+            while True:
+                line = await reader.readline()
+                if line == b"\n":
+                    return
+                if not line.endswith(b"\n"):
+                    raise ConnectionError("The connection was closed unexpectedly.")
+                yield [float(value) for value in line.split(b",")]
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    def _parse_header(self, header: bytes) -> List[str]:
+        columns = header.decode().strip().split(",")
+        if columns[0] != "TIME":
+            raise ValueError(
+                f"The first column must be TIME but the header is: {columns}."
+            )
+        return columns
@@ -0,0 +1,124 @@
+"""
+A local stand-in for a live exchange feed, which replays kline CSVs over a TCP socket.
+
+It speaks the protocol of SocketKlineFeed, so the whole path from the socket to the signals
+can be tested and load-tested without network access.
+"""
+
+import asyncio
+import json
+from typing import List, Optional, Set
+
+import numpy as np
+
+from py_trading_lib.data_handler.historic_data import LocalKlines
+
+__all__ = ["ReplayServer"]
+
+
+class ReplayServer:
+    # Without pacing the lines are written in chunks to save system calls.
+    _CHUNK_SIZE = 512
+
+    def __init__(
+        self,
+        path: str,
+        speed: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        `speed` is the replay speed relative to the real time of the TIME column, e.g. 3600 replays 1h klines
+        once per second. None replays them as fast as possible, which is only limited by the backpressure of the client.
+        With `port` 0 a free port is chosen, see `port` after `start`.
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError(f"The speed must be positive but is {speed}.")
+        self._speed = speed
+        self._host = host
+        self.port = port
+
+        tohlcv = LocalKlines().get_tohlcv_from_csv(path)
+        self._header = (",".join(tohlcv.columns) + "\n").encode()
+        self._times = tohlcv["TIME"].to_numpy()
+        self._lines: List[bytes] = [
+            (line + "\n").encode()
+            for line in tohlcv.to_csv(header=False, index=False).splitlines()
+        ]
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_client, self._host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        self.disconnect_clients()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> "ReplayServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    def disconnect_clients(self) -> None:
+        """
+        Drops all connections without the end of stream marker, e.g. to test reconnects.
+        """
+        for writer in list(self._writers):
+            writer.transport.abort()
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._writers.add(writer)
+        try:
+            request = json.loads(await reader.readline() or b"{}")
+            start = self._get_start(request.get("since"))
+
+            writer.write(self._header)
+            if self._speed is None:
+                await self._write_unpaced(writer, start)
+            else:
+                await self._write_paced(writer, start)
+            writer.write(b"\n")
+            await writer.drain()
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _get_start(self, since: Optional[int]) -> int:
+        if since is None:
+            return 0
+        return int(np.searchsorted(self._times, since, side="right"))
+
+    async def _write_unpaced(self, writer: asyncio.StreamWriter, start: int) -> None:
+        for chunk_start in range(start, len(self._lines), self._CHUNK_SIZE):
+            writer.write(
+                b"".join(self._lines[chunk_start : chunk_start + self._CHUNK_SIZE])
+            )
+            await writer.drain()
+
+    async def _write_paced(self, writer: asyncio.StreamWriter, start: int) -> None:
+        assert self._speed is not None
+        loop = asyncio.get_running_loop()
+        replay_start = loop.time()
+        for position in range(start, len(self._lines)):
+            # The TIME is in ms.
+            due = (self._times[position] - self._times[start]) / 1000 / self._speed
+            delay = replay_start + due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            writer.write(self._lines[position])
+            await writer.drain()
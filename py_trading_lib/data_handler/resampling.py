@@ -0,0 +1,222 @@
+"""
+Resampling of TOHLCV klines into a higher timeframe.
+
+The klines are grouped into buckets of `interval` by their TIME (open time in ms), aligned to the unix epoch.
+The TIME of compact klines is converted back to absolute times, so the bars always have an int64 TIME.
+Every bucket becomes one bar with the TIME of the bucket start and
+OPEN=first, HIGH=max, LOW=min, CLOSE=last and VOLUME=sum.
+"""
+
+import re
+import weakref
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+__all__ = ["Resampler", "parse_interval"]
+
+_UNIT_MS = {
+    "s": 1_000,
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+}
+
+_TOHLCV = ["TIME", "OPEN", "HIGH", "LOW", "CLOSE", "VOLUME"]
+
+
+def parse_interval(interval: str) -> int:
+    """
+    Returns the length of an interval like "15m", "4h" or "1d" in milliseconds.
+    """
+    match = re.fullmatch(r"(\d+)([smhdw])", interval)
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(
+            f"Invalid interval: {interval}. Use a positive number followed by one of {list(_UNIT_MS)}, e.g. '4h'."
+        )
+    return int(match.group(1)) * _UNIT_MS[match.group(2)]
+
+
+class Resampler:
+    def __init__(self, interval: str, base_interval: Optional[str] = None) -> None:
+        """
+        `base_interval` is the interval of the klines which are resampled.
+        Without it a bar is only complete once a kline of a later bucket exists.
+        With it the bar is already complete at the last kline of its bucket.
+        """
+        self.interval = interval
+        self.base_interval = base_interval
+        self._interval_ms = parse_interval(interval)
+        self._base_interval_ms = (
+            0 if base_interval is None else parse_interval(base_interval)
+        )
+        self._check_intervals()
+
+        self._cached_tohlcv: Optional[weakref.ref] = None
+        self._cached_bars = pd.DataFrame()
+        self._is_update_initialised = False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        The cached bars are dropped when pickled, e.g. with an Analysis sent to worker processes.
+        """
+        state = self.__dict__.copy()
+        state["_cached_tohlcv"] = None
+        state["_cached_bars"] = pd.DataFrame()
+        return state
+
+    def _check_intervals(self) -> None:
+        if self._base_interval_ms == 0:
+            return
+        if self._interval_ms % self._base_interval_ms != 0:
+            raise ValueError(
+                f"The interval: {self.interval} must be a multiple of the base interval: {self.base_interval}."
+            )
+
+    def get_ratio(self) -> Optional[int]:
+        """
+        Returns the number of base klines per bar or None if the base interval is unknown.
+        """
+        if self._base_interval_ms == 0:
+            return None
+        return self._interval_ms // self._base_interval_ms
+
+    def resample(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns all bars including the possibly still incomplete last one.
+        The bars of the last resampled DataFrame are cached, so several indicators which share the resampler
+        resample the klines only once. Like the validation marker the cache assumes that the DataFrame
+        is not changed in place.
+        """
+        if self._cached_tohlcv is not None and self._cached_tohlcv() is tohlcv:
+            return self._cached_bars
+
+        sanity.check_tohlcv(tohlcv)
+        time = utils.get_time(tohlcv)
+        self._check_is_sorted(time)
+        self._cached_bars = self._resample(tohlcv, time)
+        self._cached_tohlcv = weakref.ref(tohlcv)
+        return self._cached_bars
+
+    def _check_is_sorted(self, time: np.ndarray) -> None:
+        if len(time) > 1 and not np.all(time[1:] >= time[:-1]):
+            raise ValueError("The TIME column must be sorted to resample.")
+
+    def _resample(self, tohlcv: pd.DataFrame, time: np.ndarray) -> pd.DataFrame:
+        buckets = time - time % self._interval_ms
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(time)]
+
+        def col(name: str) -> np.ndarray:
+            return tohlcv[name].to_numpy(dtype="float64")
+
+        bars = {
+            "TIME": buckets[starts],
+            "OPEN": col("OPEN")[starts],
+            "HIGH": np.maximum.reduceat(col("HIGH"), starts),
+            "LOW": np.minimum.reduceat(col("LOW"), starts),
+            "CLOSE": col("CLOSE")[ends - 1],
+            "VOLUME": np.add.reduceat(col("VOLUME"), starts),
+        }
+        return pd.DataFrame(bars)
+
+    def get_available_times(self, bar_times: np.ndarray) -> np.ndarray:
+        """
+        Returns for every bar the first base TIME at which the bar is complete.
+        """
+        return bar_times + (self._interval_ms - self._base_interval_ms)
+
+    def align(
+        self, bar_times: np.ndarray, values: pd.DataFrame, base_time: np.ndarray
+    ) -> np.ndarray:
+        """
+        Aligns the values of the bars onto the base klines without lookahead.
+        Every base kline gets the values of the last bar which is complete at its TIME and NaN if there is none.
+        """
+        if len(bar_times) == 0:
+            return np.full((len(base_time), values.shape[1]), np.nan)
+        positions = (
+            np.searchsorted(self.get_available_times(bar_times), base_time, "right") - 1
+        )
+        bar_values = values.to_numpy(dtype="float64", na_value=np.nan)
+        aligned = bar_values[np.maximum(positions, 0)]
+        aligned[positions < 0] = np.nan
+        return aligned
+
+    def init_update(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
+        """
+        Resamples the known klines and keeps the last bar open for `update`.
+        Returns the bars which are already complete.
+        """
+        bars = self._resample_for_update(tohlcv)
+        self._closed_bars: List[pd.DataFrame] = [bars.iloc[:-1]]
+        self._open_bar = bars.iloc[-1:]
+        self._last_time = int(utils.get_time(tohlcv)[-1])
+        self._is_open_bar_complete = self._is_complete(self._open_bar)
+        self._is_update_initialised = True
+
+        if self._is_open_bar_complete:
+            return bars
+        return bars.iloc[:-1]
+
+    def _resample_for_update(self, tohlcv: pd.DataFrame) -> pd.DataFrame:
+        sanity.check_tohlcv(tohlcv)
+        time = utils.get_time(tohlcv)
+        self._check_is_sorted(time)
+        return self._resample(tohlcv, time)
+
+    def _is_complete(self, bar: pd.DataFrame) -> bool:
+        available = self.get_available_times(bar["TIME"].to_numpy())
+        return bool(available[0] <= self._last_time)
+
+    def update(self, klines: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merges the appended klines into the open bar and appends the bars of new buckets.
+        Only the open bar is recalculated, the complete bars are never touched again.
+        Returns the bars which got complete by the klines, each bar is returned exactly once.
+        """
+        self._check_update_initialised()
+        sanity.check_tohlcv(klines)
+        time = utils.get_time(klines)
+        self._check_is_sorted(np.r_[self._last_time, time])
+
+        # The aggregations are associative, so the open bar can be resampled like a kline.
+        merged = pd.concat([self._open_bar, klines[_TOHLCV]], ignore_index=True)
+        merged = self._resample(merged, np.r_[self._open_bar["TIME"].to_numpy(), time])
+        self._last_time = int(time[-1])
+
+        # The first merged bar is the previous open bar, which may already have been returned.
+        first_new = 1 if self._is_open_bar_complete else 0
+        complete = [merged.iloc[first_new:-1]]
+        if len(merged) > 1:
+            self._closed_bars.append(merged.iloc[:-1])
+            self._is_open_bar_complete = False
+        self._open_bar = merged.iloc[-1:]
+
+        if not self._is_open_bar_complete and self._is_complete(self._open_bar):
+            self._is_open_bar_complete = True
+            complete.append(self._open_bar)
+        return pd.concat(complete, ignore_index=True)
+
+    def get_bars(self) -> pd.DataFrame:
+        """
+        Returns all bars of the incremental updates including the open one.
+        """
+        self._check_update_initialised()
+        if len(self._closed_bars) > 1:
+            self._closed_bars = [pd.concat(self._closed_bars, ignore_index=True)]
+        return pd.concat(self._closed_bars + [self._open_bar], ignore_index=True)
+
+    def _check_update_initialised(self) -> None:
+        if not self._is_update_initialised:
+            raise RuntimeError(
+                f"The resampler: {self.interval} must be initialised with init_update before it can be updated."
+            )
+
+    def get_params(self) -> Dict[str, Optional[str]]:
+        return {"interval": self.interval, "base_interval": self.base_interval}
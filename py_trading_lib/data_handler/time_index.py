@@ -0,0 +1,130 @@
+"""
+Checks and repairs of the TIME grid of TOHLCV klines.
+
+Klines of one interval should have a TIME every `interval` ms. Missing klines (gaps),
+repeated TIMEs (duplicates) and TIMEs off the grid (misaligned) are found with one vectorized pass
+over the differences of the TIME column.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.data_handler.resampling import parse_interval
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+__all__ = ["KlineGaps", "find_gaps", "fill_gaps", "set_time_index"]
+
+TIME_INDEX_NAME = "DATE"
+
+
+class KlineGaps(NamedTuple):
+    gaps: pd.DataFrame
+    """One row per gap with the TIME before and after it and the number of missing klines."""
+    duplicates: np.ndarray
+    """The TIMEs which occur more than once."""
+    misaligned: np.ndarray
+    """The TIMEs whose distance to the previous TIME is not a multiple of the interval."""
+
+    def is_regular(self) -> bool:
+        return (
+            len(self.gaps) == 0
+            and len(self.duplicates) == 0
+            and len(self.misaligned) == 0
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{int(self.gaps['N_MISSING'].sum())} missing klines in {len(self.gaps)} gaps, "
+            f"{len(self.duplicates)} duplicate and {len(self.misaligned)} misaligned TIMEs"
+        )
+
+
+def find_gaps(tohlcv: pd.DataFrame, interval: str) -> KlineGaps:
+    """
+    Finds the gaps, duplicates and misaligned TIMEs of klines of the `interval`, e.g. "1h".
+    The TIME must be sorted.
+    """
+    interval_ms = parse_interval(interval)
+    time = utils.get_time(tohlcv).astype(np.int64, copy=False)
+    diff = np.diff(time)
+    if np.any(diff < 0):
+        raise ValueError("The TIME column must be sorted to find gaps.")
+
+    is_gap = diff > interval_ms
+    n_missing = diff[is_gap] // interval_ms - 1
+    gaps = pd.DataFrame(
+        {
+            "TIME_BEFORE": time[:-1][is_gap],
+            "TIME_AFTER": time[1:][is_gap],
+            "N_MISSING": n_missing,
+        }
+    )
+    duplicates = np.unique(time[1:][diff == 0])
+    misaligned = time[1:][diff % interval_ms != 0]
+    return KlineGaps(gaps, duplicates, misaligned)
+
+
+def fill_gaps(tohlcv: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Returns the klines with one kline every `interval`. Duplicates are dropped, of which the first kline is kept.
+    Missing klines are forward-filled with the previous CLOSE as OPEN, HIGH, LOW and CLOSE and a VOLUME of 0.
+    Misaligned TIMEs can't be repaired and raise a ValueError.
+    The result has a RangeIndex and the dtypes of the klines.
+    """
+    kline_gaps = find_gaps(tohlcv, interval)
+    if len(kline_gaps.misaligned):
+        raise ValueError(
+            f"The TIMEs: {kline_gaps.misaligned[:5].tolist()} are not on the grid of the interval: {interval}."
+        )
+
+    interval_ms = parse_interval(interval)
+    time = utils.get_time(tohlcv).astype(np.int64, copy=False)
+    positions = (time - time[0]) // interval_ms if len(time) else time
+    is_first = np.ones(len(time), dtype=bool)
+    is_first[1:] = positions[1:] != positions[:-1]
+    positions = positions[is_first]
+    n_klines = int(positions[-1]) + 1 if len(positions) else 0
+
+    # The row of the kline at or before every position of the grid.
+    source = np.zeros(n_klines, dtype=np.int64)
+    source[positions] = np.arange(len(positions))
+    np.maximum.accumulate(source, out=source)
+    is_filled = np.ones(n_klines, dtype=bool)
+    is_filled[positions] = False
+
+    unique = tohlcv[is_first]
+    filled = {}
+    for name, col in unique.items():
+        values = col.to_numpy()[source]
+        if name in ("OPEN", "HIGH", "LOW"):
+            values[is_filled] = unique["CLOSE"].to_numpy()[source[is_filled]]
+        elif name == "VOLUME":
+            values[is_filled] = 0
+        filled[name] = values
+
+    grid = time[0] + np.arange(n_klines) * interval_ms if n_klines else time
+    if utils.is_compact(tohlcv):
+        grid = (grid - tohlcv.attrs[utils.TIME_BASE]) // tohlcv.attrs[utils.TIME_UNIT]
+    filled["TIME"] = grid.astype(tohlcv["TIME"].dtype)
+
+    repaired = pd.DataFrame(filled, columns=tohlcv.columns)
+    repaired.attrs = dict(tohlcv.attrs)
+    if sanity.is_validated(tohlcv):
+        sanity.mark_validated(repaired)
+    return repaired
+
+
+def set_time_index(tohlcv: pd.DataFrame) -> None:
+    """
+    Replaces the index in place with a sorted UTC DatetimeIndex of the TIME, which is kept as column too.
+    Time windows like `tohlcv.loc["2023-01-01":"2023-01-31"]` are then found by a binary search
+    instead of a boolean mask over the TIME column.
+    """
+    time = utils.get_time(tohlcv)
+    index = pd.DatetimeIndex(pd.to_datetime(time, unit="ms", utc=True))
+    if not index.is_monotonic_increasing:
+        raise ValueError("The TIME column must be sorted for a time index.")
+    tohlcv.index = index.rename(TIME_INDEX_NAME)
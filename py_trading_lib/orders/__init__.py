@@ -1,3 +1,3 @@
-from .orders import OrderGenerator
+from .orders import OrderGenerator, CompactOrders, ORDER_CODES
 
-__all__ = ["OrderGenerator"]
+__all__ = ["OrderGenerator", "CompactOrders", "ORDER_CODES"]
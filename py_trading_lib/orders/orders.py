@@ -1,9 +1,20 @@
 from abc import ABC
 from copy import deepcopy
+from typing import Dict, Hashable, Iterator, List, Optional, Type, Union
 
+import numpy as np
 import pandas as pd
 
-__all__ = ["Order", "OrderLongOpen", "OrderLongClose", "OrderGenerator"]
+from py_trading_lib.utils.packed_bits import PackedBits
+
+__all__ = [
+    "Order",
+    "OrderLongOpen",
+    "OrderLongClose",
+    "ORDER_CODES",
+    "CompactOrders",
+    "OrderGenerator",
+]
 
 
 class Order(ABC):
@@ -18,17 +29,100 @@ class OrderLongClose(Order):
     pass
 
 
+# The integer codes of the order types used by CompactOrders. 0 means no order.
+ORDER_CODES: Dict[Type[Order], int] = {
+    OrderLongOpen: 1,
+    OrderLongClose: 2,
+}
+
+
+class CompactOrders:
+    """
+    A compact representation of the orders generated from a signal.
+
+    Instead of one Order object per signal it only holds the integer positions of the signals
+    and the code of their order type (see ORDER_CODES).
+    The Order objects are only created when they are requested with `to_orders` or `to_series`.
+    """
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        codes: np.ndarray,
+        index: pd.Index,
+        templates: Dict[int, Order],
+        name: Hashable = None,
+    ) -> None:
+        self.positions = positions
+        self.codes = codes
+        self.index = index
+        self._templates = templates
+        self._name = name
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __iter__(self) -> Iterator[Order]:
+        for code in self.codes:
+            yield deepcopy(self._templates[int(code)])
+
+    def get_codes(self) -> np.ndarray:
+        """
+        Returns the order code of every row of the signal, where rows without an order have the code 0.
+        """
+        codes = np.zeros(len(self.index), dtype=np.int8)
+        codes[self.positions] = self.codes
+        return codes
+
+    def to_orders(self) -> List[Order]:
+        """
+        Every returned Order is a separate copy.
+        """
+        return list(self)
+
+    def to_series(self) -> pd.Series:
+        """
+        Returns the orders in the format of `OrderGenerator.generate`.
+        """
+        return _to_order_series(
+            self.positions, self.to_orders(), self.index, self._name
+        )
+
+
 class OrderGenerator:
     def __init__(
         self,
-        signal: pd.Series,
+        signal: Union[pd.Series, PackedBits],
         order: Order,
+        index: Optional[pd.Index] = None,
     ) -> None:
+        """
+        A PackedBits signal is used without unpacking it.
+        Its orders get the given `index` or a RangeIndex if there is none.
+        """
         self._signal = signal
         self._order = order
+        self._index = self._get_index(signal, index)
+
+    def _get_index(
+        self, signal: Union[pd.Series, PackedBits], index: Optional[pd.Index]
+    ) -> pd.Index:
+        if isinstance(signal, pd.Series):
+            return signal.index
+        if index is None:
+            return pd.RangeIndex(len(signal))
+        if len(index) != len(signal):
+            raise ValueError(
+                f"The length of the index: {len(index)} doesn't match the length of the signal: {len(signal)}."
+            )
+        return index
 
     def generate(self) -> pd.Series:
-        positions = self._signal.apply(lambda x: deepcopy(self._order) if x else None)
+        signal_positions = self._get_signal_positions()
+        orders = [deepcopy(self._order) for _ in signal_positions]
+        positions = _to_order_series(
+            signal_positions, orders, self._index, self._signal.name
+        )
 
         if isinstance(positions, pd.Series):
             return positions
@@ -36,3 +130,40 @@ class OrderGenerator:
             raise TypeError(
                 "Something went wrong during the calculation of the positions."
             )
+
+    def generate_compact(self) -> CompactOrders:
+        """
+        Vectorized alternative to `generate`, which doesn't create an Order per signal.
+        """
+        code = self._get_order_code()
+        positions = self._get_signal_positions()
+        codes = np.full(len(positions), code, dtype=np.int8)
+        return CompactOrders(
+            positions,
+            codes,
+            self._index,
+            {code: self._order},
+            self._signal.name,
+        )
+
+    def _get_signal_positions(self) -> np.ndarray:
+        if isinstance(self._signal, PackedBits):
+            return self._signal.positions()
+        # Every truthy value is a signal, including NaN.
+        return np.flatnonzero(self._signal.to_numpy(dtype=bool))
+
+    def _get_order_code(self) -> int:
+        order_type = type(self._order)
+        if order_type not in ORDER_CODES:
+            raise TypeError(
+                f"The order type: {order_type.__name__} has no order code. Known types: {[t.__name__ for t in ORDER_CODES]}."
+            )
+        return ORDER_CODES[order_type]
+
+
+def _to_order_series(
+    positions: np.ndarray, orders: List[Order], index: pd.Index, name: Hashable
+) -> pd.Series:
+    values = np.full(len(index), None, dtype=object)
+    values[positions] = orders
+    return pd.Series(values, index=index, name=name, dtype=object)
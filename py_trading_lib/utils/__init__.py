@@ -1,9 +1,16 @@
 from .sanity_checks import *
 from .utils import *
+from .profiling import *
+from .packed_bits import *
 
 
 __all__ = [
     # sanity_checks
+    "set_validation_level",
+    "get_validation_level",
+    "mark_validated",
+    "is_validated",
+    "check_frame",
     "check_cols_for_tohlcv",
     "check_is_list1_in_list2",
     "check_has_min_len",
@@ -16,4 +23,15 @@ __all__ = [
     # utils
     "convert_to_df_from_sr_or_df",
     "is_series_or_dataframe",
+    "get_fingerprint",
+    "to_compact",
+    "is_compact",
+    "get_time",
+    # profiling
+    "Profiler",
+    "ProfileReport",
+    "StageStats",
+    "ProfileEvent",
+    # packed_bits
+    "PackedBits",
 ]
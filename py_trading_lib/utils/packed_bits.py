@@ -0,0 +1,131 @@
+"""
+A bit-packed boolean array for condition results and signals.
+
+Every row needs one bit instead of one byte. The bits are stored in 64 bit words,
+so combining conditions with AND and OR works on 64 rows per operation.
+"""
+
+from typing import Hashable, Iterable, List
+
+import numpy as np
+
+__all__ = ["PackedBits"]
+
+_WORD_BITS = 64
+
+# np.bitwise_count only exists since NumPy 2.0.
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class PackedBits:
+    def __init__(self, words: np.ndarray, n_bits: int, name: Hashable = None) -> None:
+        """
+        Use `from_bools` to pack a boolean array.
+        Bit i of the packed bytes (little bit order) is row i. The bits after `n_bits` are always 0.
+        """
+        if words.dtype != np.uint64:
+            raise TypeError(f"The words must be of dtype uint64 but are {words.dtype}.")
+        if len(words) != _calc_n_words(n_bits):
+            raise ValueError(
+                f"{len(words)} words don't match the number of bits: {n_bits}."
+            )
+        self.words = words
+        self.n_bits = n_bits
+        self.name = name
+
+    @classmethod
+    def from_bools(cls, values: np.ndarray, name: Hashable = None) -> "PackedBits":
+        values = np.asarray(values, dtype=bool)
+        n_bits = len(values)
+        packed = np.zeros(_calc_n_words(n_bits) * 8, dtype=np.uint8)
+        packed[: -(-n_bits // 8)] = np.packbits(values, bitorder="little")
+        return cls(packed.view(np.uint64), n_bits, name)
+
+    @classmethod
+    def zeros(cls, n_bits: int, name: Hashable = None) -> "PackedBits":
+        return cls(np.zeros(_calc_n_words(n_bits), dtype=np.uint64), n_bits, name)
+
+    @classmethod
+    def all_of(cls, bits: Iterable["PackedBits"]) -> "PackedBits":
+        return cls._reduce(np.bitwise_and, bits)
+
+    @classmethod
+    def any_of(cls, bits: Iterable["PackedBits"]) -> "PackedBits":
+        return cls._reduce(np.bitwise_or, bits)
+
+    @classmethod
+    def _reduce(cls, func: np.ufunc, bits: Iterable["PackedBits"]) -> "PackedBits":
+        first, *rest = _check_not_empty(list(bits))
+        words = first.words.copy()
+        for other in rest:
+            first._check_same_len(other)
+            func(words, other.words, out=words)
+        return cls(words, first.n_bits)
+
+    def __len__(self) -> int:
+        return self.n_bits
+
+    def __and__(self, other: "PackedBits") -> "PackedBits":
+        return PackedBits.all_of([self, other])
+
+    def __or__(self, other: "PackedBits") -> "PackedBits":
+        return PackedBits.any_of([self, other])
+
+    def __invert__(self) -> "PackedBits":
+        inverted = PackedBits(np.invert(self.words), self.n_bits)
+        inverted._clear_padding()
+        return inverted
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackedBits):
+            return NotImplemented
+        return self.n_bits == other.n_bits and np.array_equal(self.words, other.words)
+
+    def _check_same_len(self, other: "PackedBits") -> None:
+        if self.n_bits != other.n_bits:
+            raise ValueError(
+                f"The number of bits must be equal but is {self.n_bits} and {other.n_bits}."
+            )
+
+    def _clear_padding(self) -> None:
+        n_used = self.n_bits % _WORD_BITS
+        if n_used > 0:
+            last_word = self.words[-1:].view(np.uint8)
+            last_word &= np.packbits(np.arange(_WORD_BITS) < n_used, bitorder="little")
+
+    def to_bools(self) -> np.ndarray:
+        bools = np.unpackbits(self.words.view(np.uint8), bitorder="little")
+        return bools[: self.n_bits].view(bool)
+
+    def count(self) -> int:
+        """
+        Returns the number of set bits (popcount).
+        """
+        if hasattr(np, "bitwise_count"):
+            return int(np.bitwise_count(self.words).sum(dtype=np.int64))
+        return int(_BYTE_POPCOUNT[self.words.view(np.uint8)].sum(dtype=np.int64))
+
+    def positions(self) -> np.ndarray:
+        """
+        Returns the sorted positions of the set bits like `np.flatnonzero` on the unpacked bools.
+        Only the words which contain a set bit are unpacked, so sparse signals are cheap.
+        """
+        word_positions = np.flatnonzero(self.words)
+        bits = np.unpackbits(
+            self.words[word_positions].view(np.uint8), bitorder="little"
+        ).reshape(-1, _WORD_BITS)
+        rows, cols = np.nonzero(bits)
+        return word_positions[rows].astype(np.intp) * _WORD_BITS + cols
+
+    def get_nbytes(self) -> int:
+        return self.words.nbytes
+
+
+def _calc_n_words(n_bits: int) -> int:
+    return -(-n_bits // _WORD_BITS)
+
+
+def _check_not_empty(bits: List[PackedBits]) -> List[PackedBits]:
+    if len(bits) == 0:
+        raise ValueError("There must be at least one PackedBits to be combined.")
+    return bits
@@ -0,0 +1,185 @@
+"""
+Opt-in instrumentation of the analysis stages.
+
+The library wraps its stages in `record`. Without an active Profiler `record` only costs one ContextVar lookup.
+"""
+
+import contextlib
+import time
+import tracemalloc
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+__all__ = ["Profiler", "ProfileReport", "StageStats", "ProfileEvent"]
+
+
+class ProfileEvent(NamedTuple):
+    """
+    Passed to the hook of the Profiler whenever a stage has finished.
+    `allocated_bytes` is the peak of the memory allocated during the stage or None if memory isn't tracked.
+    """
+
+    stage: str
+    name: str
+    seconds: float
+    allocated_bytes: Optional[int]
+
+
+class StageStats(NamedTuple):
+    """
+    `allocated_bytes` is the largest peak of the memory allocated during a single call or None if memory isn't tracked.
+    """
+
+    calls: int
+    seconds: float
+    allocated_bytes: Optional[int]
+
+
+class ProfileReport:
+    """
+    The accumulated stats per stage and name. The stages nest,
+    e.g. the "sanity_checks" of an indicator are also part of its "indicator" stage.
+    """
+
+    def __init__(self, stats: Dict[Tuple[str, str], StageStats]) -> None:
+        self.stats = stats
+
+    def get(self, stage: str, name: str) -> StageStats:
+        return self.stats[(stage, name)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns one row per stage and name, sorted by the total time.
+        """
+        rows = [(stage, name, *stats) for (stage, name), stats in self.stats.items()]
+        frame = pd.DataFrame(
+            rows, columns=["STAGE", "NAME", "CALLS", "SECONDS", "ALLOCATED_BYTES"]
+        )
+        return frame.sort_values("SECONDS", ascending=False, ignore_index=True)
+
+
+class Profiler:
+    def __init__(
+        self,
+        track_memory: bool = False,
+        hook: Optional[Callable[[ProfileEvent], None]] = None,
+    ) -> None:
+        """
+        Records the wall time and the call count of every stage which runs inside the `with` block.
+        With `track_memory` the allocated memory is traced with tracemalloc, which slows the stages down considerably.
+        The `hook` is called with a ProfileEvent after every stage.
+
+        The Profiler is bound to the current context, so stages running in other threads or processes are not recorded.
+        """
+        self._track_memory = track_memory
+        self._hook = hook
+        self._calls: Dict[Tuple[str, str], int] = {}
+        self._seconds: Dict[Tuple[str, str], float] = {}
+        self._allocated_bytes: Dict[Tuple[str, str], int] = {}
+        # [memory at the start, highest peak seen] of every open stage
+        self._memory_stack: List[List[int]] = []
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> "Profiler":
+        if self._track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._token = _active_profiler.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _active_profiler.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def report(self) -> ProfileReport:
+        stats = {
+            key: StageStats(calls, self._seconds[key], self._allocated_bytes.get(key))
+            for key, calls in self._calls.items()
+        }
+        return ProfileReport(stats)
+
+    def _start_memory(self) -> None:
+        if not self._track_memory:
+            return
+        self._fold_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        self._memory_stack.append([current, current])
+
+    def _stop_memory(self) -> Optional[int]:
+        if not self._track_memory:
+            return None
+        self._fold_peak()
+        start, peak = self._memory_stack.pop()
+        return peak - start
+
+    def _fold_peak(self) -> None:
+        """
+        tracemalloc only has one peak, so it is folded into all open stages before it is reset.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        for memory in self._memory_stack:
+            memory[1] = max(memory[1], peak)
+        tracemalloc.reset_peak()
+
+    def _add(
+        self, stage: str, name: str, seconds: float, allocated_bytes: Optional[int]
+    ) -> None:
+        key = (stage, name)
+        self._calls[key] = self._calls.get(key, 0) + 1
+        self._seconds[key] = self._seconds.get(key, 0.0) + seconds
+        if allocated_bytes is not None:
+            self._allocated_bytes[key] = max(
+                self._allocated_bytes.get(key, 0), allocated_bytes
+            )
+
+        if self._hook is not None:
+            self._hook(ProfileEvent(stage, name, seconds, allocated_bytes))
+
+
+_active_profiler: ContextVar[Optional[Profiler]] = ContextVar(
+    "active_profiler", default=None
+)
+_NOT_RECORDING = contextlib.nullcontext()
+
+
+def record(
+    stage: str, name: Union[str, Callable[[], Union[str, List[str]]]]
+) -> contextlib.AbstractContextManager:
+    """
+    The name may be passed as a callable, e.g. `ti.get_names`, so that it is only built while profiling.
+    """
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return _NOT_RECORDING
+    return _Stage(profiler, stage, name)
+
+
+class _Stage:
+    def __init__(
+        self,
+        profiler: Profiler,
+        stage: str,
+        name: Union[str, Callable[[], Union[str, List[str]]]],
+    ) -> None:
+        self._profiler = profiler
+        self._stage = stage
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._profiler._start_memory()
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        seconds = time.perf_counter() - self._start
+        allocated_bytes = self._profiler._stop_memory()
+        self._profiler._add(self._stage, self._get_name(), seconds, allocated_bytes)
+
+    def _get_name(self) -> str:
+        name = self._name() if callable(self._name) else self._name
+        if isinstance(name, list):
+            return ",".join(name)
+        return name
@@ -1,9 +1,18 @@
 import os
-from typing import Any, List
+import weakref
+from typing import Any, Hashable, List, Literal, Optional, Tuple, TypeAlias
 
+import numpy as np
 import pandas as pd
 
+validation_levels: TypeAlias = Literal["full", "once", "off"]
+
 __all__ = [
+    "set_validation_level",
+    "get_validation_level",
+    "mark_validated",
+    "is_validated",
+    "check_frame",
     "check_cols_for_tohlcv",
     "check_is_list1_in_list2",
     "check_has_min_len",
@@ -16,10 +25,114 @@ __all__ = [
 ]
 
 
-def check_tohlcv(tohlcv: pd.DataFrame) -> None:
+# int32 and float32 are the dtypes of compact frames, see `utils.to_compact`.
+_NUMBER_DTYPES = [np.dtype(dtype) for dtype in ["int64", "float64", "int32", "float32"]]
+
+_validation_level: validation_levels = "full"
+# The frames which passed `check_tohlcv`, keyed by their id and signature.
+# The entries vanish together with their frames, so a reused id is never mistaken as validated.
+_validated_frames: "weakref.WeakValueDictionary[Tuple[Any, ...], pd.DataFrame]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def set_validation_level(level: validation_levels) -> None:
+    """
+    Sets how often `check_tohlcv` validates the same DataFrame:
+    - "full" (default): on every call, i.e. again in every layer.
+    - "once": only on the first call. Later calls are skipped as long as the shape, columns and dtypes are unchanged.
+      It trusts in-place mutations: e.g. a NaN written into a validated frame is not noticed.
+      Frames loaded from validated sources (e.g. the binary cache of `LocalKlines`) count as validated too.
+    - "off": never.
+    """
+    if level not in ("full", "once", "off"):
+        raise ValueError(
+            f"Invalid validation level: {level}. Use either 'full', 'once' or 'off'."
+        )
+
+    global _validation_level
+    _validation_level = level
+
+
+def get_validation_level() -> validation_levels:
+    return _validation_level
+
+
+def mark_validated(tohlcv: pd.DataFrame) -> None:
+    """
+    Marks the DataFrame as already validated by `check_tohlcv`, e.g. after it was loaded from a validated source.
+    """
+    _validated_frames[_get_validation_key(tohlcv)] = tohlcv
+
+
+def is_validated(tohlcv: pd.DataFrame) -> bool:
+    return _validated_frames.get(_get_validation_key(tohlcv)) is tohlcv
+
+
+def _get_validation_key(df: pd.DataFrame) -> Tuple[Any, ...]:
+    return (id(df), df.shape, tuple(df.columns), tuple(df.dtypes))
+
+
+def check_tohlcv(tohlcv: pd.DataFrame, only_numbers: bool = False) -> None:
+    """
+    Depending on the validation level the checks are skipped for already validated DataFrames.
+    """
+    if _validation_level == "off":
+        return
+    if _validation_level == "once" and is_validated(tohlcv):
+        return
+
     check_not_empty(tohlcv)
     check_cols_for_tohlcv(tohlcv)
-    check_has_no_nans(tohlcv)
+    check_frame(tohlcv, only_numbers=only_numbers)
+
+    if _validation_level == "once":
+        mark_validated(tohlcv)
+
+
+def check_frame(
+    df: pd.DataFrame,
+    cols: Optional[List[Hashable]] = None,
+    only_numbers: bool = False,
+    only_bools: bool = False,
+    allow_nans: bool = False,
+) -> None:
+    """
+    Checks the dtypes and the NaNs of the columns in one pass without copying the data.
+    `cols` restricts the checks to these columns. The dtypes are only checked with `only_numbers` or `only_bools`.
+    """
+    if cols is None:
+        positions = np.arange(df.shape[1])
+    else:
+        positions = np.flatnonzero(df.columns.isin(cols))
+
+    dtypes = df.dtypes.iloc[positions]
+    if only_numbers:
+        _check_dtypes(dtypes, _NUMBER_DTYPES)
+    if only_bools:
+        _check_dtypes(dtypes, [np.dtype("bool")])
+
+    if allow_nans:
+        return
+    for position in positions:
+        if _has_nans(df.iloc[:, position].to_numpy()):
+            raise ValueError("The DataFrame contains NaN or None values.")
+
+
+def _check_dtypes(dtypes: pd.Series, allowed: List[np.dtype]) -> None:
+    if not dtypes.isin(allowed).all():
+        raise TypeError(
+            f"The pandas DataFrame contains values other than {' or '.join(map(str, allowed))}."
+        )
+
+
+def _has_nans(values: np.ndarray) -> bool:
+    if values.dtype.kind in "iub":
+        return False
+    if values.dtype.kind == "f":
+        # The minimum is NaN if any value is NaN, without allocating a mask.
+        return len(values) > 0 and bool(np.isnan(values.min()))
+    return bool(pd.isna(values).any())
 
 
 def check_cols_for_tohlcv(tohlcv: pd.DataFrame) -> None:
@@ -68,39 +181,16 @@ def check_not_empty(df: pd.DataFrame) -> None:
 
 
 def check_has_no_nans(df: pd.DataFrame) -> None:
-    is_na_map = df.isna()
-    contains_na = is_na_map.any(axis=None)
-    if contains_na == True:
-        raise ValueError("The DataFrame contains NaN or None values.")
+    check_frame(df)
 
 
 def check_contains_only_bools(df: pd.DataFrame) -> None:
-    _check_contains_only_type(df, bool)
-
-
-def _check_contains_only_type(df: pd.DataFrame, type: Any) -> None:
-    column_types = df.dtypes
-    is_correct_type = column_types.eq(type)
-    all_correct_type = is_correct_type.all()
-
-    if not all_correct_type:
-        raise TypeError(f"The pandas DataFrame contains values other than {type}.")
+    check_frame(df, only_bools=True, allow_nans=True)
 
 
 def check_contains_only_numbers(df: pd.DataFrame) -> None:
-    column_types = df.dtypes
-    is_int64 = column_types == "int64"
-    is_float64 = column_types == "float64"
-    are_correct_types = is_int64 | is_float64
-
-    all_correct_type = are_correct_types.all()
-
-    if not all_correct_type:
-        raise TypeError(
-            f"The pandas DataFrame contains values other than int64 or float64."
-        )
-
-    check_has_no_nans(df)  # is needed because numpy.NaN is represented as float64
+    # The NaNs are checked too, because numpy.NaN is represented as float64.
+    check_frame(df, only_numbers=True)
 
 
 def check_file_exist(path: str):
@@ -1,12 +1,27 @@
+import hashlib
 from typing import Union, Any, List
 
+import numpy as np
 import pandas as pd
 
-__all__ = ["convert_to_df_from_sr_or_df", "is_series_or_dataframe"]
+__all__ = [
+    "convert_to_df_from_sr_or_df",
+    "is_series_or_dataframe",
+    "get_fingerprint",
+    "to_compact",
+    "is_compact",
+    "get_time",
+]
+
+# The attrs of a compact TOHLCV DataFrame, see `to_compact`.
+TIME_BASE = "TIME_BASE"
+TIME_UNIT = "TIME_UNIT"
+
+_INT32_MAX = np.iinfo(np.int32).max
 
 
 def convert_to_df_from_sr_or_df(
-    convert: Union[pd.DataFrame, pd.Series, Any]
+    convert: Union[pd.DataFrame, pd.Series, Any],
 ) -> pd.DataFrame:
     if is_series_or_dataframe(convert):
         return pd.DataFrame(convert)
@@ -24,3 +39,71 @@ def select_only_needed_cols(cols: List[str], df: pd.DataFrame) -> pd.DataFrame:
     selection = df[cols]
     selection = convert_to_df_from_sr_or_df(selection)
     return selection
+
+
+def get_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Returns a hash over the column names, dtypes, index and values of the DataFrame.
+    Equal DataFrames always have the same fingerprint.
+    """
+    fingerprint = hashlib.blake2b(digest_size=16)
+    fingerprint.update(repr(df.columns.tolist()).encode())
+    fingerprint.update(repr(df.dtypes.tolist()).encode())
+    # The TIME of compact frames is only unique together with its base.
+    fingerprint.update(repr(sorted(df.attrs.items())).encode())
+    _update_fingerprint(fingerprint, df.index)
+    for _, col in df.items():
+        _update_fingerprint(fingerprint, col)
+    return fingerprint.hexdigest()
+
+
+def _update_fingerprint(fingerprint: Any, values: Union[pd.Series, pd.Index]) -> None:
+    if isinstance(values, pd.RangeIndex):
+        fingerprint.update(repr((values.start, values.stop, values.step)).encode())
+        return
+
+    array = values.to_numpy()
+    if array.dtype == object:
+        array = pd.util.hash_array(array)
+    fingerprint.update(np.ascontiguousarray(array).data)
+
+
+def to_compact(tohlcv: pd.DataFrame) -> pd.DataFrame:
+    """
+    Halves the memory of the TOHLCV data. All columns except TIME are converted to float32.
+    The TIME is stored as int32 offsets from the first TIME. The base is kept in `attrs["TIME_BASE"]`
+    and the unit of the offsets in ms in `attrs["TIME_UNIT"]`. The unit is 1 s if all times are whole seconds,
+    which covers 68 years, and 1 ms otherwise, which covers 24 days.
+    Use `get_time` to get the absolute TIME of any TOHLCV DataFrame.
+    """
+    if is_compact(tohlcv):
+        return tohlcv
+
+    time = tohlcv["TIME"].to_numpy(dtype=np.int64)
+    base = int(time[0]) if len(time) else 0
+    offsets = time - base
+    unit = 1000 if not np.any(offsets % 1000) else 1
+    offsets //= unit
+    if len(offsets) and (offsets.min() < 0 or offsets.max() > _INT32_MAX):
+        raise ValueError(
+            f"The TIME range can't be represented as int32 offsets of {unit} ms. The TIME must be sorted."
+        )
+
+    compact = tohlcv.astype({col: "float32" for col in tohlcv.columns if col != "TIME"})
+    compact["TIME"] = offsets.astype(np.int32)
+    compact.attrs = {**tohlcv.attrs, TIME_BASE: base, TIME_UNIT: unit}
+    return compact
+
+
+def is_compact(tohlcv: pd.DataFrame) -> bool:
+    return TIME_BASE in tohlcv.attrs
+
+
+def get_time(tohlcv: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the absolute TIME in ms as int64, also for compact DataFrames.
+    """
+    time = tohlcv["TIME"].to_numpy()
+    if not is_compact(tohlcv):
+        return time
+    return tohlcv.attrs[TIME_BASE] + time.astype(np.int64) * tohlcv.attrs[TIME_UNIT]
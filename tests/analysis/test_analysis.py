@@ -1,8 +1,12 @@
+import pickle
+
 import pytest
 
 import pandas as pd
 
 from py_trading_lib.analysis import *
+from py_trading_lib.data_handler.resampling import Resampler
+from py_trading_lib.utils import is_compact, to_compact
 
 
 @pytest.fixture
@@ -82,6 +86,276 @@ class TestAnalysis:
 
         assert columns == expected_cols
 
+    def test_calculate_analysis_data_values(
+        self, example_analysis: Analysis, example_tohclv: pd.DataFrame
+    ):
+        expected = example_tohclv.copy()
+        expected["SMA_2"] = [None, 1, 5.5, 10]
+        expected["SMA_2>2"] = [False, False, True, True]
+        expected["CheckAllTrue=['SMA_2>2']"] = [False, False, True, True]
+
+        analysis_data = example_analysis.calculate_analysis_data(example_tohclv)
+
+        pd.testing.assert_frame_equal(analysis_data, expected)
+
+    def test_calculate_analysis_data_multiple_relations(
+        self, example_tohclv: pd.DataFrame
+    ):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(2))[0]
+        first = analysis.add_condition(CheckRelation(sma, ">", 2))
+        second = analysis.add_condition(CheckRelation("CLOSE", ">=", sma))
+        analysis.add_condition(CheckAllTrue([first, second]))
+
+        analysis_data = analysis.calculate_analysis_data(example_tohclv)
+
+        assert analysis_data["CheckAllTrue=['SMA_2>2', 'CLOSE>=SMA_2']"].tolist() == [
+            False,
+            False,
+            True,
+            True,
+        ]
+
+    @pytest.mark.parametrize("check", [CheckAllTrue, CheckAnyTrue])
+    def test_calculate_analysis_data_forward_reference(
+        self, example_tohclv: pd.DataFrame, check
+    ):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(2))[0]
+        relation = CheckRelation(sma, ">", 2)
+        analysis.add_condition(check([relation.get_name()]))
+        analysis.add_condition(relation)
+
+        with pytest.raises(ValueError):
+            analysis.calculate_analysis_data(example_tohclv)
+
+    def test_calculate_analysis_data_forward_reference_relation(
+        self, example_tohclv: pd.DataFrame
+    ):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(2))[0]
+        check = CheckAllTrue([analysis.add_condition(CheckRelation(sma, ">", 2))])
+        analysis.add_condition(CheckRelation(check.get_name(), "==", 1))
+        analysis.add_condition(check)
+
+        with pytest.raises(ValueError):
+            analysis.calculate_analysis_data(example_tohclv)
+
+    def test_calculate_analysis_data_multi_output_indicator(
+        self, example_klines: pd.DataFrame
+    ):
+        analysis = Analysis()
+        macd, _, signal = analysis.add_ti(MACD())
+        bbands = analysis.add_ti(BBANDS(20))
+        analysis.add_condition(CheckRelation(macd, ">", signal))
+        analysis.add_condition(CheckRelation("CLOSE", "<", bbands[0]))
+
+        analysis_data = analysis.calculate_analysis_data(example_klines)
+
+        pd.testing.assert_frame_equal(
+            analysis_data[bbands], BBANDS(20).calculate(example_klines)
+        )
+        assert (
+            analysis_data[f"{macd}>{signal}"].tolist()
+            == (analysis_data[macd] > analysis_data[signal]).tolist()
+        )
+
+    def test_calculate_analysis_data_interleaved_dtypes(
+        self, example_analysis: Analysis, example_tohclv: pd.DataFrame
+    ):
+        tohlcv = example_tohclv.astype({"OPEN": "float64", "LOW": "float64"})
+        expected = example_analysis.calculate_analysis_data(example_tohclv)
+        expected = expected.astype({"OPEN": "float64", "LOW": "float64"})
+
+        analysis_data = example_analysis.calculate_analysis_data(tohlcv)
+
+        pd.testing.assert_frame_equal(analysis_data, expected)
+
+    def test_calculate_analysis_data_compact(self, example_klines: pd.DataFrame):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(5))[0]
+        rsi = analysis.add_ti(RSI(5))[0]
+        analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        expected = analysis.calculate_analysis_data(example_klines)
+
+        analysis_data = analysis.calculate_analysis_data(to_compact(example_klines))
+
+        assert analysis_data[[sma, rsi]].dtypes.eq("float32").all()
+        assert is_compact(analysis_data)
+        pd.testing.assert_frame_equal(
+            analysis_data[[sma, rsi]],
+            expected[[sma, rsi]].astype("float32"),
+            check_exact=False,
+            rtol=1e-5,
+            atol=1e-3,
+        )
+
+    @pytest.mark.parametrize("start, stop", [(0, 50), (100, 180), (300, 400)])
+    def test_calculate_windows_equals_calculate(
+        self, example_klines: pd.DataFrame, start: int, stop: int
+    ):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(20))[0]
+        analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        expected = analysis.calculate_analysis_data(example_klines.iloc[start:stop])
+
+        full = analysis.calculate_analysis_data(example_klines)
+        analysis_data = next(analysis.calculate_windows(full, [(start, stop)]))
+
+        pd.testing.assert_frame_equal(
+            analysis_data, expected, check_exact=False, rtol=1e-9
+        )
+
+    def test_calculate_windows_overlapping(self, example_klines: pd.DataFrame):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(20))[0]
+        rsi = analysis.add_ti(RSI(5))[0]
+        above = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        analysis.add_condition(CheckAllTrue([above]))
+        windows = [(0, 10), (0, 100), (50, 150), (60, 400), (390, 400)]
+        full = analysis.calculate_analysis_data(example_klines)
+
+        analysis_data = list(analysis.calculate_windows(full, windows))
+
+        for (start, stop), window in zip(windows, analysis_data):
+            expected = next(analysis.calculate_windows(full, [(start, stop)]))
+            pd.testing.assert_frame_equal(window, expected)
+            assert window[sma].iloc[:19].isna().all()
+            assert window[rsi].iloc[:4].isna().all()
+            # Windows at the start of the series have no earlier klines.
+            assert window[rsi].iloc[4:].notna().all() or start == 0
+
+    def test_calculate_windows_masks_warm_up(self, example_klines: pd.DataFrame):
+        analysis = Analysis()
+        rsi = analysis.add_ti(RSI(14))[0]
+        analysis.add_condition(CheckRelation(rsi, "<", 101))
+        full = analysis.calculate_analysis_data(example_klines)
+
+        analysis_data = next(analysis.calculate_windows(full, [(100, 200)]))
+
+        assert analysis_data[rsi].iloc[:13].isna().all()
+        assert not analysis_data.iloc[:13, -1].any()
+        pd.testing.assert_frame_equal(analysis_data.iloc[13:], full.iloc[113:200])
+
+    @pytest.mark.parametrize("start, stop", [(-1, 10), (10, 10), (0, 1000)])
+    def test_calculate_windows_invalid_range(
+        self, example_analysis: Analysis, example_klines: pd.DataFrame, start, stop
+    ):
+        full = example_analysis.calculate_analysis_data(example_klines)
+
+        with pytest.raises(ValueError):
+            example_analysis.calculate_windows(full, [(0, 10), (start, stop)])
+
+    def test_calculate_windows_other_analysis(
+        self, example_analysis: Analysis, example_klines: pd.DataFrame
+    ):
+        other = Analysis()
+        other.add_ti(SMA(3))
+        other.add_condition(CheckRelation("CLOSE", ">", "SMA_3"))
+        full = other.calculate_analysis_data(example_klines)
+
+        with pytest.raises(ValueError):
+            example_analysis.calculate_windows(full, [(0, 10)])
+
+    def test_update_equals_calculate(self, example_klines: pd.DataFrame):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(5))[0]
+        rsi = analysis.add_ti(RSI(5))[0]
+        sma_relation = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        rsi_relation = analysis.add_condition(CheckRelation(rsi, "<", 50))
+        analysis.add_condition(CheckAllTrue([sma_relation, rsi_relation]))
+        expected = analysis.calculate_analysis_data(example_klines).tail(50)
+
+        analysis.init_update(example_klines.head(350))
+        updates = [analysis.update(example_klines.loc[[i]]) for i in expected.index]
+        analysis_data = pd.concat(updates)
+
+        pd.testing.assert_frame_equal(
+            analysis_data, expected, check_exact=False, rtol=1e-9
+        )
+
+    def test_init_update_not_supported(self, example_klines: pd.DataFrame):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(5))[0]
+        macd = analysis.add_ti(MACD())[0]
+        analysis.add_condition(CheckRelation(macd, ">", sma))
+
+        with pytest.raises(ValueError, match="MACD_12_26_9"):
+            analysis.init_update(example_klines)
+
+    def test_update_not_initialised(
+        self, example_analysis: Analysis, example_tohclv: pd.DataFrame
+    ):
+        with pytest.raises(RuntimeError):
+            example_analysis.update(example_tohclv.tail(1))
+
+    def test_calculate_many_equals_calculate(self, example_klines: pd.DataFrame):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(5))[0]
+        rsi = analysis.add_ti(RSI(5))[0]
+        sma_relation = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        rsi_relation = analysis.add_condition(CheckRelation(rsi, "<", 50))
+        analysis.add_condition(CheckAllTrue([sma_relation, rsi_relation]))
+        tohlcvs = {
+            "A": example_klines,
+            "B": example_klines.iloc[::-1].reset_index(drop=True),
+            "C": example_klines.head(100).astype({"OPEN": "int64"}),
+        }
+
+        analysis_data = analysis.calculate_many(tohlcvs, max_workers=2, chunksize=2)
+
+        assert list(analysis_data) == list(tohlcvs)
+        for symbol, tohlcv in tohlcvs.items():
+            expected = analysis.calculate_analysis_data(tohlcv)
+            pd.testing.assert_frame_equal(analysis_data[symbol], expected)
+
+    def test_calculate_packed_conditions_equals_calculate(
+        self, example_klines: pd.DataFrame
+    ):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(5))[0]
+        rsi = analysis.add_ti(RSI(5))[0]
+        sma_relation = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        rsi_relation = analysis.add_condition(CheckRelation(rsi, "<", 50))
+        analysis.add_condition(CheckAllTrue([sma_relation, rsi_relation]))
+        analysis.add_condition(CheckAnyTrue([sma_relation, rsi_relation]))
+        expected = analysis.calculate_analysis_data(example_klines)
+
+        packed = analysis.calculate_packed_conditions(example_klines)
+
+        assert list(packed.conditions) == analysis._get_condition_names()
+        pd.testing.assert_frame_equal(
+            packed.data, expected.drop(columns=list(packed.conditions))
+        )
+        for name, bits in packed.conditions.items():
+            assert bits.to_bools().tolist() == expected[name].tolist()
+
+    def test_pickle_drops_caches(self, example_klines: pd.DataFrame):
+        # E.g. the workers of calculate_many with the "spawn" start method get a pickled copy.
+        analysis = Analysis(cache=IndicatorCache())
+        sma = analysis.add_ti(Resampled(SMA(5), Resampler("4h", base_interval="1h")))
+        analysis.add_condition(CheckRelation("CLOSE", ">", sma[0]))
+        expected = analysis.calculate_analysis_data(example_klines)
+
+        copy = pickle.loads(pickle.dumps(analysis))
+
+        assert copy._cache is not None and copy._cache.info().currsize == 0
+        pd.testing.assert_frame_equal(
+            copy.calculate_analysis_data(example_klines), expected
+        )
+
+    def test_calculate_many_worker_error(
+        self, example_analysis: Analysis, insufficient_klines: pd.DataFrame
+    ):
+        with pytest.raises(ValueError):
+            example_analysis.calculate_many({"A": insufficient_klines}, max_workers=1)
+
+    def test_calculate_many_invalid_chunksize(
+        self, example_analysis: Analysis, example_tohclv: pd.DataFrame
+    ):
+        with pytest.raises(ValueError):
+            example_analysis.calculate_many({"A": example_tohclv}, chunksize=0)
+
     def test_get_min_len_pass(self, example_analysis: Analysis):
         expected = 2
 
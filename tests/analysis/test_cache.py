@@ -0,0 +1,120 @@
+import pickle
+
+import pytest
+import pandas as pd
+
+from py_trading_lib.analysis import *
+
+
+class CountingSMA(SMA):
+    calculations = 0
+
+    def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        CountingSMA.calculations += 1
+        return super()._calculate_indicator(klines)
+
+
+@pytest.fixture(autouse=True)
+def reset_calculations():
+    CountingSMA.calculations = 0
+
+
+class TestIndicatorCache:
+    def test_calculate_hit(self, example_klines: pd.DataFrame):
+        cache = IndicatorCache()
+        expected = SMA(5).calculate(example_klines)
+
+        cache.calculate(CountingSMA(5), example_klines)
+        indicator = cache.calculate(CountingSMA(5), example_klines)
+
+        pd.testing.assert_frame_equal(indicator, expected)
+        assert CountingSMA.calculations == 1
+        assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=128, currsize=1)
+
+    @pytest.mark.parametrize(
+        "first, second",
+        [(SMA(5), SMA(6)), (SMA(5), SMA(5, offset=1)), (SMA(5), RSI(5))],
+    )
+    def test_calculate_miss_other_params(
+        self, example_klines: pd.DataFrame, first, second
+    ):
+        cache = IndicatorCache()
+
+        cache.calculate(first, example_klines)
+        cache.calculate(second, example_klines)
+
+        assert cache.info().misses == 2
+
+    def test_calculate_miss_other_data(self, example_klines: pd.DataFrame):
+        cache = IndicatorCache()
+        changed_klines = example_klines.copy()
+        changed_klines.loc[399, "CLOSE"] += 1
+
+        cache.calculate(CountingSMA(5), example_klines)
+        cache.calculate(CountingSMA(5), changed_klines)
+
+        assert CountingSMA.calculations == 2
+
+    def test_calculate_lru_eviction(self, example_klines: pd.DataFrame):
+        cache = IndicatorCache(maxsize=2)
+
+        cache.calculate(CountingSMA(5), example_klines)
+        cache.calculate(CountingSMA(6), example_klines)
+        cache.calculate(CountingSMA(5), example_klines)
+        cache.calculate(CountingSMA(7), example_klines)
+        cache.calculate(CountingSMA(5), example_klines)
+        cache.calculate(CountingSMA(6), example_klines)
+
+        assert CountingSMA.calculations == 4
+        assert cache.info() == CacheInfo(hits=2, misses=4, maxsize=2, currsize=2)
+
+    def test_clear(self, example_klines: pd.DataFrame):
+        cache = IndicatorCache()
+        cache.calculate(CountingSMA(5), example_klines)
+
+        cache.clear()
+
+        assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=128, currsize=0)
+
+    def test_pickle_is_empty(self, example_klines: pd.DataFrame):
+        cache = IndicatorCache(maxsize=10)
+        cache.calculate(CountingSMA(5), example_klines)
+
+        copy = pickle.loads(pickle.dumps(cache))
+
+        assert copy.info() == CacheInfo(hits=0, misses=0, maxsize=10, currsize=0)
+        assert cache.info().currsize == 1
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            IndicatorCache(maxsize=0)
+
+
+class TestAnalysisDeduplication:
+    def test_calculate_analysis_data_dedups_indicators(
+        self, example_klines: pd.DataFrame
+    ):
+        analysis = Analysis()
+        analysis.add_ti(CountingSMA(5))
+        analysis.add_ti(CountingSMA(5))
+        analysis.add_condition(CheckRelation("CLOSE", ">", 0))
+
+        analysis_data = analysis.calculate_analysis_data(example_klines)
+
+        assert CountingSMA.calculations == 1
+        assert analysis_data.columns.tolist().count("SMA_5") == 2
+
+    def test_calculate_analysis_data_shared_cache(self, example_klines: pd.DataFrame):
+        cache = IndicatorCache()
+        analyses = [Analysis(cache), Analysis(cache)]
+        for analysis in analyses:
+            name = analysis.add_ti(CountingSMA(5))[0]
+            analysis.add_condition(CheckRelation(name, ">", 0))
+
+        results = [
+            analysis.calculate_analysis_data(example_klines) for analysis in analyses
+        ]
+
+        pd.testing.assert_frame_equal(results[0], results[1])
+        assert CountingSMA.calculations == 1
+        assert cache.info().hits == 1
@@ -4,6 +4,7 @@ import pytest
 import pandas as pd
 
 from py_trading_lib.analysis.conditions import *
+from py_trading_lib.utils.packed_bits import PackedBits
 
 
 @pytest.fixture()
@@ -235,6 +236,14 @@ class TestConditionGeneral:
 
 
 class TestCheckRelation:
+    def test_calculate_ignores_other_non_numeric_cols(self, sample_data):
+        data = sample_data.assign(z=["x", "y", "z"], c=[True, False, True])
+        condition = CheckRelation("a", "<", "b")
+
+        result = condition.calculate(data)
+
+        assert result.tolist() == [True, False, False]
+
     @pytest.mark.parametrize(
         "condition",
         [
@@ -272,3 +281,43 @@ class TestCheckRelation:
         result = result.tolist()
 
         assert result == expected
+
+
+class TestCheckAnyTrue:
+    def test_calculate(self, sample_conditions: pd.DataFrame):
+        result = CheckAnyTrue(["b", "c"]).calculate(sample_conditions)
+
+        assert result.tolist() == [True, False, False]
+        assert result.name == "CheckAnyTrue=['b', 'c']"
+
+    def test_calculate_no_conditions(self, sample_conditions: pd.DataFrame):
+        with pytest.raises(ValueError):
+            CheckAnyTrue([]).calculate(sample_conditions)
+
+
+class TestPackedConditions:
+    @pytest.mark.parametrize("condition", [CheckAllTrue, CheckAnyTrue])
+    def test_combine_packed_equals_calculate(
+        self, condition, sample_conditions: pd.DataFrame
+    ):
+        condition = condition(["a", "b"])
+        packed = {
+            col: PackedBits.from_bools(sample_conditions[col].to_numpy())
+            for col in ["a", "b"]
+        }
+        expected = condition.calculate(sample_conditions)
+
+        result = condition.combine_packed(packed)
+
+        assert result.to_bools().tolist() == expected.tolist()
+        assert result.name == condition.get_name()
+
+    def test_calculate_packed(self, sample_data: pd.DataFrame):
+        result = CheckRelation("a", "<", "b").calculate_packed(sample_data)
+
+        assert result.to_bools().tolist() == [True, False, False]
+        assert result.name == "a<b"
+
+    def test_combine_packed_missing_condition(self):
+        with pytest.raises(ValueError):
+            CheckAllTrue(["a", "b"]).combine_packed({"a": PackedBits.zeros(3)})
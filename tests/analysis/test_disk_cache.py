@@ -0,0 +1,202 @@
+import os
+
+import pytest
+import pandas as pd
+
+from py_trading_lib.analysis import *
+from py_trading_lib.utils import get_fingerprint
+
+
+class CountingSMA(SMA):
+    calculations = 0
+
+    def _calculate_indicator(self, klines: pd.DataFrame) -> pd.DataFrame:
+        CountingSMA.calculations += 1
+        return super()._calculate_indicator(klines)
+
+
+class UncacheableSMA(SMA):
+    def get_params(self):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def reset_calculations():
+    CountingSMA.calculations = 0
+
+
+def _create_analysis(disk_cache: AnalysisDiskCache, length: int = 5) -> Analysis:
+    analysis = Analysis(disk_cache=disk_cache)
+    name = analysis.add_ti(CountingSMA(length))[0]
+    analysis.add_condition(CheckRelation("CLOSE", ">", name))
+    return analysis
+
+
+class TestAnalysisDiskCache:
+    def test_calculate_analysis_data_hit(self, example_klines: pd.DataFrame, tmp_path):
+        disk_cache = AnalysisDiskCache(str(tmp_path))
+        expected = _create_analysis(disk_cache).calculate_analysis_data(example_klines)
+
+        analysis_data = _create_analysis(disk_cache).calculate_analysis_data(
+            example_klines
+        )
+
+        pd.testing.assert_frame_equal(analysis_data, expected)
+        assert CountingSMA.calculations == 1
+        nbytes = int(expected.memory_usage(index=False).sum())
+        assert disk_cache.info() == DiskCacheInfo(
+            hits=1,
+            misses=1,
+            bytes_saved=nbytes,
+            max_bytes=1 << 30,
+            curr_bytes=nbytes,
+        )
+
+    def test_calculate_analysis_data_persists(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        _create_analysis(AnalysisDiskCache(str(tmp_path))).calculate_analysis_data(
+            example_klines
+        )
+        disk_cache = AnalysisDiskCache(str(tmp_path))
+
+        _create_analysis(disk_cache).calculate_analysis_data(example_klines)
+
+        assert CountingSMA.calculations == 1
+        assert disk_cache.info().hits == 1
+
+    def test_calculate_analysis_data_miss_other_config(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        disk_cache = AnalysisDiskCache(str(tmp_path))
+
+        _create_analysis(disk_cache, 5).calculate_analysis_data(example_klines)
+        _create_analysis(disk_cache, 6).calculate_analysis_data(example_klines)
+
+        assert CountingSMA.calculations == 2
+        assert disk_cache.info().misses == 2
+
+    def test_calculate_analysis_data_miss_other_data(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        disk_cache = AnalysisDiskCache(str(tmp_path))
+        changed_klines = example_klines.copy()
+        changed_klines.loc[399, "CLOSE"] += 1
+
+        _create_analysis(disk_cache).calculate_analysis_data(example_klines)
+        _create_analysis(disk_cache).calculate_analysis_data(changed_klines)
+
+        assert CountingSMA.calculations == 2
+
+    def test_calculate_analysis_data_uncacheable(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        disk_cache = AnalysisDiskCache(str(tmp_path))
+        analysis = Analysis(disk_cache=disk_cache)
+        analysis.add_ti(UncacheableSMA(5))
+        analysis.add_condition(CheckRelation("CLOSE", ">", "SMA_5"))
+
+        analysis.calculate_analysis_data(example_klines)
+
+        assert analysis.get_config_hash() is None
+        assert os.listdir(tmp_path) == []
+
+    def test_calculate_analysis_data_conditions_with_same_name(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        disk_cache = AnalysisDiskCache(str(tmp_path))
+        results = []
+        for operator in [">", "<"]:
+            analysis = Analysis(disk_cache=disk_cache)
+            sma = analysis.add_ti(SMA(5))[0]
+            relation = Relation("CLOSE", operator, sma)
+            analysis.add_condition(CheckExpression(relation, name="entry"))
+            results.append(analysis.calculate_analysis_data(example_klines)["entry"])
+
+        valid = example_klines.index[4:]
+        assert (results[0][valid] != results[1][valid]).any()
+        assert disk_cache.info().hits == 0
+
+    def test_calculate_analysis_data_uncacheable_condition(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        class CustomCondition(Condition):
+            def _perform_sanity_checks(self, data: pd.DataFrame) -> None:
+                pass
+
+            def _calculate(self, data: pd.DataFrame) -> pd.Series:
+                return data["CLOSE"] > data["OPEN"]
+
+            def get_name(self) -> str:
+                return "custom"
+
+        analysis = Analysis(disk_cache=AnalysisDiskCache(str(tmp_path)))
+        analysis.add_ti(SMA(5))
+        analysis.add_condition(CustomCondition())
+
+        analysis.calculate_analysis_data(example_klines)
+
+        assert analysis.get_config_hash() is None
+        assert os.listdir(tmp_path) == []
+
+    def test_get_config_hash_depends_on_condition_structure(self):
+        hashes = set()
+        for expression in [
+            Relation("CLOSE", ">", "SMA_5"),
+            Relation("CLOSE", ">", 5),
+            Relation("CLOSE", ">", "SMA_5") & Column("a"),
+            Relation("CLOSE", ">", "SMA_5") | Column("a"),
+            ~Relation("CLOSE", ">", "SMA_5"),
+        ]:
+            analysis = Analysis()
+            analysis.add_ti(SMA(5))
+            analysis.add_condition(CheckExpression(expression, name="entry"))
+            hashes.add(analysis.get_config_hash())
+
+        assert len(hashes) == 5
+        assert None not in hashes
+
+    def test_lru_eviction(self, example_klines: pd.DataFrame, tmp_path):
+        nbytes = int(
+            _create_analysis(None)
+            .calculate_analysis_data(example_klines)
+            .memory_usage(index=False)
+            .sum()
+        )
+        disk_cache = AnalysisDiskCache(str(tmp_path), max_bytes=2 * nbytes)
+        analyses = [_create_analysis(disk_cache, length) for length in [5, 6, 7]]
+
+        for last_used, analysis in enumerate(analyses[:2]):
+            analysis.calculate_analysis_data(example_klines)
+            self._set_last_used(tmp_path, analysis, example_klines, last_used)
+        analyses[0].calculate_analysis_data(example_klines)
+        analyses[2].calculate_analysis_data(example_klines)
+        CountingSMA.calculations = 0
+        for analysis in [analyses[0], analyses[2], analyses[1]]:
+            analysis.calculate_analysis_data(example_klines)
+
+        assert CountingSMA.calculations == 1
+        assert disk_cache.info().curr_bytes == 2 * nbytes
+
+    def _set_last_used(self, tmp_path, analysis, tohlcv, last_used: int) -> None:
+        key = f"{analysis.get_config_hash()}-{get_fingerprint(tohlcv)}"
+        os.utime(os.path.join(tmp_path, key, "meta.json"), (last_used, last_used))
+
+    def test_store_too_large(self, example_klines: pd.DataFrame, tmp_path):
+        disk_cache = AnalysisDiskCache(str(tmp_path), max_bytes=100)
+
+        _create_analysis(disk_cache).calculate_analysis_data(example_klines)
+
+        assert disk_cache.info().curr_bytes == 0
+
+    def test_clear(self, example_klines: pd.DataFrame, tmp_path):
+        disk_cache = AnalysisDiskCache(str(tmp_path))
+        _create_analysis(disk_cache).calculate_analysis_data(example_klines)
+
+        disk_cache.clear()
+
+        assert disk_cache.info() == DiskCacheInfo(0, 0, 0, 1 << 30, 0)
+
+    def test_invalid_max_bytes(self, tmp_path):
+        with pytest.raises(ValueError):
+            AnalysisDiskCache(str(tmp_path), max_bytes=0)
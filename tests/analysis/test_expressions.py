@@ -0,0 +1,156 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from py_trading_lib.analysis.conditions import CheckAllTrue, CheckRelation, Condition
+from py_trading_lib.analysis.expressions import *
+
+
+@pytest.fixture()
+def sample_data():
+    return pd.DataFrame(
+        {
+            "a": [1.0, 2.0, 3.0, np.nan],
+            "b": [3.0, 2.0, 1.0, 1.0],
+            "c": [True, False, True, True],
+        }
+    )
+
+
+@pytest.fixture()
+def random_data():
+    rng = np.random.default_rng(0)
+    n = 10_000
+    return pd.DataFrame(
+        {
+            "a": rng.normal(size=n),
+            "b": rng.normal(size=n),
+            "z": np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n)),
+            "c": rng.random(n) < 0.5,
+        }
+    )
+
+
+class TestExpression:
+    @pytest.mark.parametrize(
+        "expression, expected",
+        [
+            (Relation("a", "<", 2), [True, False, False, False]),
+            (Relation("a", "<=", "b"), [True, True, False, False]),
+            (
+                Relation("a", ">", 1) & Relation("b", ">", 1),
+                [False, True, False, False],
+            ),
+            (Relation("a", ">", 2) | Column("c"), [True, False, True, True]),
+            (~Relation("a", ">", 2), [True, True, False, True]),
+            (~(Relation("a", "==", 2) | ~Column("c")), [True, False, True, True]),
+        ],
+    )
+    def test_evaluate(self, expression: Expression, expected: List[bool], sample_data):
+        result = CompiledExpression(expression).evaluate(sample_data)
+
+        assert result.tolist() == expected
+
+    @pytest.mark.parametrize(
+        "expression, expected",
+        [
+            (
+                lambda d: (Relation("a", ">", 0) & Relation("z", "<", "b"))
+                | ~Column("c"),
+                lambda d: ((d["a"] > 0) & (d["z"] < d["b"])) | ~d["c"],
+            ),
+            (
+                lambda d: Relation("a", ">", 1.5)
+                & (Relation("b", "<", 0) | Relation("z", ">=", 0))
+                & ~Relation("a", ">", 2.5),
+                lambda d: (d["a"] > 1.5)
+                & ((d["b"] < 0) | (d["z"] >= 0))
+                & ~(d["a"] > 2.5),
+            ),
+            (
+                lambda d: Relation("a", "<", -3) | Relation("b", "<", -3) | Column("c"),
+                lambda d: (d["a"] < -3) | (d["b"] < -3) | d["c"],
+            ),
+        ],
+    )
+    def test_evaluate_equals_pandas(self, expression, expected, random_data):
+        result = CompiledExpression(expression(random_data)).evaluate(random_data)
+
+        assert result.tolist() == expected(random_data).tolist()
+
+    def test_simplify(self):
+        expression = ~~(Relation("a", ">", 1) & (Column("c") & Column("d")))
+
+        compiled = CompiledExpression(expression)
+
+        assert isinstance(compiled.expression, And)
+        assert len(compiled.expression.get_children()) == 3
+
+    def test_evaluate_all(self, sample_data):
+        expression = Relation("a", ">", 1) & Column("c")
+
+        results = CompiledExpression(expression).evaluate_all(sample_data)
+
+        assert list(results) == ["(a>1 & c)", "a>1", "c"]
+        assert results["a>1"].tolist() == [False, True, True, False]
+
+    def test_invalid_operator(self):
+        with pytest.raises(ValueError):
+            Relation("a", "!=", 1)  # type: ignore
+
+    def test_no_operands(self):
+        with pytest.raises(ValueError):
+            And()
+
+
+class TestCheckExpression:
+    def test_calculate(self, sample_data):
+        condition = CheckExpression(Relation("a", ">", 1) & Column("c"))
+
+        result = condition.calculate(sample_data)
+
+        assert result.name == "(a>1 & c)"
+        assert result.tolist() == [False, False, True, False]
+
+    def test_name(self):
+        condition = CheckExpression(Column("c"), name="ENTRY")
+
+        assert condition.get_name() == "ENTRY"
+
+    @pytest.mark.parametrize(
+        "expression", [Relation("c", ">", 1), Column("a"), Column("missing")]
+    )
+    def test_calculate_broken_data(self, expression: Expression, sample_data):
+        with pytest.raises((TypeError, ValueError)):
+            CheckExpression(expression).calculate(sample_data)
+
+
+class TestExpressionFromCondition:
+    def test_equals_check_all_true(self, random_data):
+        relations = [CheckRelation("a", ">", "b"), CheckRelation("z", "<", 0.5)]
+        all_true = CheckAllTrue([r.get_name() for r in relations] + ["c"])
+        data = random_data.copy()
+        for relation in relations:
+            data[relation.get_name()] = relation.calculate(data)
+        expected = all_true.calculate(data)
+
+        expression = expression_from_condition(all_true, relations)
+
+        result = CompiledExpression(expression).evaluate(random_data)
+        assert result.tolist() == expected.tolist()
+
+    def test_invalid_condition(self):
+        class Other(Condition):
+            def _perform_sanity_checks(self, data: pd.DataFrame) -> None:
+                pass
+
+            def _calculate(self, data: pd.DataFrame) -> pd.Series:
+                return data["c"]
+
+            def get_name(self) -> str:
+                return "OTHER"
+
+        with pytest.raises(TypeError):
+            expression_from_condition(Other())
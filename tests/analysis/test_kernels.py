@@ -0,0 +1,290 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis import kernels
+from py_trading_lib.analysis.technical_indicators import *
+from py_trading_lib.data_handler.historic_data import LocalKlines
+
+
+@pytest.fixture(
+    params=[
+        "./example_klines/BTC_USDT.csv",
+        "./example_klines/ETH_USDT.csv",
+        "./example_klines/BNB_USDT.csv",
+    ]
+)
+def all_example_klines(request):
+    return LocalKlines().get_tohlcv_from_csv(request.param)
+
+
+class TestBackendParity:
+    @pytest.fixture(autouse=True)
+    def require_pandas_ta(self):
+        pytest.importorskip("pandas_ta")
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"length": 1},
+            {"length": 5},
+            {"length": 50},
+            {"length": 200, "offset": 3},
+            {"length": 20, "offset": -2},
+        ],
+    )
+    def test_sma(self, all_example_klines: pd.DataFrame, params):
+        expected = SMA(**params, backend="pandas_ta").calculate(all_example_klines)
+
+        indicator = SMA(**params, backend="numpy").calculate(all_example_klines)
+
+        pd.testing.assert_frame_equal(indicator, expected, check_exact=False, rtol=1e-9)
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"length": 2},
+            {"length": 5},
+            {"length": 14},
+            {"length": 100, "scalar": 1},
+            {"length": 14, "drift": 3},
+            {"length": 14, "offset": 2},
+        ],
+    )
+    def test_rsi(self, all_example_klines: pd.DataFrame, params):
+        expected = RSI(**params, backend="pandas_ta").calculate(all_example_klines)
+
+        indicator = RSI(**params, backend="numpy").calculate(all_example_klines)
+
+        pd.testing.assert_frame_equal(indicator, expected, check_exact=False, rtol=1e-9)
+
+
+class TestKernels:
+    def test_sma(self):
+        close = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+
+        sma = kernels.sma(close, 2)
+
+        np.testing.assert_allclose(sma, [np.nan, 1.5, 2.5, 3.5, 4.5])
+
+    @pytest.mark.parametrize(
+        "offset, expected",
+        [
+            (1, [np.nan, np.nan, 1.5, 2.5, 3.5]),
+            (-1, [1.5, 2.5, 3.5, 4.5, np.nan]),
+        ],
+    )
+    def test_sma_offset(self, offset: int, expected):
+        close = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+
+        sma = kernels.sma(close, 2, offset)
+
+        np.testing.assert_allclose(sma, expected)
+
+    def test_sma_too_short(self):
+        sma = kernels.sma(np.array([1.0, 2.0]), 3)
+
+        assert np.isnan(sma).all()
+
+    def test_rma_equals_ewm(self):
+        values = pd.Series(np.random.default_rng(0).normal(size=5000))
+        values[:3] = np.nan
+        expected = values.ewm(alpha=1 / 14, min_periods=14).mean()
+
+        rma = kernels.rma(values.to_numpy(), 14)
+
+        np.testing.assert_allclose(rma, expected.to_numpy(), rtol=1e-9, atol=1e-12)
+
+    def test_rsi_only_gains(self):
+        rsi = kernels.rsi(np.arange(10.0), 3)
+
+        np.testing.assert_allclose(rsi, [np.nan] * 3 + [100.0] * 7)
+
+    def test_rsi_constant(self):
+        rsi = kernels.rsi(np.ones(10), 3)
+
+        assert np.isnan(rsi).all()
+
+    @pytest.mark.parametrize("kernel", [kernels.sma, kernels.rsi])
+    def test_float32(self, kernel, all_example_klines: pd.DataFrame):
+        close = all_example_klines["CLOSE"].to_numpy(dtype=np.float32)
+
+        result = kernel(close, 14)
+
+        # The accumulation is float64, so only the result is rounded.
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(
+            result, kernel(close.astype(np.float64), 14), rtol=1e-6
+        )
+
+
+class TestBackendParityMultiOutput:
+    @pytest.fixture(autouse=True)
+    def require_pandas_ta(self):
+        pytest.importorskip("pandas_ta")
+
+    @pytest.mark.parametrize(
+        "ti",
+        [
+            MACD(),
+            MACD(5, 35, 5),
+            BBANDS(),
+            BBANDS(20, 2.5, ddof=1),
+            STOCH(),
+            STOCH(5, 3, 1),
+            ATR(),
+            ATR(7, drift=2),
+        ],
+        ids=lambda ti: ti.get_names()[0],
+    )
+    def test_numpy_equals_pandas_ta(self, all_example_klines: pd.DataFrame, ti):
+        params = {**ti.get_params(), "backend": "pandas_ta"}
+        expected = type(ti)(**params).calculate(all_example_klines)
+
+        indicator = ti.calculate(all_example_klines)
+
+        # The rolling std of pandas and the differences of the EMAs of the MACD lose about 1e-9 relative.
+        pd.testing.assert_frame_equal(
+            indicator, expected, check_exact=False, rtol=1e-7, atol=1e-9
+        )
+
+
+def ema_reference(values: pd.Series, length: int) -> pd.Series:
+    """
+    The EMA of pandas_ta: seeded with the SMA of the first values, then ewm without adjusted weights.
+    """
+    valid = values.loc[values.first_valid_index() :].copy()
+    seed = valid.iloc[:length].mean()
+    valid.iloc[: length - 1] = np.nan
+    valid.iloc[length - 1] = seed
+    return valid.ewm(span=length, adjust=False).mean().reindex(values.index)
+
+
+class TestMultiOutputKernels:
+    @pytest.mark.parametrize("length", [1, 2, 12, 26])
+    def test_ema(self, all_example_klines: pd.DataFrame, length: int):
+        close = all_example_klines["CLOSE"]
+
+        ema = kernels.ema(close.to_numpy(), length)
+
+        np.testing.assert_allclose(ema, ema_reference(close, length), rtol=1e-12)
+
+    def test_ema_skips_leading_nans(self):
+        values = pd.Series(np.r_[np.full(3, np.nan), np.arange(10.0)])
+
+        ema = kernels.ema(values.to_numpy(), 4)
+
+        np.testing.assert_allclose(ema, ema_reference(values, 4), rtol=1e-12)
+        assert np.isnan(ema[:6]).all()
+
+    def test_ema_too_short(self):
+        assert np.isnan(kernels.ema(np.arange(3.0), 4)).all()
+
+    @pytest.mark.parametrize("ddof", [0, 1])
+    def test_rolling_std(self, all_example_klines: pd.DataFrame, ddof: int):
+        close = all_example_klines["CLOSE"].to_numpy()
+        expected = [
+            np.std(close[i - 19 : i + 1], ddof=ddof) for i in range(19, len(close))
+        ]
+
+        std = kernels.rolling_std(close, kernels.sma(close, 20), 20, ddof)
+
+        assert np.isnan(std[:19]).all()
+        np.testing.assert_allclose(std[19:], expected, rtol=1e-12)
+
+    @pytest.mark.parametrize(
+        "kernel, method", [(kernels.rolling_min, "min"), (kernels.rolling_max, "max")]
+    )
+    def test_rolling_extremes(self, all_example_klines: pd.DataFrame, kernel, method):
+        close = all_example_klines["CLOSE"]
+        expected = getattr(close.rolling(14), method)()
+
+        np.testing.assert_array_equal(kernel(close.to_numpy(), 14), expected)
+
+    def test_true_range(self):
+        high = np.array([2.0, 5.0, 4.0, 3.0])
+        low = np.array([1.0, 3.0, 3.5, 1.0])
+        close = np.array([1.5, 4.0, 3.8, 2.0])
+
+        true_range = kernels.true_range(high, low, close)
+
+        np.testing.assert_allclose(true_range, [np.nan, 3.5, 0.5, 2.8])
+
+    def test_macd(self, all_example_klines: pd.DataFrame):
+        close = all_example_klines["CLOSE"]
+        line = ema_reference(close, 12) - ema_reference(close, 26)
+        signal = ema_reference(line, 9)
+
+        macd = kernels.macd(close.to_numpy())
+
+        expected = np.array([line, line - signal, signal])
+        np.testing.assert_allclose(macd, expected, rtol=1e-9, atol=1e-9)
+
+    def test_bbands(self, all_example_klines: pd.DataFrame):
+        close = all_example_klines["CLOSE"].to_numpy()
+        middle = kernels.sma(close, 20)
+        std = kernels.rolling_std(close, middle, 20)
+        lower, upper = middle - 2 * std, middle + 2 * std
+
+        bbands = kernels.bbands(close, 20)
+
+        expected = np.array(
+            [
+                lower,
+                middle,
+                upper,
+                100 * (upper - lower) / middle,
+                (close - lower) / (upper - lower),
+            ]
+        )
+        np.testing.assert_allclose(bbands, expected, rtol=1e-12)
+
+    def test_stoch(self, all_example_klines: pd.DataFrame):
+        high, low, close = (all_example_klines[col] for col in ["HIGH", "LOW", "CLOSE"])
+        lowest_low = low.rolling(14).min()
+        raw_k = 100 * (close - lowest_low) / (high.rolling(14).max() - lowest_low)
+        k = raw_k.rolling(3).mean()
+
+        stoch = kernels.stoch(high.to_numpy(), low.to_numpy(), close.to_numpy())
+
+        expected = np.array([k, k.rolling(3).mean()])
+        np.testing.assert_allclose(stoch, expected, rtol=1e-9)
+
+    def test_stoch_flat_range(self, all_example_klines: pd.DataFrame):
+        klines = all_example_klines.head(200).copy()
+        klines.loc[100:130, ["HIGH", "LOW", "CLOSE"]] = klines["CLOSE"][100]
+        high, low, close = (klines[col] for col in ["HIGH", "LOW", "CLOSE"])
+        lowest_low = low.rolling(14).min()
+        value_range = high.rolling(14).max() - lowest_low
+        raw_k = 100 * (close - lowest_low) / value_range.replace(0, np.finfo(float).eps)
+        k = raw_k.rolling(3).mean()
+
+        stoch = kernels.stoch(high.to_numpy(), low.to_numpy(), close.to_numpy())
+
+        assert not np.isnan(stoch[:, 17:]).any()
+        np.testing.assert_allclose(stoch[:, 117:131], 0, atol=1e-9)
+        expected = np.array([k, k.rolling(3).mean()])
+        np.testing.assert_allclose(stoch, expected, rtol=1e-9, atol=1e-9)
+
+    def test_atr(self, all_example_klines: pd.DataFrame):
+        high, low, close = (all_example_klines[col] for col in ["HIGH", "LOW", "CLOSE"])
+        true_range = pd.concat(
+            [high - low, (high - close.shift()).abs(), (low - close.shift()).abs()],
+            axis=1,
+        ).max(axis=1, skipna=False)
+        expected = true_range.ewm(alpha=1 / 14, min_periods=14).mean()
+
+        atr = kernels.atr(high.to_numpy(), low.to_numpy(), close.to_numpy())
+
+        assert atr.shape == (1, len(close))
+        np.testing.assert_allclose(atr[0], expected, rtol=1e-9)
+
+    @pytest.mark.parametrize("kernel", [kernels.macd, kernels.bbands])
+    def test_float32(self, kernel, all_example_klines: pd.DataFrame):
+        close = all_example_klines["CLOSE"].to_numpy(dtype=np.float32)
+
+        result = kernel(close)
+
+        assert result.dtype == np.float32
+        expected = kernel(close.astype(np.float64))
+        np.testing.assert_allclose(result, expected, rtol=1e-6, atol=1e-6)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from py_trading_lib.analysis import *
+from py_trading_lib.data_handler.resampling import Resampler
+
+
+class TestResampled:
+    def test_names(self):
+        ti = Resampled(SMA(5), Resampler("4h"))
+
+        assert ti.get_names() == ["SMA_5_4h"]
+
+    def test_has_no_lookahead(self, example_klines: pd.DataFrame):
+        ti = Resampled(SMA(5), Resampler("4h", base_interval="1h"))
+        expected = ti.calculate(example_klines)
+        future = example_klines.copy()
+        future.loc[300:, ["OPEN", "HIGH", "LOW", "CLOSE"]] *= 2
+
+        result = ti.calculate(future)
+
+        pd.testing.assert_frame_equal(result.iloc[:300], expected.iloc[:300])
+
+    @pytest.mark.parametrize("base_interval", [None, "1h"])
+    @pytest.mark.parametrize("batch_size", [1, 5])
+    def test_update_equals_calculate(
+        self, example_klines: pd.DataFrame, base_interval, batch_size: int
+    ):
+        ti = Resampled(RSI(5), Resampler("4h", base_interval))
+        expected = ti.calculate(example_klines).iloc[301:]
+
+        ti.init_update(example_klines.head(301))
+        updates = [
+            ti.update(example_klines.iloc[i : i + batch_size])
+            for i in range(301, len(example_klines), batch_size)
+        ]
+
+        pd.testing.assert_frame_equal(
+            pd.concat(updates), expected, check_exact=False, rtol=1e-9
+        )
+
+    def test_update_not_supported(self, example_klines: pd.DataFrame):
+        ti = Resampled(MACD(), Resampler("4h", base_interval="1h"))
+
+        assert not ti.supports_update()
+        with pytest.raises(ValueError):
+            ti.init_update(example_klines)
+
+    def test_in_analysis(self, example_klines: pd.DataFrame):
+        resampler = Resampler("4h", base_interval="1h")
+        analysis = Analysis()
+        sma = analysis.add_ti(Resampled(SMA(5), resampler))[0]
+        analysis.add_ti(Resampled(RSI(5), resampler))
+        analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+
+        analysis_data = analysis.calculate_analysis_data(example_klines)
+
+        assert analysis.get_min_len() == 24
+        assert analysis_data[sma].notna().sum() > 0
+        assert np.isnan(analysis_data[sma].iloc[0])
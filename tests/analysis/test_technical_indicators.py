@@ -1,7 +1,9 @@
 import pytest
+import numpy as np
 import pandas as pd
 
 from py_trading_lib.analysis.technical_indicators import *
+from py_trading_lib.utils.utils import to_compact
 
 
 @pytest.fixture
@@ -138,7 +140,7 @@ class TestTechnicalIndicators:
         indicator = self._make_df_to_testable_dict(indicator)
         expected = self._make_df_to_testable_dict(expected)
 
-        assert indicator == expected
+        assert indicator == pytest.approx(expected, rel=1e-12)
 
     @pytest.mark.parametrize(
         "ti, expected",
@@ -159,7 +161,7 @@ class TestTechnicalIndicators:
         indicator = self._make_df_to_testable_dict(indicator)
         expected = self._make_df_to_testable_dict(expected)
 
-        assert indicator == expected
+        assert indicator == pytest.approx(expected, rel=1e-12)
 
     @pytest.mark.parametrize("ti, expected", [("sma_5", 5), ("rsi_5", 5)])
     def test_get_min_len(self, ti: TechnicalIndicator, expected, request):
@@ -194,7 +196,137 @@ class TestTechnicalIndicators:
 
         assert calculated_names == names
 
+    @pytest.mark.parametrize("ti", ["sma_5", "rsi_5"])
+    def test_update_equals_calculate(self, example_klines, ti, request):
+        ti = request.getfixturevalue(ti)
+        history = example_klines.head(300)
+        new_klines = example_klines.tail(100)
+        expected = ti.calculate(example_klines).tail(100)
+
+        ti.init_update(history)
+        updates = [ti.update(new_klines.loc[[i]]) for i in new_klines.index]
+        indicator = pd.concat(updates)
+
+        pd.testing.assert_frame_equal(indicator, expected, check_exact=False, rtol=1e-9)
+
+    def test_update_rsi_flat_prices(self, example_klines):
+        klines = example_klines.copy()
+        klines["CLOSE"] = 100.0
+        rsi = RSI(length=5)
+        expected = rsi.calculate(klines).tail(100)
+
+        rsi.init_update(klines.head(300))
+        indicator = rsi.update(klines.tail(100))
+
+        assert indicator.isna().all().all()
+        pd.testing.assert_frame_equal(indicator, expected)
+
+    def test_update_rsi_is_exact(self, example_klines):
+        pytest.importorskip("pandas_ta")
+        rsi = RSI(length=5, backend="pandas_ta")
+        expected = rsi.calculate(example_klines).tail(100)
+
+        rsi.init_update(example_klines.head(300))
+        indicator = rsi.update(example_klines.tail(100))
+
+        pd.testing.assert_frame_equal(indicator, expected, check_exact=True)
+
+    @pytest.mark.parametrize("ti", ["sma_5", "rsi_5"])
+    def test_update_not_initialised(self, example_klines, ti, request):
+        ti = request.getfixturevalue(ti)
+
+        with pytest.raises(RuntimeError):
+            ti.update(example_klines.tail(1))
+
+    @pytest.mark.parametrize("ti", [SMA(5, offset=1), RSI(5, offset=1)])
+    def test_init_update_offset_not_supported(self, example_klines, ti):
+        with pytest.raises(ValueError):
+            ti.init_update(example_klines)
+
+    @pytest.mark.parametrize("ti", [SMA, RSI])
+    def test_invalid_backend(self, ti):
+        with pytest.raises(ValueError):
+            ti(length=5, backend="invalid")
+
+    @pytest.mark.parametrize("ti", [SMA, RSI])
+    def test_get_cache_key_depends_on_backend(self, ti):
+        numpy_key = ti(length=5, backend="numpy").get_cache_key()
+        pandas_ta_key = ti(length=5, backend="pandas_ta").get_cache_key()
+
+        assert numpy_key != pandas_ta_key
+
     def _make_df_to_testable_dict(self, df: pd.DataFrame):
         df = df.dropna()
-        testable_dict = df.to_dict()
+        testable_dict = df.stack().to_dict()
         return testable_dict
+
+
+MULTI_OUTPUT_TIS = [MACD(), BBANDS(), STOCH(), ATR()]
+
+
+class TestMultiOutputIndicators:
+    @pytest.mark.parametrize(
+        "ti, expected",
+        [
+            (MACD(), ["MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"]),
+            (MACD(26, 12, 9), ["MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"]),
+            (
+                BBANDS(20, 2),
+                ["BBL_20_2.0", "BBM_20_2.0", "BBU_20_2.0", "BBB_20_2.0", "BBP_20_2.0"],
+            ),
+            (STOCH(), ["STOCHk_14_3_3", "STOCHd_14_3_3"]),
+            (ATR(), ["ATRr_14"]),
+        ],
+    )
+    def test_get_names(self, example_klines, ti: TechnicalIndicator, expected):
+        indicator = ti.calculate(example_klines)
+
+        assert ti.get_names() == expected
+        assert indicator.columns.tolist() == expected
+
+    @pytest.mark.parametrize(
+        "ti, expected", [(MACD(), 34), (BBANDS(), 5), (STOCH(), 18), (ATR(), 15)]
+    )
+    def test_get_min_len(self, example_klines, ti: TechnicalIndicator, expected):
+        indicator = ti.calculate(example_klines.head(expected))
+
+        assert ti.get_min_len() == expected
+        assert indicator.iloc[-1].notna().all()
+        assert indicator.iloc[:-1].isna().any(axis=1).all()
+        with pytest.raises(ValueError):
+            ti.calculate(example_klines.head(expected - 1))
+
+    @pytest.mark.parametrize("ti", MULTI_OUTPUT_TIS)
+    def test_outputs_are_one_block(self, example_klines, ti: TechnicalIndicator):
+        indicator = ti.calculate(example_klines)
+
+        values = indicator.to_numpy()
+
+        # Only a DataFrame of a single block returns its values without copying.
+        for name in ti.get_names():
+            assert np.shares_memory(values, indicator[name].to_numpy())
+
+    @pytest.mark.parametrize("ti", MULTI_OUTPUT_TIS)
+    def test_offset(self, example_klines, ti: TechnicalIndicator):
+        shifted = type(ti)(**{**ti.get_params(), "offset": 2})
+
+        indicator = shifted.calculate(example_klines)
+
+        pd.testing.assert_frame_equal(indicator, ti.calculate(example_klines).shift(2))
+
+    @pytest.mark.parametrize("ti", MULTI_OUTPUT_TIS)
+    def test_compact_is_float32(self, example_klines, ti: TechnicalIndicator):
+        indicator = ti.calculate(to_compact(example_klines))
+
+        assert (indicator.dtypes == np.float32).all()
+
+    @pytest.mark.parametrize("ti", MULTI_OUTPUT_TIS)
+    def test_update_not_supported(self, example_klines, ti: TechnicalIndicator):
+        assert not ti.supports_update()
+        with pytest.raises(ValueError):
+            ti.init_update(example_klines)
+
+    @pytest.mark.parametrize("ti", [MACD, BBANDS, STOCH, ATR])
+    def test_invalid_backend(self, ti):
+        with pytest.raises(ValueError):
+            ti(backend="invalid")
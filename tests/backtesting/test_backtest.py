@@ -0,0 +1,114 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis import *
+from py_trading_lib.backtesting import *
+from py_trading_lib.orders.orders import ORDER_CODES, OrderLongClose, OrderLongOpen
+
+
+@pytest.fixture
+def example_data() -> pd.DataFrame:
+    data = {
+        "TIME": [1, 2, 3, 4, 5, 6],
+        "OPEN": [10.0, 11.0, 12.0, 13.0, 14.0, 15.0],
+        "HIGH": [10.0, 11.0, 12.0, 13.0, 14.0, 15.0],
+        "LOW": [10.0, 11.0, 12.0, 13.0, 14.0, 15.0],
+        "CLOSE": [10.5, 11.5, 12.5, 13.5, 14.5, 15.5],
+        "VOLUME": [1.0, 1.0, 1.0, 1.0, 1.0, 1.0],
+        "open": [True, False, False, True, False, False],
+        "close": [False, False, True, False, False, False],
+    }
+    return pd.DataFrame(data)
+
+
+class TestBacktest:
+    def test_positions_next_open(self, example_data: pd.DataFrame):
+        result = Backtest("open", "close").run(example_data)
+
+        assert result.positions.tolist() == [0, 1, 1, 0, 1, 1]
+
+    def test_positions_close(self, example_data: pd.DataFrame):
+        result = Backtest("open", "close", fill="close").run(example_data)
+
+        assert result.positions.tolist() == [1, 1, 0, 1, 1, 1]
+
+    def test_both_signals_keep_position(self, example_data: pd.DataFrame):
+        example_data.loc[2, "open"] = True
+
+        result = Backtest("open", "close", fill="close").run(example_data)
+
+        assert result.positions.tolist() == [1, 1, 1, 1, 1, 1]
+
+    def test_fills(self, example_data: pd.DataFrame):
+        open_code = ORDER_CODES[OrderLongOpen]
+        close_code = ORDER_CODES[OrderLongClose]
+        expected = pd.DataFrame(
+            {
+                "TIME": [2, 4, 5],
+                "PRICE": [11.0, 13.0, 14.0],
+                "ORDER": np.array([open_code, close_code, open_code], dtype=np.int8),
+            }
+        )
+
+        result = Backtest("open", "close").run(example_data)
+
+        pd.testing.assert_frame_equal(result.fills, expected)
+
+    def test_equity(self, example_data: pd.DataFrame):
+        expected = [1.0, 11.5 / 11, 12.5 / 11, 13 / 11, 13 / 11 * 14.5 / 14]
+        expected.append(expected[-1] * 15.5 / 14.5)
+
+        result = Backtest("open", "close").run(example_data)
+
+        assert result.equity.tolist() == pytest.approx(expected, rel=1e-12)
+
+    def test_trades(self, example_data: pd.DataFrame):
+        expected = pd.DataFrame(
+            {
+                "ENTRY_TIME": [2, 5],
+                "ENTRY_PRICE": [11.0, 14.0],
+                "EXIT_TIME": [4, 6],
+                "EXIT_PRICE": [13.0, 15.5],
+                "RETURN": [13 / 11 - 1, 15.5 / 14 - 1],
+                "IS_OPEN": [False, True],
+            }
+        )
+
+        result = Backtest("open", "close").run(example_data)
+
+        pd.testing.assert_frame_equal(result.trades, expected)
+
+    def test_fee(self, example_data: pd.DataFrame):
+        fee = 0.01
+
+        result = Backtest("open", "close", fee=fee).run(example_data)
+
+        assert result.trades["RETURN"][0] == pytest.approx(13 / 11 * (1 - fee) ** 2 - 1)
+        assert result.equity[3] == pytest.approx(13 / 11 * (1 - fee) ** 2)
+
+    def test_equity_matches_trades(self, example_klines: pd.DataFrame):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(10))[0]
+        above = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+        below = analysis.add_condition(CheckRelation("CLOSE", "<", sma))
+        open_signal = analysis.add_condition(CheckAllTrue([above]))
+        close_signal = analysis.add_condition(CheckAllTrue([below]))
+        data = analysis.calculate_analysis_data(example_klines)
+
+        result = Backtest(open_signal, close_signal, fee=0.001).run(data)
+
+        total_return = (result.trades["RETURN"] + 1).prod()
+        assert result.equity.iloc[-1] == pytest.approx(total_return, rel=1e-9)
+
+    def test_signal_not_bool(self, example_data: pd.DataFrame):
+        example_data["open"] = example_data["open"].astype("int64")
+
+        with pytest.raises(TypeError):
+            Backtest("open", "close").run(example_data)
+
+    @pytest.mark.parametrize("kwargs", [{"fill": "open"}, {"fee": 1}, {"fee": -0.1}])
+    def test_invalid_setup(self, kwargs):
+        with pytest.raises(ValueError):
+            Backtest("open", "close", **kwargs)
@@ -0,0 +1,112 @@
+import pytest
+
+import pandas as pd
+
+from py_trading_lib.analysis import *
+from py_trading_lib.backtesting import *
+import py_trading_lib.backtesting.sweep as sweep_module
+from py_trading_lib.data_handler import LocalKlines
+
+
+@pytest.fixture(scope="module")
+def sweep_results(sweep_klines: pd.DataFrame) -> pd.DataFrame:
+    sweep = ParameterSweep([5, 20], [7, 14], [40, 60], fee=0.001)
+    return sweep.run(sweep_klines, max_workers=2)
+
+
+@pytest.fixture(scope="module")
+def sweep_klines() -> pd.DataFrame:
+    klines = LocalKlines().get_tohlcv_from_csv("./example_klines/BTC_USDT.csv")
+    return klines.tail(1000).reset_index(drop=True)
+
+
+def _run_single(tohlcv: pd.DataFrame, sma_length, rsi_length, rsi_threshold):
+    analysis = Analysis()
+    sma = analysis.add_ti(SMA(sma_length))[0]
+    rsi = analysis.add_ti(RSI(rsi_length))[0]
+    above = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+    oversold = analysis.add_condition(CheckRelation(rsi, "<", rsi_threshold))
+    below = analysis.add_condition(CheckRelation("CLOSE", "<", sma))
+    open_signal = analysis.add_condition(CheckAllTrue([above, oversold]))
+    close_signal = analysis.add_condition(CheckAllTrue([below]))
+    data = analysis.calculate_analysis_data(tohlcv)
+    return Backtest(open_signal, close_signal, fee=0.001).run(data)
+
+
+class TestParameterSweep:
+    def test_table(self, sweep_results: pd.DataFrame):
+        expected_cols = [
+            "SMA_LENGTH",
+            "RSI_LENGTH",
+            "RSI_THRESHOLD",
+            "TOTAL_RETURN",
+            "MAX_DRAWDOWN",
+            "N_TRADES",
+            "EXPOSURE",
+        ]
+
+        assert sweep_results.columns.tolist() == expected_cols
+        assert len(sweep_results) == 8
+        assert sweep_results["SMA_LENGTH"].is_monotonic_increasing
+
+    def test_equals_single_backtests(
+        self, sweep_results: pd.DataFrame, sweep_klines: pd.DataFrame
+    ):
+        for row in sweep_results.itertuples():
+            result = _run_single(
+                sweep_klines, row.SMA_LENGTH, row.RSI_LENGTH, row.RSI_THRESHOLD
+            )
+
+            assert row.TOTAL_RETURN == result.equity.iloc[-1] - 1
+            assert row.N_TRADES == len(result.trades)
+            assert row.EXPOSURE == result.positions.mean()
+
+    @pytest.mark.parametrize("rsi_lengths, max_workers", [([7, 14], 1), ([14], None)])
+    def test_in_process_equals_pool(
+        self,
+        sweep_results: pd.DataFrame,
+        sweep_klines: pd.DataFrame,
+        monkeypatch,
+        rsi_lengths,
+        max_workers,
+    ):
+        sweep = ParameterSweep([5, 20], rsi_lengths, [40, 60], fee=0.001)
+        expected = sweep_results[sweep_results["RSI_LENGTH"].isin(rsi_lengths)]
+
+        def no_pool(*args, **kwargs):
+            raise AssertionError("The sweep must not start a process pool.")
+
+        monkeypatch.setattr(sweep_module, "ProcessPoolExecutor", no_pool)
+        results = sweep.run(sweep_klines, max_workers)
+
+        pd.testing.assert_frame_equal(results, expected.reset_index(drop=True))
+
+    def test_invalid_max_workers(self, sweep_klines: pd.DataFrame):
+        sweep = ParameterSweep([5], [14], [30])
+
+        with pytest.raises(ValueError):
+            sweep.run(sweep_klines, max_workers=0)
+
+    def test_insufficient_klines(self, insufficient_klines: pd.DataFrame):
+        sweep = ParameterSweep([5], [14], [30])
+
+        with pytest.raises(ValueError):
+            sweep.run(insufficient_klines)
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"sma_lengths": []},
+            {"rsi_lengths": [0]},
+            {"rsi_thresholds": []},
+            {"rsi_operator": "!="},
+            {"fill": "open"},
+            {"fee": 1},
+        ],
+    )
+    def test_invalid_setup(self, kwargs):
+        params = {"sma_lengths": [5], "rsi_lengths": [14], "rsi_thresholds": [30]}
+        params.update(kwargs)
+
+        with pytest.raises(ValueError):
+            ParameterSweep(**params)
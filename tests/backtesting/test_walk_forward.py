@@ -0,0 +1,123 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis import *
+from py_trading_lib.backtesting import *
+import py_trading_lib.backtesting.walk_forward as walk_forward_module
+from py_trading_lib.data_handler import LocalKlines
+
+
+@pytest.fixture(scope="module")
+def walk_forward_klines() -> pd.DataFrame:
+    klines = LocalKlines().get_tohlcv_from_csv("./example_klines/BTC_USDT.csv")
+    return klines.tail(1000).reset_index(drop=True)
+
+
+@pytest.fixture
+def sma_strategy():
+    analysis = Analysis()
+    sma = analysis.add_ti(SMA(20))[0]
+    above = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+    below = analysis.add_condition(CheckRelation("CLOSE", "<", sma))
+    open_signal = analysis.add_condition(CheckAllTrue([above]))
+    close_signal = analysis.add_condition(CheckAllTrue([below]))
+    return analysis, Backtest(open_signal, close_signal, fee=0.001)
+
+
+class TestWalkForward:
+    @pytest.mark.parametrize(
+        "kwargs, expected",
+        [
+            ({"window_size": 4}, [(0, 4), (4, 8)]),
+            ({"window_size": 4, "step": 3}, [(0, 4), (3, 7), (6, 10)]),
+            (
+                {"window_size": 4, "step": 3, "anchored": True},
+                [(0, 4), (0, 7), (0, 10)],
+            ),
+        ],
+    )
+    def test_get_windows(self, sma_strategy, kwargs, expected):
+        walk_forward = WalkForward(*sma_strategy, **kwargs)
+
+        assert walk_forward.get_windows(10) == expected
+
+    def test_run_equals_single_backtests(
+        self, sma_strategy, walk_forward_klines: pd.DataFrame
+    ):
+        analysis, backtest = sma_strategy
+        walk_forward = WalkForward(analysis, backtest, window_size=300, step=100)
+
+        results = walk_forward.run(walk_forward_klines, max_workers=2, chunksize=3)
+
+        assert results.columns.tolist() == [
+            "START",
+            "STOP",
+            "START_TIME",
+            "END_TIME",
+            "TOTAL_RETURN",
+            "MAX_DRAWDOWN",
+            "N_TRADES",
+            "EXPOSURE",
+        ]
+        assert len(results) == 8
+        for row in results.itertuples():
+            window = walk_forward_klines.iloc[row.START : row.STOP]
+            result = backtest.run(analysis.calculate_analysis_data(window))
+
+            assert row.START_TIME == window["TIME"].iloc[0]
+            assert row.END_TIME == window["TIME"].iloc[-1]
+            assert row.TOTAL_RETURN == pytest.approx(result.equity.iloc[-1] - 1)
+            assert row.N_TRADES == len(result.trades)
+            assert row.EXPOSURE == result.positions.mean()
+
+    @pytest.mark.parametrize("max_workers, chunksize", [(1, 3), (None, 16)])
+    def test_run_in_process_equals_pool(
+        self,
+        sma_strategy,
+        walk_forward_klines: pd.DataFrame,
+        monkeypatch,
+        max_workers,
+        chunksize,
+    ):
+        walk_forward = WalkForward(*sma_strategy, window_size=300, step=100)
+        expected = walk_forward.run(walk_forward_klines, max_workers=2, chunksize=3)
+
+        def no_pool(*args, **kwargs):
+            raise AssertionError("The walk forward must not start a process pool.")
+
+        monkeypatch.setattr(walk_forward_module, "ProcessPoolExecutor", no_pool)
+        results = walk_forward.run(walk_forward_klines, max_workers, chunksize)
+
+        pd.testing.assert_frame_equal(results, expected)
+
+    def test_run_invalid_max_workers(
+        self, sma_strategy, walk_forward_klines: pd.DataFrame
+    ):
+        walk_forward = WalkForward(*sma_strategy, window_size=300)
+
+        with pytest.raises(ValueError):
+            walk_forward.run(walk_forward_klines, max_workers=0)
+
+    def test_run_window_smaller_than_min_len(
+        self, sma_strategy, walk_forward_klines: pd.DataFrame
+    ):
+        walk_forward = WalkForward(*sma_strategy, window_size=10)
+
+        with pytest.raises(ValueError):
+            walk_forward.run(walk_forward_klines)
+
+    def test_run_insufficient_klines(self, sma_strategy, walk_forward_klines):
+        walk_forward = WalkForward(*sma_strategy, window_size=2000)
+
+        with pytest.raises(ValueError):
+            walk_forward.run(walk_forward_klines)
+
+    @pytest.mark.parametrize("kwargs", [{"window_size": 0}, {"step": 0}])
+    def test_invalid_setup(self, sma_strategy, kwargs):
+        params = {"window_size": 100}
+        params.update(kwargs)
+
+        with pytest.raises(ValueError):
+            WalkForward(*sma_strategy, **params)
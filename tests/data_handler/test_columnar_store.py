@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import py_trading_lib.data_handler.columnar_store as columnar
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"A": np.arange(10, dtype=np.int64), "B": np.linspace(0, 1, 10)}
+    )
+
+
+class TestColumnarStore:
+    def test_load_columns_equals_saved(self, df: pd.DataFrame, tmp_path):
+        directory = str(tmp_path / "store")
+
+        columnar.save_columns(df, directory, {"key": 1})
+        loaded, metadata = columnar.load_columns(directory)
+
+        pd.testing.assert_frame_equal(loaded, df)
+        assert metadata == {"key": 1}
+
+    def test_save_columns_replaces_store(self, df: pd.DataFrame, tmp_path):
+        directory = str(tmp_path / "store")
+        columnar.save_columns(df, directory, {"key": 1})
+
+        columnar.save_columns(df * 2, directory, {"key": 2})
+        loaded, metadata = columnar.load_columns(directory)
+
+        pd.testing.assert_frame_equal(loaded, df * 2)
+        assert metadata == {"key": 2}
+        # Only the meta file and the current version are left.
+        assert len(os.listdir(directory)) == 2
+
+    def test_save_columns_keeps_other_entries(self, df: pd.DataFrame, tmp_path):
+        directory = tmp_path / "store"
+        (directory / "data").mkdir(parents=True)
+        (directory / "data" / "0.npy").write_bytes(b"user data")
+        (directory / "notes.txt").write_text("user data")
+
+        columnar.save_columns(df, str(directory), {})
+        columnar.save_columns(df * 2, str(directory), {})
+
+        assert (directory / "data" / "0.npy").read_bytes() == b"user data"
+        assert (directory / "notes.txt").read_text() == "user data"
+        assert len(os.listdir(directory)) == 4
+
+    def test_load_columns_keeps_mapped_old_version(self, df: pd.DataFrame, tmp_path):
+        directory = str(tmp_path / "store")
+        columnar.save_columns(df, directory, {})
+        old, _ = columnar.load_columns(directory)
+
+        columnar.save_columns(df * 2, directory, {})
+
+        pd.testing.assert_frame_equal(old, df)
+
+    def test_load_columns_retries_replaced_store(
+        self, df: pd.DataFrame, tmp_path, monkeypatch
+    ):
+        directory = str(tmp_path / "store")
+        columnar.save_columns(df, directory, {"key": 1})
+        old_meta = columnar._load_meta(directory)
+        columnar.save_columns(df * 2, directory, {"key": 2})
+        load_meta = columnar._load_meta
+        calls = []
+
+        def load_stale_meta(directory: str):
+            # The first reader sees the meta file from before the replacement.
+            calls.append(directory)
+            return old_meta if len(calls) == 1 else load_meta(directory)
+
+        monkeypatch.setattr(columnar, "_load_meta", load_stale_meta)
+        loaded, metadata = columnar.load_columns(directory)
+
+        pd.testing.assert_frame_equal(loaded, df * 2)
+        assert metadata == {"key": 2}
+
+    def test_load_columns_removed_store(self, df: pd.DataFrame, tmp_path):
+        directory = str(tmp_path / "store")
+        columnar.save_columns(df, directory, {})
+
+        columnar.remove_store(directory)
+
+        with pytest.raises(FileNotFoundError):
+            columnar.load_columns(directory)
+        assert columnar.load_metadata(directory) is None
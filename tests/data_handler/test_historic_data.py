@@ -1,6 +1,21 @@
+import os
+import shutil
+
 import pytest
+import numpy as np
+import pandas as pd
 
+import py_trading_lib.data_handler.columnar_store as columnar
 from py_trading_lib.data_handler.historic_data import *
+from py_trading_lib.data_handler.time_index import find_gaps
+from py_trading_lib.utils.utils import get_time, is_compact
+
+
+@pytest.fixture
+def csv_copy(tmp_path) -> str:
+    path = str(tmp_path / "BTC_USDT.csv")
+    shutil.copy("./example_klines/BTC_USDT.csv", path)
+    return path
 
 
 class TestLocalKlines:
@@ -38,3 +53,278 @@ class TestLocalKlines:
     def test_get_tohlcv_from_csv_broken_data(self):
         with pytest.raises(TypeError):
             LocalKlines().get_tohlcv_from_csv("./tests/data_handler/broken_data.csv")
+
+
+class TestLocalKlinesBinaryCache:
+    def test_get_tohlcv_from_csv_equals_csv(self, csv_copy: str):
+        expected = LocalKlines().get_tohlcv_from_csv(csv_copy)
+
+        first = LocalKlines(use_binary_cache=True).get_tohlcv_from_csv(csv_copy)
+        second = LocalKlines(use_binary_cache=True).get_tohlcv_from_csv(csv_copy)
+
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+
+    def test_get_tohlcv_from_csv_creates_sidecar(self, csv_copy: str):
+        LocalKlines(use_binary_cache=True).get_tohlcv_from_csv(csv_copy)
+
+        assert os.path.isdir(
+            os.path.join(os.path.dirname(csv_copy), ".BTC_USDT.csv.klines")
+        )
+
+    def test_get_tohlcv_from_csv_serves_sidecar(self, csv_copy: str, monkeypatch):
+        klines = LocalKlines(use_binary_cache=True)
+        klines.get_tohlcv_from_csv(csv_copy)
+
+        def read_csv(*args, **kwargs):
+            raise AssertionError("The CSV must not be parsed again.")
+
+        monkeypatch.setattr(pd, "read_csv", read_csv)
+        data = klines.get_tohlcv_from_csv(csv_copy)
+
+        assert len(data) == 8640
+
+    def test_get_tohlcv_from_csv_is_copy_on_write(self, csv_copy: str):
+        klines = LocalKlines(use_binary_cache=True)
+        klines.get_tohlcv_from_csv(csv_copy)
+
+        data = klines.get_tohlcv_from_csv(csv_copy)
+        data.loc[0, "CLOSE"] = -1
+        data = klines.get_tohlcv_from_csv(csv_copy)
+
+        assert data.loc[0, "CLOSE"] == 27414.93
+
+    def test_get_tohlcv_from_csv_invalidates_sidecar(self, csv_copy: str):
+        klines = LocalKlines(use_binary_cache=True)
+        klines.get_tohlcv_from_csv(csv_copy)
+
+        with open(csv_copy, "a") as file:
+            file.write("1710237600000,1,1,1,1,1\n")
+        data = klines.get_tohlcv_from_csv(csv_copy)
+
+        assert len(data) == 8641
+        assert data["CLOSE"].iloc[-1] == 1
+
+    def test_get_tohlcv_from_csv_sidecar_replaced_meanwhile(
+        self, csv_copy: str, monkeypatch
+    ):
+        klines = LocalKlines(use_binary_cache=True)
+        expected = klines.get_tohlcv_from_csv(csv_copy)
+
+        def load_columns(*args, **kwargs):
+            raise FileNotFoundError("The sidecar was replaced.")
+
+        monkeypatch.setattr(columnar, "load_columns", load_columns)
+        data = klines.get_tohlcv_from_csv(csv_copy)
+
+        pd.testing.assert_frame_equal(data, expected)
+
+    def test_get_tohlcv_from_csv_cache_dir(self, csv_copy: str, tmp_path):
+        cache_dir = tmp_path / "cache"
+        klines = LocalKlines(use_binary_cache=True, cache_dir=str(cache_dir))
+
+        klines.get_tohlcv_from_csv(csv_copy)
+
+        assert len(os.listdir(cache_dir)) == 1
+
+    @pytest.mark.parametrize(
+        "path, exception",
+        [
+            ("./tests/data_handler/missing_data.csv", ValueError),
+            ("./tests/data_handler/broken_data.csv", TypeError),
+        ],
+    )
+    def test_get_tohlcv_from_csv_validates_before_caching(
+        self, path: str, exception, tmp_path
+    ):
+        klines = LocalKlines(use_binary_cache=True, cache_dir=str(tmp_path))
+
+        with pytest.raises(exception):
+            klines.get_tohlcv_from_csv(path)
+        assert os.listdir(tmp_path) == []
+
+
+class TestLocalKlinesCompact:
+    @pytest.mark.parametrize("use_binary_cache", [False, True])
+    def test_get_tohlcv_from_csv(self, csv_copy: str, use_binary_cache: bool):
+        full = LocalKlines().get_tohlcv_from_csv(csv_copy)
+        klines = LocalKlines(use_binary_cache=use_binary_cache, compact=True)
+
+        for _ in range(2):
+            compact = klines.get_tohlcv_from_csv(csv_copy)
+
+            assert compact["TIME"].dtype == np.int32
+            assert (compact.drop(columns="TIME").dtypes == np.float32).all()
+            assert compact.memory_usage(index=False).sum() * 2 == (
+                full.memory_usage(index=False).sum()
+            )
+            np.testing.assert_array_equal(get_time(compact), full["TIME"])
+
+    def test_binary_cache_separate_sidecar(self, csv_copy: str):
+        LocalKlines(use_binary_cache=True, compact=True).get_tohlcv_from_csv(csv_copy)
+
+        full = LocalKlines(use_binary_cache=True).get_tohlcv_from_csv(csv_copy)
+
+        assert full["TIME"].dtype == np.int64
+        assert not is_compact(full)
+
+    @pytest.mark.parametrize("use_binary_cache", [False, True])
+    @pytest.mark.parametrize("offset", [-1, 0, 1])
+    def test_range(self, tmp_path, use_binary_cache: bool, offset: int):
+        path = "./example_klines/BTC_USDT.csv"
+        full = LocalKlines().get_tohlcv_from_csv(path)
+        start_time = int(full["TIME"][1000]) + offset
+        end_time = int(full["TIME"][2000]) + offset
+        klines = LocalKlines(use_binary_cache, cache_dir=str(tmp_path), compact=True)
+
+        compact = klines.get_tohlcv_from_csv(path, start_time, end_time)
+
+        expected = full[(full["TIME"] >= start_time) & (full["TIME"] <= end_time)]
+        np.testing.assert_array_equal(get_time(compact), expected["TIME"])
+
+
+@pytest.fixture(params=[False, True], ids=["csv", "binary_cache"])
+def local_klines(request, tmp_path) -> LocalKlines:
+    return LocalKlines(use_binary_cache=request.param, cache_dir=str(tmp_path))
+
+
+@pytest.fixture(scope="module")
+def all_klines() -> pd.DataFrame:
+    return LocalKlines().get_tohlcv_from_csv("./example_klines/BTC_USDT.csv")
+
+
+class TestLocalKlinesRange:
+    path = "./example_klines/BTC_USDT.csv"
+
+    def test_last_n(self, local_klines: LocalKlines, all_klines: pd.DataFrame):
+        expected = all_klines.tail(400).reset_index(drop=True)
+
+        klines = local_klines.get_tohlcv_from_csv(self.path, last_n=400)
+
+        pd.testing.assert_frame_equal(klines, expected)
+
+    def test_last_n_more_than_available(
+        self, local_klines: LocalKlines, all_klines: pd.DataFrame
+    ):
+        klines = local_klines.get_tohlcv_from_csv(self.path, last_n=100000)
+
+        pd.testing.assert_frame_equal(klines, all_klines)
+
+    @pytest.mark.parametrize("offset", [-1, 0, 1])
+    def test_start_and_end_time(
+        self, local_klines: LocalKlines, all_klines: pd.DataFrame, offset: int
+    ):
+        start_time = int(all_klines["TIME"][1000]) + offset
+        end_time = int(all_klines["TIME"][2000]) + offset
+        expected = all_klines[
+            (all_klines["TIME"] >= start_time) & (all_klines["TIME"] <= end_time)
+        ].reset_index(drop=True)
+
+        klines = local_klines.get_tohlcv_from_csv(self.path, start_time, end_time)
+
+        pd.testing.assert_frame_equal(klines, expected)
+
+    def test_end_time_and_last_n(
+        self, local_klines: LocalKlines, all_klines: pd.DataFrame
+    ):
+        end_time = int(all_klines["TIME"][2000])
+        expected = all_klines.iloc[1991:2001].reset_index(drop=True)
+
+        klines = local_klines.get_tohlcv_from_csv(
+            self.path, end_time=end_time, last_n=10
+        )
+
+        pd.testing.assert_frame_equal(klines, expected)
+
+    def test_start_time_before_first_kline(
+        self, local_klines: LocalKlines, all_klines: pd.DataFrame
+    ):
+        start_time = int(all_klines["TIME"][0]) - 1
+
+        klines = local_klines.get_tohlcv_from_csv(self.path, start_time=start_time)
+
+        pd.testing.assert_frame_equal(klines, all_klines)
+
+    def test_empty_range(self, local_klines: LocalKlines, all_klines: pd.DataFrame):
+        start_time = int(all_klines["TIME"].iloc[-1]) + 1
+
+        with pytest.raises(ValueError):
+            local_klines.get_tohlcv_from_csv(self.path, start_time=start_time)
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"last_n": 0}, {"start_time": 2, "end_time": 1}]
+    )
+    def test_invalid_range(self, local_klines: LocalKlines, kwargs):
+        with pytest.raises(ValueError):
+            local_klines.get_tohlcv_from_csv(self.path, **kwargs)
+
+    def test_last_n_without_trailing_newline(self, tmp_path):
+        path = tmp_path / "klines.csv"
+        path.write_text("TIME,OPEN,HIGH,LOW,CLOSE,VOLUME\n1,1,1,1,1,1\n2,2,2,2,2,2")
+
+        klines = LocalKlines().get_tohlcv_from_csv(str(path), last_n=1)
+
+        assert klines["TIME"].tolist() == [2]
+        assert klines["CLOSE"].dtype == "float64"
+
+    def test_unsorted_time(self, tmp_path):
+        path = tmp_path / "klines.csv"
+        path.write_text(
+            "TIME,OPEN,HIGH,LOW,CLOSE,VOLUME\n2,1,1,1,1,1\n1,2,2,2,2,2\n3,3,3,3,3,3\n"
+        )
+
+        with pytest.raises(ValueError):
+            LocalKlines().get_tohlcv_from_csv(str(path), last_n=3)
+
+
+class TestLocalKlinesTimeIndex:
+    @pytest.mark.parametrize("use_binary_cache", [False, True])
+    def test_gaps_raise(self, csv_copy: str, use_binary_cache: bool):
+        # The example klines miss 361 hours and repeat one.
+        klines = LocalKlines(use_binary_cache, interval="1h")
+
+        with pytest.raises(ValueError):
+            klines.get_tohlcv_from_csv(csv_copy)
+
+    def test_regular_range_passes(self, all_klines: pd.DataFrame):
+        start_time = int(all_klines["TIME"][100])
+
+        klines = LocalKlines(interval="1h").get_tohlcv_from_csv(
+            "./example_klines/BTC_USDT.csv", start_time, last_n=500
+        )
+
+        assert len(klines) == 500
+
+    @pytest.mark.parametrize("use_binary_cache", [False, True])
+    def test_fill_gaps(self, csv_copy: str, use_binary_cache: bool):
+        klines = LocalKlines(use_binary_cache, interval="1h", fill_gaps=True)
+
+        for _ in range(2):
+            filled = klines.get_tohlcv_from_csv(csv_copy)
+
+            assert len(filled) == 8640 + 361 - 1
+            assert find_gaps(filled, "1h").is_regular()
+            assert isinstance(filled.index, pd.RangeIndex)
+
+    def test_fill_gaps_without_interval_raises(self):
+        with pytest.raises(ValueError):
+            LocalKlines(fill_gaps=True)
+
+    @pytest.mark.parametrize("use_binary_cache", [False, True])
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_time_index(
+        self, csv_copy: str, all_klines: pd.DataFrame, use_binary_cache, compact
+    ):
+        klines = LocalKlines(use_binary_cache, compact=compact, time_index=True)
+
+        for _ in range(2):
+            indexed = klines.get_tohlcv_from_csv(csv_copy, last_n=1000)
+
+            assert isinstance(indexed.index, pd.DatetimeIndex)
+            np.testing.assert_array_equal(
+                indexed.index.asi8 // 1_000_000, all_klines["TIME"].tail(1000)
+            )
+            window = indexed.loc[indexed.index[10] : indexed.index[20]]
+            np.testing.assert_array_equal(
+                get_time(window), all_klines["TIME"].tail(1000)[10:21]
+            )
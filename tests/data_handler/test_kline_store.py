@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from py_trading_lib.data_handler.kline_store import *
+import py_trading_lib.utils.sanity_checks as sanity
+import py_trading_lib.utils.utils as utils
+
+
+def as_stored(klines: pd.DataFrame) -> pd.DataFrame:
+    expected = klines.astype({"TIME": "int64"}).reset_index(drop=True)
+    return expected.astype({col: "float64" for col in expected.columns[1:]})
+
+
+def shifted(klines: pd.DataFrame, factor: float) -> pd.DataFrame:
+    other = klines.copy()
+    other[["OPEN", "HIGH", "LOW", "CLOSE"]] *= factor
+    return other
+
+
+class TestKlineStore:
+    def test_append_and_get_tohlcv(self, example_klines: pd.DataFrame, tmp_path):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines)
+        store.append("ETH/USDT", "1h", shifted(example_klines, 0.1))
+
+        pd.testing.assert_frame_equal(
+            store.get_tohlcv("BTC/USDT", "1h"), as_stored(example_klines)
+        )
+        pd.testing.assert_frame_equal(
+            store.get_tohlcv("ETH/USDT", "1h"),
+            as_stored(shifted(example_klines, 0.1)),
+        )
+        assert store.get_keys() == [("BTC/USDT", "1h"), ("ETH/USDT", "1h")]
+        assert ("BTC/USDT", "4h") not in store
+        assert len(store) == 2 * len(example_klines)
+
+    def test_reopen(self, example_klines: pd.DataFrame, tmp_path):
+        KlineStore(str(tmp_path)).append("BTC/USDT", "1h", example_klines)
+
+        store = KlineStore(str(tmp_path))
+
+        pd.testing.assert_frame_equal(
+            store.get_tohlcv("BTC/USDT", "1h"), as_stored(example_klines)
+        )
+
+    @pytest.mark.parametrize(
+        "start_time, end_time, last_n",
+        [
+            (None, None, 10),
+            (None, None, 1000),
+            ("first", None, None),
+            (None, "last", None),
+            ("first", "last", 5),
+            ("between", "between", None),
+        ],
+    )
+    def test_range_over_interleaved_appends(
+        self, example_klines: pd.DataFrame, tmp_path, start_time, end_time, last_n
+    ):
+        store = KlineStore(str(tmp_path))
+        for chunk in np.array_split(np.arange(len(example_klines)), 4):
+            store.append("BTC/USDT", "1h", example_klines.iloc[chunk])
+            store.append("ETH/USDT", "1h", shifted(example_klines.iloc[chunk], 0.1))
+        time = example_klines["TIME"]
+        times = {
+            "first": int(time.iloc[50]),
+            "last": int(time.iloc[320]),
+            # Between two klines, so the borders are found by the binary search only.
+            "between": int(time.iloc[120]) + 1,
+            None: None,
+        }
+        start_time, end_time = times[start_time], times[end_time]
+        if end_time is not None and start_time == end_time:
+            end_time = int(time.iloc[200]) + 1
+
+        data = store.get_tohlcv("BTC/USDT", "1h", start_time, end_time, last_n)
+
+        expected = example_klines
+        if start_time is not None:
+            expected = expected[expected["TIME"] >= start_time]
+        if end_time is not None:
+            expected = expected[expected["TIME"] <= end_time]
+        if last_n is not None:
+            expected = expected.tail(last_n)
+        pd.testing.assert_frame_equal(data, as_stored(expected))
+
+    def test_contiguous_klines_are_views(self, example_klines: pd.DataFrame, tmp_path):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines.head(200))
+        store.append("BTC/USDT", "1h", example_klines.tail(200))
+        store.append("ETH/USDT", "1h", example_klines)
+
+        arrays = store.get_arrays("BTC/USDT", "1h", last_n=300)
+        tohlcv = store.get_tohlcv("BTC/USDT", "1h", last_n=300)
+
+        for name, values in arrays.items():
+            assert isinstance(values.base, np.memmap) or isinstance(
+                values.base.base, np.memmap
+            )
+            assert not values.flags.writeable
+            assert np.shares_memory(tohlcv[name].to_numpy(), values)
+        assert sanity.is_validated(tohlcv)
+
+    def test_append_does_not_rewrite(self, example_klines: pd.DataFrame, tmp_path):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines.head(200))
+        before = store.get_tohlcv("BTC/USDT", "1h")
+        expected = before.copy()
+
+        store.append("BTC/USDT", "1h", example_klines.tail(200))
+
+        pd.testing.assert_frame_equal(before, expected)
+        pd.testing.assert_frame_equal(
+            store.get_tohlcv("BTC/USDT", "1h"), as_stored(example_klines)
+        )
+
+    def test_interrupted_append_is_invisible(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines.head(200))
+        # Simulates an append which was interrupted before the index was written.
+        with open(tmp_path / "CLOSE.bin", "ab") as file:
+            np.ones(7).tofile(file)
+
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines.tail(200))
+
+        pd.testing.assert_frame_equal(
+            store.get_tohlcv("BTC/USDT", "1h"), as_stored(example_klines)
+        )
+
+    def test_append_compact(self, example_klines: pd.DataFrame, tmp_path):
+        store = KlineStore(str(tmp_path))
+
+        store.append("BTC/USDT", "1h", utils.to_compact(example_klines))
+
+        np.testing.assert_array_equal(
+            store.get_arrays("BTC/USDT", "1h")["TIME"], example_klines["TIME"]
+        )
+
+    def test_append_overlapping_raises(self, example_klines: pd.DataFrame, tmp_path):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines.head(200))
+
+        with pytest.raises(ValueError):
+            store.append("BTC/USDT", "1h", example_klines.iloc[150:250])
+
+    def test_append_unsorted_raises(self, example_klines: pd.DataFrame, tmp_path):
+        with pytest.raises(ValueError):
+            KlineStore(str(tmp_path)).append(
+                "BTC/USDT", "1h", example_klines.iloc[::-1]
+            )
+
+    def test_append_invalid_timeframe_raises(
+        self, example_klines: pd.DataFrame, tmp_path
+    ):
+        with pytest.raises(ValueError):
+            KlineStore(str(tmp_path)).append("BTC/USDT", "1x", example_klines)
+
+    def test_get_unknown_key_raises(self, example_klines: pd.DataFrame, tmp_path):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines)
+
+        with pytest.raises(ValueError):
+            store.get_tohlcv("BTC/USDT", "4h")
+
+    @pytest.mark.parametrize(
+        "start_time, end_time, last_n", [(None, None, 0), (10, 5, None)]
+    )
+    def test_invalid_range_raises(
+        self, example_klines: pd.DataFrame, tmp_path, start_time, end_time, last_n
+    ):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines)
+
+        with pytest.raises(ValueError):
+            store.get_tohlcv("BTC/USDT", "1h", start_time, end_time, last_n)
+
+    def test_empty_range_raises(self, example_klines: pd.DataFrame, tmp_path):
+        store = KlineStore(str(tmp_path))
+        store.append("BTC/USDT", "1h", example_klines)
+
+        with pytest.raises(ValueError):
+            store.get_tohlcv("BTC/USDT", "1h", end_time=0)
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from py_trading_lib.analysis import SMA, Analysis, CheckRelation
+from py_trading_lib.data_handler.kline_window import *
+import py_trading_lib.utils.sanity_checks as sanity
+
+
+def expected_window(klines: pd.DataFrame, start: int, end: int) -> pd.DataFrame:
+    expected = klines.iloc[start:end].astype({"TIME": "int64"})
+    expected.index = pd.RangeIndex(start, end)
+    return expected.astype({col: "float64" for col in expected.columns[1:]})
+
+
+class TestKlineWindow:
+    @pytest.mark.parametrize("n_klines", [1, 99, 100, 101, 350])
+    def test_extend(self, example_klines: pd.DataFrame, n_klines: int):
+        window = KlineWindow(100)
+
+        window.extend(example_klines.head(n_klines))
+
+        pd.testing.assert_frame_equal(
+            window.to_frame(),
+            expected_window(example_klines, max(0, n_klines - 100), n_klines),
+        )
+
+    def test_append_equals_extend(self, example_klines: pd.DataFrame):
+        window = KlineWindow(64)
+        window.extend(example_klines.head(10))
+
+        for kline in example_klines.iloc[10:250].itertuples(index=False):
+            window.append(kline)
+
+        pd.testing.assert_frame_equal(
+            window.to_frame(), expected_window(example_klines, 186, 250)
+        )
+
+    def test_views_are_contiguous_and_not_copied(self, example_klines: pd.DataFrame):
+        window = KlineWindow(100)
+        window.extend(example_klines.head(150))
+
+        close = window.get_col("CLOSE")
+        frame_close = window.to_frame()["CLOSE"].to_numpy()
+
+        assert close.flags.c_contiguous
+        assert not close.flags.writeable
+        assert np.shares_memory(close, window._prices)
+        assert np.shares_memory(frame_close, window._prices)
+
+    def test_frame_is_not_marked_validated(self, example_klines: pd.DataFrame):
+        window = KlineWindow(100)
+        window.extend(example_klines.head(150))
+
+        assert not sanity.is_validated(window.to_frame())
+
+    def test_extend_empty(self, example_klines: pd.DataFrame):
+        window = KlineWindow(100)
+        window.extend(example_klines.head(10))
+
+        window.extend(example_klines.iloc[:0])
+
+        pd.testing.assert_frame_equal(
+            window.to_frame(), expected_window(example_klines, 0, 10)
+        )
+
+    def test_indicator_on_window(self, example_klines: pd.DataFrame):
+        window = KlineWindow(50)
+        window.extend(example_klines)
+
+        sma = SMA(20).calculate(window.to_frame())
+
+        expected = example_klines["CLOSE"].iloc[-20:].mean()
+        assert sma.iloc[-1, 0] == pytest.approx(expected, rel=1e-9)
+
+    def test_for_analysis(self):
+        analysis = Analysis()
+        sma = analysis.add_ti(SMA(20))[0]
+        analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+
+        window = KlineWindow.for_analysis(analysis, margin=5)
+
+        assert window.capacity == 25
+
+    def test_append_not_chronological(self, example_klines: pd.DataFrame):
+        window = KlineWindow(10)
+        window.extend(example_klines.iloc[5:7])
+
+        with pytest.raises(ValueError):
+            window.append(example_klines.iloc[0].tolist())
+
+    def test_append_nan(self):
+        window = KlineWindow(10)
+
+        with pytest.raises(ValueError):
+            window.append([1, 1.0, 1.0, np.nan, 1.0, 1.0])
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            KlineWindow(0)
+
+    def test_unknown_col(self):
+        with pytest.raises(ValueError):
+            KlineWindow(10).get_col("SMA_20")
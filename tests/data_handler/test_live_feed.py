@@ -0,0 +1,109 @@
+import asyncio
+from typing import List
+
+import pandas as pd
+import pytest
+
+from py_trading_lib.data_handler.historic_data import LocalKlines
+from py_trading_lib.data_handler.live_feed import *
+from py_trading_lib.data_handler.replay import ReplayServer
+
+
+@pytest.fixture
+def small_csv(tmp_path) -> str:
+    path = str(tmp_path / "klines.csv")
+    klines = LocalKlines().get_tohlcv_from_csv("./example_klines/BTC_USDT.csv")
+    klines.head(200).to_csv(path, index=False)
+    return path
+
+
+async def consume(feed: KlineFeed, server: ReplayServer, drop_after=None):
+    frames: List[pd.DataFrame] = []
+    async with feed:
+        async for klines in feed:
+            frames.append(klines)
+            n_klines = sum(map(len, frames))
+            if drop_after is not None and n_klines > drop_after:
+                server.disconnect_clients()
+                drop_after = None
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestReplayFeed:
+    def test_replays_all_klines(self, small_csv: str):
+        async def run():
+            async with ReplayServer(small_csv) as server:
+                feed = SocketKlineFeed("127.0.0.1", server.port, max_queue_size=8)
+                return await consume(feed, server)
+
+        klines = asyncio.run(run())
+
+        pd.testing.assert_frame_equal(
+            klines, LocalKlines().get_tohlcv_from_csv(small_csv)
+        )
+
+    def test_batches_are_bounded(self, small_csv: str):
+        async def run():
+            async with ReplayServer(small_csv) as server:
+                sizes = []
+                feed = SocketKlineFeed("127.0.0.1", server.port, max_batch_size=16)
+                async with feed:
+                    async for klines in feed:
+                        sizes.append(len(klines))
+                return sizes
+
+        sizes = asyncio.run(run())
+
+        assert sum(sizes) == 200
+        assert max(sizes) <= 16
+
+    def test_resumes_after_reconnect(self, small_csv: str):
+        async def run():
+            # 1h klines with one kline per ms.
+            async with ReplayServer(small_csv, speed=3_600_000) as server:
+                feed = SocketKlineFeed("127.0.0.1", server.port, reconnect_delay=0)
+                klines = await consume(feed, server, drop_after=50)
+                return klines, feed.n_reconnects
+
+        klines, n_reconnects = asyncio.run(run())
+
+        assert n_reconnects == 1
+        pd.testing.assert_frame_equal(
+            klines, LocalKlines().get_tohlcv_from_csv(small_csv)
+        )
+
+    def test_reconnect_hook_stops_feed(self, small_csv: str):
+        attempts = []
+
+        async def on_reconnect(attempt: int, error: Exception) -> bool:
+            attempts.append(attempt)
+            return attempt < 3
+
+        async def run():
+            server = ReplayServer(small_csv)
+            await server.start()
+            port = server.port
+            await server.stop()
+
+            feed = SocketKlineFeed(
+                "127.0.0.1", port, reconnect_delay=0, on_reconnect=on_reconnect
+            )
+            async with feed:
+                async for _ in feed:
+                    pass
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+        assert attempts == [1, 2, 3]
+
+    def test_not_started(self):
+        async def run():
+            async for _ in SocketKlineFeed("127.0.0.1", 1):
+                pass
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+
+    def test_invalid_speed(self, small_csv: str):
+        with pytest.raises(ValueError):
+            ReplayServer(small_csv, speed=0)
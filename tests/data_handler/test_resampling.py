@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from py_trading_lib.data_handler.resampling import *
+from py_trading_lib.utils import to_compact
+
+HOUR = 3_600_000
+
+
+@pytest.fixture
+def hourly_klines() -> pd.DataFrame:
+    n = 10
+    return pd.DataFrame(
+        {
+            "TIME": np.arange(n) * HOUR,
+            "OPEN": np.arange(n, dtype="float64"),
+            "HIGH": np.arange(n) + 10.0,
+            "LOW": np.arange(n) - 10.0,
+            "CLOSE": np.arange(n) + 0.5,
+            "VOLUME": np.ones(n),
+        }
+    )
+
+
+class TestParseInterval:
+    @pytest.mark.parametrize(
+        "interval, expected", [("15m", 900_000), ("4h", 4 * HOUR), ("1d", 24 * HOUR)]
+    )
+    def test_parse(self, interval: str, expected: int):
+        assert parse_interval(interval) == expected
+
+    @pytest.mark.parametrize("interval", ["4", "h", "0h", "4y", "1.5h"])
+    def test_invalid(self, interval: str):
+        with pytest.raises(ValueError):
+            parse_interval(interval)
+
+
+class TestResampler:
+    def test_resample(self, hourly_klines: pd.DataFrame):
+        bars = Resampler("4h").resample(hourly_klines)
+
+        assert bars["TIME"].tolist() == [0, 4 * HOUR, 8 * HOUR]
+        assert bars["OPEN"].tolist() == [0, 4, 8]
+        assert bars["HIGH"].tolist() == [13, 17, 19]
+        assert bars["LOW"].tolist() == [-10, -6, -2]
+        assert bars["CLOSE"].tolist() == [3.5, 7.5, 9.5]
+        assert bars["VOLUME"].tolist() == [4, 4, 2]
+
+    def test_resample_equals_pandas(self, example_klines: pd.DataFrame):
+        time = pd.to_datetime(example_klines["TIME"], unit="ms")
+        expected = (
+            example_klines.set_index(time)
+            .resample("4h")
+            .agg(
+                {
+                    "OPEN": "first",
+                    "HIGH": "max",
+                    "LOW": "min",
+                    "CLOSE": "last",
+                    "VOLUME": "sum",
+                }
+            )
+            .dropna()
+        )
+
+        bars = Resampler("4h").resample(example_klines)
+
+        np.testing.assert_allclose(bars.iloc[:, 1:].to_numpy(), expected.to_numpy())
+
+    def test_resample_is_cached(self, hourly_klines: pd.DataFrame):
+        resampler = Resampler("4h")
+
+        assert resampler.resample(hourly_klines) is resampler.resample(hourly_klines)
+
+    def test_resample_unsorted(self, hourly_klines: pd.DataFrame):
+        with pytest.raises(ValueError):
+            Resampler("4h").resample(hourly_klines.iloc[::-1])
+
+    def test_interval_not_multiple(self):
+        with pytest.raises(ValueError):
+            Resampler("4h", base_interval="3h")
+
+    @pytest.mark.parametrize("base_interval", [None, "1h"])
+    def test_align_has_no_lookahead(self, hourly_klines: pd.DataFrame, base_interval):
+        resampler = Resampler("4h", base_interval)
+        bars = resampler.resample(hourly_klines)
+
+        aligned = resampler.align(
+            bars["TIME"].to_numpy(), bars[["CLOSE"]], hourly_klines["TIME"].to_numpy()
+        )
+
+        # With the base interval the last kline of a bucket already completes the bar.
+        if base_interval is None:
+            expected = [np.nan] * 4 + [3.5] * 4 + [7.5] * 2
+        else:
+            expected = [np.nan] * 3 + [3.5] * 4 + [7.5] * 3
+        np.testing.assert_array_equal(aligned[:, 0], expected)
+
+    @pytest.mark.parametrize("base_interval", [None, "1h"])
+    def test_update_returns_every_bar_once(
+        self, hourly_klines: pd.DataFrame, base_interval
+    ):
+        resampler = Resampler("4h", base_interval)
+        expected = resampler.resample(hourly_klines)
+
+        complete = [resampler.init_update(hourly_klines.head(3))]
+        complete += [resampler.update(hourly_klines.iloc[[i]]) for i in range(3, 10)]
+
+        # The bar of the klines 8 and 9 is still open.
+        assert [len(bars) for bars in complete[1:]] == (
+            [0, 1, 0, 0, 0, 1, 0] if base_interval is None else [1, 0, 0, 0, 1, 0, 0]
+        )
+        complete = pd.concat(complete, ignore_index=True)
+        pd.testing.assert_frame_equal(complete, expected.head(2))
+        pd.testing.assert_frame_equal(resampler.get_bars(), expected)
+
+    def test_resample_compact(self, hourly_klines: pd.DataFrame):
+        expected = Resampler("4h").resample(hourly_klines)
+
+        bars = Resampler("4h").resample(to_compact(hourly_klines))
+
+        pd.testing.assert_frame_equal(bars, expected, check_exact=False, rtol=1e-6)
+
+    def test_update_not_initialised(self, hourly_klines: pd.DataFrame):
+        with pytest.raises(RuntimeError):
+            Resampler("4h").update(hourly_klines)
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from py_trading_lib.data_handler.time_index import *
+from py_trading_lib.utils.utils import get_time, to_compact
+
+HOUR = 3_600_000
+
+
+@pytest.fixture
+def regular_klines(example_klines: pd.DataFrame) -> pd.DataFrame:
+    klines = example_klines.copy()
+    klines["TIME"] = klines["TIME"].iloc[0] + np.arange(len(klines)) * HOUR
+    return klines
+
+
+@pytest.fixture
+def broken_klines(regular_klines: pd.DataFrame) -> pd.DataFrame:
+    # Drops the klines 10 to 12 and 100 and repeats the kline 200.
+    rows = [i for i in range(len(regular_klines)) if i not in (10, 11, 12, 100)]
+    rows.insert(rows.index(200), 200)
+    return regular_klines.iloc[rows].reset_index(drop=True)
+
+
+class TestFindGaps:
+    def test_regular(self, regular_klines: pd.DataFrame):
+        kline_gaps = find_gaps(regular_klines, "1h")
+
+        assert kline_gaps.is_regular()
+
+    def test_gaps_and_duplicates(
+        self, regular_klines: pd.DataFrame, broken_klines: pd.DataFrame
+    ):
+        time = regular_klines["TIME"]
+
+        kline_gaps = find_gaps(broken_klines, "1h")
+
+        assert kline_gaps.gaps["TIME_BEFORE"].tolist() == [time[9], time[99]]
+        assert kline_gaps.gaps["TIME_AFTER"].tolist() == [time[13], time[101]]
+        assert kline_gaps.gaps["N_MISSING"].tolist() == [3, 1]
+        assert kline_gaps.duplicates.tolist() == [time[200]]
+        assert len(kline_gaps.misaligned) == 0
+        assert not kline_gaps.is_regular()
+
+    def test_misaligned(self, regular_klines: pd.DataFrame):
+        regular_klines.loc[50:, "TIME"] += HOUR // 2
+
+        kline_gaps = find_gaps(regular_klines, "1h")
+
+        assert kline_gaps.misaligned.tolist() == [regular_klines["TIME"][50]]
+        assert kline_gaps.gaps["N_MISSING"].tolist() == [0]
+
+    def test_unsorted_raises(self, regular_klines: pd.DataFrame):
+        with pytest.raises(ValueError):
+            find_gaps(regular_klines.iloc[::-1], "1h")
+
+    def test_invalid_interval_raises(self, regular_klines: pd.DataFrame):
+        with pytest.raises(ValueError):
+            find_gaps(regular_klines, "1x")
+
+
+class TestFillGaps:
+    def test_fill_gaps(self, regular_klines: pd.DataFrame, broken_klines: pd.DataFrame):
+        repaired = fill_gaps(broken_klines, "1h")
+
+        expected = regular_klines.copy()
+        for row in (10, 11, 12, 100):
+            close = expected["CLOSE"][9 if row < 100 else 99]
+            expected.loc[row, ["OPEN", "HIGH", "LOW", "CLOSE"]] = close
+            expected.loc[row, "VOLUME"] = 0.0
+        pd.testing.assert_frame_equal(repaired, expected)
+        assert find_gaps(repaired, "1h").is_regular()
+
+    def test_fill_gaps_compact(self, broken_klines: pd.DataFrame):
+        compact = to_compact(broken_klines)
+
+        repaired = fill_gaps(compact, "1h")
+
+        expected = fill_gaps(broken_klines, "1h")
+        np.testing.assert_array_equal(get_time(repaired), expected["TIME"])
+        assert repaired.dtypes.equals(compact.dtypes)
+        assert repaired.attrs == compact.attrs
+
+    def test_misaligned_raises(self, regular_klines: pd.DataFrame):
+        regular_klines.loc[50:, "TIME"] += HOUR // 2
+
+        with pytest.raises(ValueError):
+            fill_gaps(regular_klines, "1h")
+
+
+class TestSetTimeIndex:
+    def test_loc_slices_by_time(self, regular_klines: pd.DataFrame):
+        set_time_index(regular_klines)
+        start = pd.Timestamp(regular_klines["TIME"].iloc[10], unit="ms", tz="UTC")
+        end = pd.Timestamp(regular_klines["TIME"].iloc[20], unit="ms", tz="UTC")
+
+        window = regular_klines.loc[start:end]
+
+        assert regular_klines.index.name == "DATE"
+        assert window["TIME"].tolist() == regular_klines["TIME"].iloc[10:21].tolist()
+
+    def test_compact(self, regular_klines: pd.DataFrame):
+        compact = to_compact(regular_klines)
+
+        set_time_index(compact)
+
+        np.testing.assert_array_equal(
+            compact.index.asi8 // 1_000_000, regular_klines["TIME"]
+        )
+
+    def test_unsorted_raises(self, regular_klines: pd.DataFrame):
+        with pytest.raises(ValueError):
+            set_time_index(regular_klines.iloc[::-1].copy())
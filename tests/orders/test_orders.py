@@ -3,6 +3,7 @@ import pytest
 import pandas as pd
 
 from py_trading_lib.orders.orders import *
+from py_trading_lib.utils.packed_bits import PackedBits
 
 
 @pytest.fixture
@@ -37,3 +38,66 @@ class TestOrderGenerator:
         order_generator = OrderGenerator(pd.Series([True, True]), OrderLongOpen())
         orders = order_generator.generate()
         assert orders[0] is not orders[1]
+
+
+class TestCompactOrders:
+    def test_positions_and_codes(self):
+        signal = pd.Series([False, True, False, True])
+
+        orders = OrderGenerator(signal, OrderLongClose()).generate_compact()
+
+        assert orders.positions.tolist() == [1, 3]
+        assert orders.codes.tolist() == [ORDER_CODES[OrderLongClose]] * 2
+        assert orders.get_codes().tolist() == [0, 2, 0, 2]
+
+    def test_to_series_equals_generate(self):
+        signal = pd.Series([True, False, True], index=[10, 20, 30], name="signal")
+        order_generator = OrderGenerator(signal, OrderLongOpen())
+        expected = order_generator.generate()
+
+        orders = order_generator.generate_compact().to_series()
+
+        pd.testing.assert_series_equal(orders.map(type), expected.map(type))
+        assert orders.name == expected.name
+
+    def test_to_orders_are_not_references(self):
+        order_generator = OrderGenerator(pd.Series([True, True]), OrderLongOpen())
+
+        orders = order_generator.generate_compact().to_orders()
+
+        assert len(orders) == 2
+        assert orders[0] is not orders[1]
+
+    def test_unknown_order_type(self):
+        class UnknownOrder(Order):
+            pass
+
+        order_generator = OrderGenerator(pd.Series([True]), UnknownOrder())
+
+        with pytest.raises(TypeError):
+            order_generator.generate_compact()
+
+
+class TestPackedSignal:
+    def test_generate_compact_equals_series(self):
+        signal = pd.Series([False, True, False, True] * 50)
+        expected = OrderGenerator(signal, OrderLongOpen()).generate_compact()
+
+        packed = PackedBits.from_bools(signal.to_numpy())
+        orders = OrderGenerator(packed, OrderLongOpen()).generate_compact()
+
+        assert orders.positions.tolist() == expected.positions.tolist()
+        assert orders.index.equals(expected.index)
+
+    def test_generate_with_index(self):
+        packed = PackedBits.from_bools([True, False, True])
+        index = pd.Index([10, 20, 30])
+
+        orders = OrderGenerator(packed, OrderLongClose(), index).generate()
+
+        assert orders.index.tolist() == [10, 20, 30]
+        assert orders.isna().tolist() == [False, True, False]
+
+    def test_index_wrong_len(self):
+        with pytest.raises(ValueError):
+            OrderGenerator(PackedBits.zeros(3), OrderLongOpen(), pd.RangeIndex(2))
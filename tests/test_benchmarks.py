@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.suite import compare, make_klines, parse_size
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [("10k", 10_000), ("1M", 1_000_000), ("2.5M", 2_500_000), ("7", 7)],
+)
+def test_parse_size(size: str, expected: int):
+    assert parse_size(size) == expected
+
+
+def test_make_klines():
+    klines = make_klines(20_000)
+
+    assert len(klines) == 20_000
+    assert klines["TIME"].is_monotonic_increasing
+    assert klines["TIME"].is_unique
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": [{"name": "a", "rows": 1, "min": 1.0}]}
+    results = {
+        "results": [
+            {"name": "a", "rows": 1, "min": 1.2},
+            {"name": "b", "rows": 1, "min": 9.0},
+        ]
+    }
+
+    assert compare(baseline, results, threshold=0.1) == ["a [1 rows]"]
+    assert compare(baseline, results, threshold=0.3) == []
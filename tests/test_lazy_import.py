@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import pytest
+
+import py_trading_lib
+
+
+def _run_isolated(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def test_import_does_not_load_subpackages():
+    code = (
+        "import sys, py_trading_lib; "
+        "print([m for m in ('pandas', 'numpy', 'pandas_ta', 'py_trading_lib.analysis') if m in sys.modules])"
+    )
+
+    assert _run_isolated(code) == "[]"
+
+
+def test_indicator_does_not_load_pandas_ta():
+    code = (
+        "import sys; from py_trading_lib import SMA, LocalKlines; "
+        "SMA(5).calculate(LocalKlines().get_tohlcv_from_csv('./example_klines/BTC_USDT.csv')); "
+        "print('pandas_ta' in sys.modules)"
+    )
+
+    assert _run_isolated(code) == "False"
+
+
+@pytest.mark.parametrize(
+    "subpackage", ["utils", "data_handler", "analysis", "backtesting"]
+)
+def test_lazy_subpackage_exports(subpackage: str):
+    module = getattr(py_trading_lib, subpackage)
+
+    exported = py_trading_lib._LAZY_SUBPACKAGES[subpackage]
+
+    assert set(exported) == set(module.__all__)
+    for name in exported:
+        assert getattr(py_trading_lib, name) is getattr(module, name)
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        py_trading_lib.does_not_exist
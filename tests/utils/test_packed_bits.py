@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from py_trading_lib.utils.packed_bits import *
+
+
+@pytest.fixture()
+def random_bools():
+    rng = np.random.default_rng(0)
+    return rng.random(1000) < 0.3, rng.random(1000) < 0.6
+
+
+class TestPackedBits:
+    @pytest.mark.parametrize("n_bits", [0, 1, 7, 63, 64, 65, 1000])
+    def test_to_bools_roundtrip(self, n_bits: int):
+        values = np.arange(n_bits) % 3 == 0
+
+        bits = PackedBits.from_bools(values)
+
+        assert bits.to_bools().tolist() == values.tolist()
+        assert len(bits) == n_bits
+
+    def test_nbytes(self):
+        bits = PackedBits.from_bools(np.ones(1000, dtype=bool))
+
+        assert bits.get_nbytes() == 128
+
+    def test_and_or(self, random_bools):
+        a, b = random_bools
+        packed_a, packed_b = PackedBits.from_bools(a), PackedBits.from_bools(b)
+
+        assert (packed_a & packed_b).to_bools().tolist() == (a & b).tolist()
+        assert (packed_a | packed_b).to_bools().tolist() == (a | b).tolist()
+
+    @pytest.mark.parametrize("n_bits", [5, 64, 100])
+    def test_invert_keeps_padding_clear(self, n_bits: int):
+        values = np.zeros(n_bits, dtype=bool)
+
+        inverted = ~PackedBits.from_bools(values)
+
+        assert inverted.to_bools().all()
+        assert inverted.count() == n_bits
+
+    def test_count(self, random_bools):
+        a, _ = random_bools
+
+        assert PackedBits.from_bools(a).count() == np.count_nonzero(a)
+
+    def test_positions(self, random_bools):
+        a, _ = random_bools
+
+        positions = PackedBits.from_bools(a).positions()
+
+        assert positions.tolist() == np.flatnonzero(a).tolist()
+
+    def test_positions_empty(self):
+        assert PackedBits.zeros(100).positions().tolist() == []
+
+    def test_different_len(self):
+        with pytest.raises(ValueError):
+            PackedBits.zeros(10) & PackedBits.zeros(100)
+
+    def test_combine_nothing(self):
+        with pytest.raises(ValueError):
+            PackedBits.all_of([])
+
+    def test_invalid_words(self):
+        with pytest.raises(TypeError):
+            PackedBits(np.zeros(1, dtype=np.int64), 10)
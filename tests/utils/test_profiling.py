@@ -0,0 +1,93 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from py_trading_lib.analysis import *
+from py_trading_lib.utils.profiling import *
+from py_trading_lib.utils.profiling import record
+
+
+@pytest.fixture
+def example_analysis() -> Analysis:
+    analysis = Analysis()
+    sma = analysis.add_ti(SMA(5))[0]
+    relation = analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+    analysis.add_condition(CheckAllTrue([relation]))
+    return analysis
+
+
+def test_report_contains_named_stages(
+    example_analysis: Analysis, example_klines: pd.DataFrame
+):
+    with Profiler() as profiler:
+        example_analysis.calculate_analysis_data(example_klines)
+        example_analysis.calculate_analysis_data(example_klines)
+    report = profiler.report()
+
+    assert report.get("analysis", "calculate_analysis_data").calls == 2
+    assert report.get("indicator", "SMA_5").calls == 2
+    assert report.get("sanity_checks", "SMA_5").calls == 2
+    assert report.get("condition", "CLOSE>SMA_5").calls == 2
+    assert report.get("write", "CheckAllTrue=['CLOSE>SMA_5']").calls == 2
+    assert report.get("indicator", "SMA_5").allocated_bytes is None
+
+
+def test_nested_stages_are_included(
+    example_analysis: Analysis, example_klines: pd.DataFrame
+):
+    with Profiler() as profiler:
+        example_analysis.calculate_analysis_data(example_klines)
+    report = profiler.report()
+
+    indicator = report.get("indicator", "SMA_5")
+    analysis = report.get("analysis", "calculate_analysis_data")
+    assert 0 < report.get("sanity_checks", "SMA_5").seconds <= indicator.seconds
+    assert indicator.seconds <= analysis.seconds
+
+
+def test_to_frame(example_analysis: Analysis, example_klines: pd.DataFrame):
+    with Profiler() as profiler:
+        example_analysis.calculate_analysis_data(example_klines)
+
+    frame = profiler.report().to_frame()
+
+    assert frame.columns.tolist() == [
+        "STAGE",
+        "NAME",
+        "CALLS",
+        "SECONDS",
+        "ALLOCATED_BYTES",
+    ]
+    assert frame["SECONDS"].is_monotonic_decreasing
+
+
+def test_hook(example_analysis: Analysis, example_klines: pd.DataFrame):
+    events = []
+
+    with Profiler(hook=events.append) as profiler:
+        example_analysis.calculate_analysis_data(example_klines)
+
+    assert events[-1].stage == "analysis"
+    assert len(events) == sum(stats.calls for stats in profiler.report().stats.values())
+
+
+def test_track_memory():
+    with Profiler(track_memory=True) as profiler:
+        with record("outer", "a"):
+            with record("inner", "b"):
+                values = np.ones(1_000_000)
+            del values
+    report = profiler.report()
+
+    assert report.get("inner", "b").allocated_bytes >= 8_000_000
+    assert report.get("outer", "a").allocated_bytes >= 8_000_000
+
+
+def test_disabled_records_nothing(
+    example_analysis: Analysis, example_klines: pd.DataFrame
+):
+    profiler = Profiler()
+    example_analysis.calculate_analysis_data(example_klines)
+
+    assert profiler.report().stats == {}
@@ -1,10 +1,12 @@
 import pytest
 from typing import Dict, List
 
+import numpy as np
 import pandas as pd
 
+from py_trading_lib.analysis import SMA, Analysis, CheckRelation
 from py_trading_lib.utils.sanity_checks import *
-from py_trading_lib.utils.sanity_checks import check_cols_exist_in_df
+from py_trading_lib.utils.sanity_checks import check_cols_exist_in_df, check_tohlcv
 
 
 @pytest.fixture
@@ -131,6 +133,14 @@ def test_check_contains_only_numbers_pass(data: List):
     check_contains_only_numbers(df)
 
 
+def test_check_contains_only_numbers_compact():
+    df = pd.DataFrame({"a": [1, 2], "b": [0.5, 1.5]}).astype(
+        {"a": "int32", "b": "float32"}
+    )
+
+    check_contains_only_numbers(df)
+
+
 @pytest.mark.parametrize(
     "data",
     [
@@ -177,3 +187,105 @@ def test_check_is_list1_in_list2_pass(list1: List):
 def test_check_is_list1_in_list2_fail():
     with pytest.raises(ValueError):
         check_is_list1_in_list2([1, 2, 3, 4], [1, 2])
+
+
+@pytest.fixture
+def validation_level():
+    previous_level = get_validation_level()
+    yield set_validation_level
+    set_validation_level(previous_level)
+
+
+def test_check_frame_only_selected_cols():
+    df = pd.DataFrame({"a": [1.0, None], "b": [1, 2], "c": ["x", "y"]})
+
+    check_frame(df, ["b"], only_numbers=True)
+
+
+def test_check_frame_allow_nans():
+    df = pd.DataFrame({"a": [1.0, None], "b": [1, 2]})
+
+    check_frame(df, ["a", "b"], only_numbers=True, allow_nans=True)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"a": [1.0, float("nan")]},
+        {"a": ["x", None]},
+        {"a": pd.array([1, None], dtype="Int64")},
+        {"a": pd.to_datetime(["2024-01-01", None])},
+    ],
+)
+def test_check_frame_nans_fail(data: Dict):
+    df = pd.DataFrame(data)
+
+    with pytest.raises(ValueError):
+        check_frame(df)
+
+
+def test_check_tohlcv_once_skips_validated(validation_level, example_klines):
+    validation_level("once")
+    check_tohlcv(example_klines)
+    example_klines.loc[0, "CLOSE"] = None
+
+    check_tohlcv(example_klines)
+
+    assert is_validated(example_klines)
+
+
+def test_check_tohlcv_once_revalidates_changed_columns(
+    validation_level, example_klines
+):
+    validation_level("once")
+    check_tohlcv(example_klines)
+    example_klines["EXTRA"] = None
+
+    with pytest.raises(ValueError):
+        check_tohlcv(example_klines)
+
+
+def test_check_tohlcv_full(validation_level, example_klines):
+    validation_level("full")
+    check_tohlcv(example_klines)
+    example_klines.loc[0, "CLOSE"] = None
+
+    with pytest.raises(ValueError):
+        check_tohlcv(example_klines)
+
+    assert not is_validated(example_klines)
+
+
+def test_check_tohlcv_off(validation_level, not_kline_data):
+    validation_level("off")
+
+    check_tohlcv(not_kline_data)
+
+
+def test_mark_validated(validation_level, not_kline_data):
+    validation_level("once")
+    mark_validated(not_kline_data)
+
+    check_tohlcv(not_kline_data)
+
+    assert not is_validated(not_kline_data.copy())
+
+
+def test_set_validation_level_invalid(validation_level):
+    with pytest.raises(ValueError):
+        validation_level("sometimes")
+
+
+def test_validation_level_default_is_full():
+    assert get_validation_level() == "full"
+
+
+def test_check_tohlcv_full_notices_in_place_changes(example_klines):
+    analysis = Analysis()
+    sma = analysis.add_ti(SMA(5))[0]
+    analysis.add_condition(CheckRelation("CLOSE", ">", sma))
+    analysis.calculate_analysis_data(example_klines)
+    example_klines.loc[10, "CLOSE"] = np.nan
+
+    with pytest.raises(ValueError):
+        analysis.calculate_analysis_data(example_klines)
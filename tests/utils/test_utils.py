@@ -1,5 +1,6 @@
 import pytest
 
+import numpy as np
 import pandas as pd
 
 from py_trading_lib.utils.utils import *
@@ -47,3 +48,59 @@ def test_select_only_needed_cols_fail():
 
     with pytest.raises(KeyError):
         select_only_needed_cols(["z"], df)
+
+
+def test_get_fingerprint_equal_data():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [0.5, 0.25, 0.125]})
+
+    assert get_fingerprint(df) == get_fingerprint(df.copy())
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        pd.DataFrame({"a": [1, 2, 4], "b": [0.5, 0.25, 0.125]}),
+        pd.DataFrame({"a": [1, 2, 3], "c": [0.5, 0.25, 0.125]}),
+        pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [0.5, 0.25, 0.125]}),
+        pd.DataFrame({"a": [1, 2, 3], "b": [0.5, 0.25, 0.125]}, index=[1, 2, 3]),
+    ],
+)
+def test_get_fingerprint_changed_data(changed: pd.DataFrame):
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [0.5, 0.25, 0.125]})
+
+    assert get_fingerprint(df) != get_fingerprint(changed)
+
+
+def test_get_fingerprint_object_data():
+    df = pd.DataFrame({"a": ["x", "y"]})
+
+    assert get_fingerprint(df) == get_fingerprint(df.copy())
+
+
+@pytest.mark.parametrize("step, unit", [(60_000, 1000), (60_001, 1)])
+def test_to_compact(step: int, unit: int):
+    time = 1_600_000_000_000 + step * np.arange(5, dtype=np.int64)
+    tohlcv = pd.DataFrame({"TIME": time, "CLOSE": np.linspace(1.0, 2.0, 5)})
+
+    compact = to_compact(tohlcv)
+
+    assert compact["TIME"].dtype == np.int32
+    assert compact["CLOSE"].dtype == np.float32
+    assert compact.attrs == {"TIME_BASE": int(time[0]), "TIME_UNIT": unit}
+    assert is_compact(compact) and not is_compact(tohlcv)
+    np.testing.assert_array_equal(get_time(compact), time)
+    np.testing.assert_array_equal(get_time(tohlcv), time)
+
+
+def test_to_compact_out_of_range():
+    tohlcv = pd.DataFrame({"TIME": [0, 2**40 + 1], "CLOSE": [1.0, 2.0]})
+
+    with pytest.raises(ValueError):
+        to_compact(tohlcv)
+
+
+def test_get_fingerprint_compact_time_base():
+    tohlcv = pd.DataFrame({"TIME": [0, 60_000], "CLOSE": [1.0, 2.0]})
+    shifted = tohlcv.assign(TIME=tohlcv["TIME"] + 60_000)
+
+    assert get_fingerprint(to_compact(tohlcv)) != get_fingerprint(to_compact(shifted))